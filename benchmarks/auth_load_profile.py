@@ -0,0 +1,149 @@
+"""
+Rows loaded per authenticated request.
+
+Seeds a staff of ``--users`` employees sharing one role across a few
+branches, then counts the statements and rows the ORM session fetches for:
+
+- ``permission_check_cold``: ``require_permission`` with an empty permission cache
+- ``permission_check_warm``: the same check once the cache is populated
+- ``login``: ``authenticate_user`` (user row plus role name)
+- ``legacy_eager_graph``: loading one user the way the old ``lazy="selectin"``
+  relationships did (role, every user in it, their branches and the branches' users)
+
+and fails if the permission check or login fetch more rows than they need,
+so it doubles as a regression check for the relationship load profiles.
+
+Usage (from the repository root)::
+
+    PYTHONPATH=src python -m benchmarks.auth_load_profile
+    PYTHONPATH=src python -m benchmarks.auth_load_profile --users 2000 --output auth_rows.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from possystem.db.session import Base
+from possystem import models  # noqa: F401  (registers every table on Base.metadata)
+from possystem.models.branches.orm import Branch
+from possystem.models.permissions.orm import Permission
+from possystem.models.roles.orm import Role
+from possystem.models.role_has_permissions.orm import role_has_permissions
+from possystem.models.users.orm import User
+from possystem.seeds.seed_permissions import PERMISSIONS
+from possystem.utils.permission_cache import permission_cache
+from possystem.utils.security import authenticate_user, require_permission
+
+
+PASSWORD = "bench-password"
+
+
+def seed_staff(sync_engine, users: int, branches: int):
+    from possystem.utils.password_hashing import bcrypt_context
+
+    Base.metadata.drop_all(sync_engine)
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Permission), [{"name": name} for name in PERMISSIONS])
+        role_id = conn.scalar(insert(Role).returning(Role.id), [{"name": "cajero"}])
+        conn.execute(insert(role_has_permissions), [
+            {"role_id": role_id, "permission_id": permission_id}
+            for permission_id in conn.scalars(select(Permission.id)).all()
+        ])
+        conn.execute(insert(Branch), [{"name": f"Sucursal {i}", "address": f"Calle {i}"} for i in range(branches)])
+        branch_ids = conn.scalars(select(Branch.id)).all()
+        password = bcrypt_context.hash(PASSWORD)
+        conn.execute(insert(User), [
+            {
+                "name": f"Empleado {i}",
+                "email": f"empleado{i}@bench.local",
+                "password": password,
+                "role_id": role_id,
+                "branch_id": branch_ids[i % len(branch_ids)],
+            }
+            for i in range(users)
+        ])
+        return conn.scalar(select(func.min(User.id)))
+
+
+async def measure(session_factory, action) -> dict:
+    """Statements and rows fetched through the session while ``action(db)`` runs."""
+    counts = {"statements": 0, "rows": 0}
+    async with session_factory() as db:
+        @event.listens_for(db.sync_session, "do_orm_execute")
+        def count_rows(state):
+            frozen = state.invoke_statement().freeze()
+            counts["statements"] += 1
+            counts["rows"] += len(frozen.data)
+            return frozen()
+
+        await action(db)
+    return counts
+
+
+async def run(args) -> dict:
+    sync_engine = create_engine(args.sync_url)
+    user_id = seed_staff(sync_engine, args.users, args.branches)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(args.async_url)
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+    check = require_permission("sales.create")
+    token = {"id": user_id, "permission_claims": {}}
+
+    async def legacy_graph(db):
+        await db.scalar(
+            select(User)
+            .options(
+                selectinload(User.role).selectinload(Role.users).selectinload(User.branch).selectinload(Branch.users),
+                selectinload(User.role).selectinload(Role.permissions).selectinload(Permission.roles),
+            )
+            .where(User.id == user_id)
+        )
+
+    try:
+        permission_cache.invalidate()
+        results = {"permission_check_cold": await measure(session_factory, lambda db: check(token, db))}
+        results["permission_check_warm"] = await measure(session_factory, lambda db: check(token, db))
+        results["login"] = await measure(
+            session_factory, lambda db: authenticate_user(db, "empleado0@bench.local", PASSWORD)
+        )
+        results["legacy_eager_graph"] = await measure(session_factory, legacy_graph)
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+def main():
+    default_db = os.path.join(tempfile.gettempdir(), "possystem_bench_auth.sqlite")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sync-url", default=f"sqlite:///{default_db}")
+    parser.add_argument("--async-url", default=f"sqlite+aiosqlite:///{default_db}")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--branches", type=int, default=20)
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"{'scenario':<24}{'statements':>12}{'rows':>8}")
+    for label, r in results.items():
+        print(f"{label:<24}{r['statements']:>12}{r['rows']:>8}")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"config": vars(args), "results": results}, fh, indent=2)
+
+    # One role_id row plus the role's permission names; nothing from other users or branches.
+    limits = {"permission_check_cold": 1 + len(PERMISSIONS), "permission_check_warm": 0, "login": 1}
+    failed = [label for label, limit in limits.items() if results[label]["rows"] > limit]
+    if failed:
+        raise SystemExit(f"Too many rows loaded for: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
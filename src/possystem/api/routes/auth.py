@@ -1,14 +1,19 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
+import time
 from starlette import status
 from ...utils.security import authenticate_user, create_jwt_token
+from ...utils.permission_cache import permission_cache
+from ...utils.token_permissions import build_permission_claims
+from ...utils.password_hashing import login_latency
+from ...config import settings
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 auth_dependency = Annotated[OAuth2PasswordRequestForm, Depends()]
 
 
@@ -20,7 +25,11 @@ router = APIRouter(
 
 @router.post("/token")
 async def login_user(form_data: auth_dependency, db: db_dependency):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    started = time.perf_counter()
+    try:
+        user = await authenticate_user(db, form_data.username, form_data.password)
+    finally:
+        login_latency.record(time.perf_counter() - started)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -28,11 +37,19 @@ async def login_user(form_data: auth_dependency, db: db_dependency):
             headers={"WWW-Authenticate": "Bearer"}
         )
     expires_delta = timedelta(minutes=30)
+
+    permission_claims = None
+    if settings.jwt_permission_claims:
+        version = await permission_cache.shared_version(db, fresh=True)
+        permissions = await permission_cache.get_role_permissions(db, user.role_id) if user.role_id else frozenset()
+        permission_claims = build_permission_claims(permissions, version)
+
     access_token = create_jwt_token(
         username=user.email,
         user_id=user.id,
         role = user.role.name if user.role else None, # Assuming user has a role attribute
-        expires_delta=expires_delta
+        expires_delta=expires_delta,
+        permission_claims=permission_claims
     )
     return {
         "access_token": access_token,
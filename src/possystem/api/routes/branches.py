@@ -2,12 +2,14 @@ from fastapi import Depends, HTTPException, APIRouter
 from starlette import status
 from ...models.branches.orm import Branch
 from typing import Annotated
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from ...models.branches.schemas import BranchResponse, BranchBase, BranchUpdate,BranchWithUsersResponse
-from ...db.session import get_db
+from ...db.session import get_async_db
 from ...utils.permissions import CAN_READ_BRANCHES, CAN_CREATE_BRANCHES, CAN_UPDATE_BRANCHES, CAN_DELETE_BRANCHES
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/branches",
@@ -23,7 +25,7 @@ router = APIRouter(
             dependencies=CAN_READ_BRANCHES
             )
 async def read_all(db: db_dependency):
-    branches = db.query(Branch).all()
+    branches = (await db.scalars(select(Branch))).all()
     return branches
 
 
@@ -34,7 +36,7 @@ async def read_all(db: db_dependency):
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_BRANCHES)
 async def read_by_id(branch_id: int, db: db_dependency):
-    branch_model = db.query(Branch).filter(Branch.id == branch_id).first()
+    branch_model = await db.scalar(select(Branch).options(selectinload(Branch.users)).where(Branch.id == branch_id))
 
     if not branch_model:
         raise HTTPException(status_code=404, detail='Branch not found')
@@ -49,7 +51,7 @@ async def read_by_id(branch_id: int, db: db_dependency):
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_BRANCHES)
 async def read_users_by_branch(branch_id: int, db: db_dependency):
-    branch_model = db.query(Branch).filter(Branch.id == branch_id).first()
+    branch_model = await db.scalar(select(Branch).options(selectinload(Branch.users)).where(Branch.id == branch_id))
 
     if not branch_model:
         raise HTTPException(status_code=404, detail='Branch not found')
@@ -66,14 +68,14 @@ async def read_users_by_branch(branch_id: int, db: db_dependency):
 async def create_branch(db: db_dependency, branch_request: BranchBase):
     branch_model = Branch(**branch_request.model_dump())
 
-    branch_found = db.query(Branch).filter(Branch.name.ilike(branch_model.name)).first()
+    branch_found = await db.scalar(select(Branch).where(Branch.name.ilike(branch_model.name)))
 
     if branch_found:
         raise HTTPException(status_code=409, detail='Branch already exists')
 
     db.add(branch_model)
-    db.commit()
-    db.refresh(branch_model)
+    await db.commit()
+    await db.refresh(branch_model)
     return branch_model
 
 
@@ -84,7 +86,7 @@ async def create_branch(db: db_dependency, branch_request: BranchBase):
             description="Updates an existing branch in the database.",
             dependencies=CAN_UPDATE_BRANCHES)
 async def update_branch(branch_id: int, db: db_dependency, branch_request: BranchUpdate):
-    branch_model = db.query(Branch).filter(Branch.id == branch_id).first()
+    branch_model = await db.scalar(select(Branch).where(Branch.id == branch_id))
 
     if not branch_model:
         raise HTTPException(status_code=404, detail='Branch not found')
@@ -92,8 +94,8 @@ async def update_branch(branch_id: int, db: db_dependency, branch_request: Branc
     for key, value in branch_request.model_dump(exclude_unset=True).items():
         setattr(branch_model, key, value)
 
-    db.commit()
-    db.refresh(branch_model)
+    await db.commit()
+    await db.refresh(branch_model)
     return branch_model
 
 
@@ -103,11 +105,11 @@ async def update_branch(branch_id: int, db: db_dependency, branch_request: Branc
             description="Deletes an existing branch from the database.",
             dependencies=CAN_DELETE_BRANCHES)
 async def delete_branch(branch_id: int, db: db_dependency):
-    branch_model = db.query(Branch).filter(Branch.id == branch_id).first()
+    branch_model = await db.scalar(select(Branch).where(Branch.id == branch_id))
 
     if not branch_model:
         raise HTTPException(status_code=404, detail='Branch not found')
 
-    db.delete(branch_model)
-    db.commit()
+    await db.delete(branch_model)
+    await db.commit()
     return None
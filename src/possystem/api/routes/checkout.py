@@ -0,0 +1,31 @@
+from fastapi import Depends, APIRouter
+from typing import Annotated
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from ...db.session import get_async_db
+from ...models.sales.schemas import CheckoutRequest, CheckoutResponse
+from ...services.checkout import checkout
+from ...utils.permissions import CAN_CREATE_SALES
+from ...utils.security import user_dependency
+
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
+
+router = APIRouter(
+    prefix="/checkout",
+    tags=["Checkout"]
+)
+
+
+@router.post(
+    "/",
+    response_model=CheckoutResponse,
+    summary="Ring up a complete sale",
+    description="Creates the sale, its lines, payments and batch usages in a single transaction. "
+                "Prices, discounts and taxes are computed from the products; payments must add up to the total.",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=CAN_CREATE_SALES
+)
+async def create_checkout(request: CheckoutRequest, db: db_dependency, token_data: user_dependency):
+    result = await checkout(db, token_data["id"], request)
+    await db.commit()
+    return result
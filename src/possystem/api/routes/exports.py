@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from ...db.session import AsyncSessionLocal
+from ...models.sales.orm import Sale
+from ...models.sale_details.orm import SaleDetail
+from ...models.sale_payments.orm import SalePayment
+from ...utils.permissions import CAN_READ_SALES, CAN_READ_SALE_DETAILS, CAN_READ_SALE_PAYMENTS
+from ...utils.db_time import to_server_time
+
+# Rows fetched from the server-side cursor per round trip; also the size of each chunk written out.
+EXPORT_BATCH_SIZE = 1000
+
+router = APIRouter(
+    prefix="/exports",
+    tags=["Exports"]
+)
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+SALE_COLUMNS = (
+    Sale.id.label("sale_id"),
+    Sale.date_sale,
+    Sale.branch_id,
+    Sale.user_id,
+    Sale.subtotal.label("sale_subtotal"),
+    Sale.discount.label("sale_discount"),
+    Sale.tax.label("sale_tax"),
+    Sale.total.label("sale_total"),
+)
+
+
+def _filter_sales(query: Select, date_from: Optional[datetime], date_to: Optional[datetime], branch_id: Optional[int]) -> Select:
+    # Soft-deleted sales, lines and payments are left out, as in the report rollups
+    query = query.where(Sale.deleted_at.is_(None))
+    if date_from is not None:
+        query = query.where(Sale.date_sale >= to_server_time(date_from))
+    if date_to is not None:
+        query = query.where(Sale.date_sale < to_server_time(date_to))
+    if branch_id is not None:
+        query = query.where(Sale.branch_id == branch_id)
+    return query
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def _stream_rows(query: Select, export_format: ExportFormat):
+    """
+    Runs ``query`` on a server-side cursor and yields encoded chunks of
+    EXPORT_BATCH_SIZE rows, so memory stays flat however large the export is.
+
+    The generator opens its own session: the response body is produced after
+    the endpoint returns, outside the lifetime of request dependencies.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+
+        if export_format is ExportFormat.csv:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            async for partition in result.partitions():
+                writer.writerows(partition)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            async for partition in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+                    for row in partition
+                )
+
+
+def _export_response(query: Select, export_format: ExportFormat, name: str) -> StreamingResponse:
+    media_type = "text/csv" if export_format is ExportFormat.csv else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_rows(query, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format.value}"'},
+    )
+
+
+@router.get("/sale-lines",
+            summary="Export sale lines",
+            description="Stream one row per sale detail joined with its sale header, as NDJSON or CSV. "
+                        "Filter by sale date range [date_from, date_to) and branch.",
+            dependencies=CAN_READ_SALES + CAN_READ_SALE_DETAILS)
+async def export_sale_lines(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    branch_id: Optional[int] = Query(None, gt=0),
+):
+    query = (
+        select(
+            *SALE_COLUMNS,
+            SaleDetail.id.label("sale_detail_id"),
+            SaleDetail.product_id,
+            SaleDetail.quantity,
+            SaleDetail.price_unit,
+            SaleDetail.discount,
+            SaleDetail.tax,
+            SaleDetail.subtotal,
+            SaleDetail.total,
+        )
+        .join(SaleDetail, SaleDetail.sale_id == Sale.id)
+        .where(SaleDetail.deleted_at.is_(None))
+        .order_by(Sale.id, SaleDetail.id)
+    )
+    query = _filter_sales(query, date_from, date_to, branch_id)
+    return _export_response(query, export_format, "sale_lines")
+
+
+@router.get("/sale-payments",
+            summary="Export sale payments",
+            description="Stream one row per sale payment joined with its sale header, as NDJSON or CSV. "
+                        "Filter by sale date range [date_from, date_to) and branch.",
+            dependencies=CAN_READ_SALES + CAN_READ_SALE_PAYMENTS)
+async def export_sale_payments(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    branch_id: Optional[int] = Query(None, gt=0),
+):
+    query = (
+        select(
+            *SALE_COLUMNS,
+            SalePayment.id.label("sale_payment_id"),
+            SalePayment.method_payment,
+            SalePayment.n_transaction,
+            SalePayment.bank,
+            SalePayment.amount,
+        )
+        .join(SalePayment, SalePayment.sale_id == Sale.id)
+        .where(SalePayment.deleted_at.is_(None))
+        .order_by(Sale.id, SalePayment.id)
+    )
+    query = _filter_sales(query, date_from, date_to, branch_id)
+    return _export_response(query, export_format, "sale_payments")
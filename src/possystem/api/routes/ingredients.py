@@ -1,13 +1,14 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
 from ...models.ingredients.orm import Ingredient
 from ...models.ingredients.schemas import IngredientCreate, IngredientResponse, IngredientUpdate
 from ...utils.permissions import CAN_READ_INGREDIENTS, CAN_CREATE_INGREDIENTS, CAN_UPDATE_INGREDIENTS, CAN_DELETE_INGREDIENTS
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 router = APIRouter(
@@ -22,7 +23,7 @@ router = APIRouter(
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_INGREDIENTS)
 async def read_all(db: db_dependency):
-    ingredients = db.query(Ingredient).all()
+    ingredients = (await db.scalars(select(Ingredient))).all()
     return ingredients
 
 @router.post("/",
@@ -34,7 +35,7 @@ async def read_all(db: db_dependency):
 async def create(ingredient: IngredientCreate, db: db_dependency):
 
     # chech if ingredient with the same name exists
-    existing_ingredient = db.query(Ingredient).filter(Ingredient.name == ingredient.name).first()
+    existing_ingredient = await db.scalar(select(Ingredient).where(Ingredient.name == ingredient.name))
     if existing_ingredient:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -43,8 +44,8 @@ async def create(ingredient: IngredientCreate, db: db_dependency):
 
     db_ingredient = Ingredient(**ingredient.model_dump())
     db.add(db_ingredient)
-    db.commit()
-    db.refresh(db_ingredient)
+    await db.commit()
+    await db.refresh(db_ingredient)
     return db_ingredient
 
 @router.put("/{ingredient_id}",
@@ -54,7 +55,7 @@ async def create(ingredient: IngredientCreate, db: db_dependency):
             status_code=status.HTTP_200_OK,
             dependencies=CAN_UPDATE_INGREDIENTS)
 async def update(ingredient_id: int, ingredient: IngredientUpdate, db: db_dependency):
-    db_ingredient = db.query(Ingredient).filter(Ingredient.id == ingredient_id).first()
+    db_ingredient = await db.scalar(select(Ingredient).where(Ingredient.id == ingredient_id))
     if not db_ingredient:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,7 +64,7 @@ async def update(ingredient_id: int, ingredient: IngredientUpdate, db: db_depend
 
     # Check if updating the name to one that already exists
     if ingredient.name and ingredient.name != db_ingredient.name:
-        existing_ingredient = db.query(Ingredient).filter(Ingredient.name == ingredient.name).first()
+        existing_ingredient = await db.scalar(select(Ingredient).where(Ingredient.name == ingredient.name))
         if existing_ingredient:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -74,8 +75,8 @@ async def update(ingredient_id: int, ingredient: IngredientUpdate, db: db_depend
     for key, value in ingredient.model_dump(exclude_unset=True).items():
         setattr(db_ingredient, key, value)
 
-    db.commit()
-    db.refresh(db_ingredient)
+    await db.commit()
+    await db.refresh(db_ingredient)
     return db_ingredient
 
 @router.delete("/{ingredient_id}",
@@ -84,13 +85,13 @@ async def update(ingredient_id: int, ingredient: IngredientUpdate, db: db_depend
             status_code=status.HTTP_204_NO_CONTENT,
             dependencies=CAN_DELETE_INGREDIENTS)
 async def delete(ingredient_id: int, db: db_dependency):
-    db_ingredient = db.query(Ingredient).filter(Ingredient.id == ingredient_id).first()
+    db_ingredient = await db.scalar(select(Ingredient).where(Ingredient.id == ingredient_id))
     if not db_ingredient:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ingredient not found."
         )
 
-    db.delete(db_ingredient)
-    db.commit()
+    await db.delete(db_ingredient)
+    await db.commit()
     return None
\ No newline at end of file
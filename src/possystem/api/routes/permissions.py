@@ -2,12 +2,15 @@ from fastapi import Depends, HTTPException, APIRouter
 from starlette import status
 from ...models.permissions.orm import Permission
 from typing import Annotated
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from ...models.permissions.schemas import PermissionCreate, PermissionUpdate, PermissionResponse, PermissionWithRoles
-from ...db.session import get_db  # Use the shared one
+from ...db.session import get_async_db  # Use the shared one
 from ...utils.permissions import CAN_READ_PERMISSIONS, CAN_CREATE_PERMISSIONS, CAN_UPDATE_PERMISSIONS, CAN_DELETE_PERMISSIONS
+from ...utils.permission_cache import permission_cache
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/permissions",
@@ -24,7 +27,7 @@ router = APIRouter(
             dependencies=CAN_READ_PERMISSIONS
             )
 async def read_all(db: db_dependency):
-    permissions = db.query(Permission).order_by(Permission.id.asc()).all()
+    permissions = (await db.scalars(select(Permission).order_by(Permission.id.asc()))).all()
     return permissions
 
 @router.get('/{permission_id}',
@@ -35,7 +38,7 @@ async def read_all(db: db_dependency):
             dependencies=CAN_READ_PERMISSIONS
             )
 async def read_permission(permission_id: int, db: db_dependency):
-    permission = db.get(Permission, permission_id)
+    permission = await db.get(Permission, permission_id)
     if not permission:
         raise HTTPException(status_code=404, detail='Permission not found')
     return permission
@@ -48,7 +51,7 @@ async def read_permission(permission_id: int, db: db_dependency):
             dependencies=CAN_READ_PERMISSIONS
             )
 async def read_permission_with_roles(permission_id: int, db: db_dependency):
-    permission = db.get(Permission, permission_id)
+    permission = await db.get(Permission, permission_id, options=[selectinload(Permission.roles)])
     if not permission:
         raise HTTPException(status_code=404, detail='Permission not found')
     return permission
@@ -60,13 +63,14 @@ async def read_permission_with_roles(permission_id: int, db: db_dependency):
             description="Adds a new permission to the database. The permission name must be unique.",
             dependencies=CAN_CREATE_PERMISSIONS)
 async def create_permission(db: db_dependency, permission_request: PermissionCreate):
-    existing = db.query(Permission).filter(Permission.name.ilike(permission_request.name)).first()
+    existing = await db.scalar(select(Permission).where(Permission.name.ilike(permission_request.name)))
     if existing:
         raise HTTPException(status_code=409, detail='Permission already exists')
     permission = Permission(**permission_request.model_dump())
     db.add(permission)
-    db.commit()
-    db.refresh(permission)
+    await db.commit()
+    permission_cache.invalidate()
+    await db.refresh(permission)
     return permission
 
 @router.put('/{permission_id}',
@@ -76,21 +80,22 @@ async def create_permission(db: db_dependency, permission_request: PermissionCre
             description="Updates the details of an existing permission by ID. Only the name can be updated.",
             dependencies=CAN_UPDATE_PERMISSIONS)
 async def update_permission(permission_id: int, db: db_dependency, permission_request: PermissionUpdate):
-    permission = db.get(Permission, permission_id)
+    permission = await db.get(Permission, permission_id)
 
     if not permission:
         raise HTTPException(status_code=404, detail='Permission not found')
 
     if permission_request.name:
-        existing_permission = db.query(Permission).filter(Permission.name.ilike(permission_request.name)).first()
+        existing_permission = await db.scalar(select(Permission).where(Permission.name.ilike(permission_request.name)))
         if existing_permission and existing_permission.id != permission_id:
             raise HTTPException(status_code=409, detail='Permission name already exists')
 
     for key, value in permission_request.model_dump(exclude_unset=True).items():
         setattr(permission, key, value)
 
-    db.commit()
-    db.refresh(permission)
+    await db.commit()
+    permission_cache.invalidate()
+    await db.refresh(permission)
     return permission
 
 @router.delete('/{permission_id}',
@@ -99,10 +104,11 @@ async def update_permission(permission_id: int, db: db_dependency, permission_re
             description="Deletes a permission by ID. This will remove the permission from the database.",
             dependencies=CAN_DELETE_PERMISSIONS)
 async def delete_permission(permission_id: int, db: db_dependency):
-    permission = db.query(Permission).filter(Permission.id == permission_id).first()
+    permission = await db.scalar(select(Permission).where(Permission.id == permission_id))
 
     if not permission:
         raise HTTPException(status_code=404, detail='Permission not found')
 
-    db.delete(permission)
-    db.commit()
+    await db.delete(permission)
+    await db.commit()
+    permission_cache.invalidate()
@@ -1,16 +1,21 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
 from ...models.permissions.orm import Permission
 from ...utils.permissions import CAN_READ_PRODUCT_BATCHES, CAN_CREATE_PRODUCT_BATCHES, CAN_UPDATE_PRODUCT_BATCHES, CAN_DELETE_PRODUCT_BATCHES
 from ...models.product_batch.orm import ProductBatch
 from ...models.product_batch.schemas import ProductBatchCreate, ProductBatchResponse, ProductBatchUpdate, ProductBatchDetailsResponse
 from ...models.products.orm import Product
+from ...utils.pagination import Page, page_dependency, paginate
+from ...utils.fast_json import FastJSONResponse, list_page
+from ...services.stock import adjust_stock
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 router = APIRouter(
@@ -18,32 +23,30 @@ router = APIRouter(
     tags=["Products Batches"]
 )
 
-@router.get("/", response_model=list[ProductBatchResponse],
+@router.get("/", response_model=Page[ProductBatchResponse], response_class=FastJSONResponse,
             summary="List all product batches",
-            description="Retrieve all product batches currently stored in the database.",
+            description="Retrieve product batches one page at a time, ordered by ID. Follow next_cursor for the next page.",
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_PRODUCT_BATCHES)
-def read_all_product_batches(db: db_dependency):
-    product_batches = db.query(ProductBatch).all()
-    return product_batches
+async def read_all_product_batches(db: db_dependency, page: page_dependency):
+    return await list_page(db, ProductBatch, ProductBatchResponse, page)
 
 
-@router.get("/details", response_model=list[ProductBatchDetailsResponse],
+@router.get("/details", response_model=Page[ProductBatchDetailsResponse],
             summary="List all product batches with details",
-            description="Retrieve all product batches with detailed information including associated products.",
+            description="Retrieve product batches with their associated products, one page at a time, ordered by ID.",
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_PRODUCT_BATCHES)
-def read_all_product_batches_with_details(db: db_dependency):
-    product_batches = db.query(ProductBatch).all()
-    return product_batches
+async def read_all_product_batches_with_details(db: db_dependency, page: page_dependency):
+    return await paginate(db, select(ProductBatch).options(selectinload(ProductBatch.product)), ProductBatch.id, page)
 
 @router.get("/{product_batch_id}", response_model=ProductBatchDetailsResponse,
             summary="Get product batch details",
             description="Retrieve detailed information about a specific product batch by its ID.",
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_PRODUCT_BATCHES)
-def get_product_batch_details(product_batch_id: int, db: db_dependency):
-    product_batch = db.get(ProductBatch, product_batch_id)
+async def get_product_batch_details(product_batch_id: int, db: db_dependency):
+    product_batch = await db.get(ProductBatch, product_batch_id, options=[selectinload(ProductBatch.product)])
     if not product_batch:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -56,8 +59,8 @@ def get_product_batch_details(product_batch_id: int, db: db_dependency):
             description="Create a new product batch with the provided details.",
             status_code=status.HTTP_201_CREATED,
             dependencies=CAN_CREATE_PRODUCT_BATCHES)
-def create_product_batch(product_batch: ProductBatchCreate, db: db_dependency):
-    existing_product = db.query(Product).filter(Product.id == product_batch.product_id).first()
+async def create_product_batch(product_batch: ProductBatchCreate, db: db_dependency):
+    existing_product = await db.scalar(select(Product).where(Product.id == product_batch.product_id))
     if not existing_product:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -65,8 +68,9 @@ def create_product_batch(product_batch: ProductBatchCreate, db: db_dependency):
         )
     new_product_batch = ProductBatch(**product_batch.model_dump())
     db.add(new_product_batch)
-    db.commit()
-    db.refresh(new_product_batch)
+    await adjust_stock(db, {new_product_batch.product_id: new_product_batch.quantity})
+    await db.commit()
+    await db.refresh(new_product_batch)
     return new_product_batch
 
 @router.put("/{product_batch_id}", response_model=ProductBatchResponse,
@@ -74,19 +78,26 @@ def create_product_batch(product_batch: ProductBatchCreate, db: db_dependency):
             description="Update the details of an existing product batch.",
             status_code=status.HTTP_200_OK,
             dependencies=CAN_UPDATE_PRODUCT_BATCHES)
-def update_product_batch(product_batch_id: int, product_batch: ProductBatchUpdate, db: db_dependency):
-    existing_product_batch = db.query(ProductBatch).filter(ProductBatch.id == product_batch_id).first()
+async def update_product_batch(product_batch_id: int, product_batch: ProductBatchUpdate, db: db_dependency):
+    # Locked so a concurrent sale can't move the quantity between the read and the write
+    existing_product_batch = await db.scalar(
+        select(ProductBatch).where(ProductBatch.id == product_batch_id).with_for_update()
+    )
     if not existing_product_batch:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product batch not found."
         )
 
+    old_product_id, old_quantity = existing_product_batch.product_id, existing_product_batch.quantity
     for key, value in product_batch.model_dump(exclude_unset=True).items():
         setattr(existing_product_batch, key, value)
 
-    db.commit()
-    db.refresh(existing_product_batch)
+    deltas = {old_product_id: -old_quantity}
+    deltas[existing_product_batch.product_id] = deltas.get(existing_product_batch.product_id, 0) + existing_product_batch.quantity
+    await adjust_stock(db, deltas)
+    await db.commit()
+    await db.refresh(existing_product_batch)
     return existing_product_batch
 
 @router.delete("/{product_batch_id}",
@@ -94,13 +105,16 @@ def update_product_batch(product_batch_id: int, product_batch: ProductBatchUpdat
             description="Delete an existing product batch by its ID.",
             status_code=status.HTTP_204_NO_CONTENT,
             dependencies=CAN_DELETE_PRODUCT_BATCHES)
-def delete_product_batch(product_batch_id: int, db: db_dependency):
-    existing_product_batch = db.query(ProductBatch).filter(ProductBatch.id == product_batch_id).first()
+async def delete_product_batch(product_batch_id: int, db: db_dependency):
+    existing_product_batch = await db.scalar(
+        select(ProductBatch).where(ProductBatch.id == product_batch_id).with_for_update()
+    )
     if not existing_product_batch:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product batch not found."
         )
-    db.delete(existing_product_batch)
-    db.commit()
+    await adjust_stock(db, {existing_product_batch.product_id: -existing_product_batch.quantity})
+    await db.delete(existing_product_batch)
+    await db.commit()
     return {"detail": "Product batch deleted successfully"}
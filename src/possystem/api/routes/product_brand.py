@@ -1,13 +1,14 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
 from ...utils.permissions import CAN_READ_PRODUCT_BRANDS, CAN_CREATE_PRODUCT_BRANDS, CAN_UPDATE_PRODUCT_BRANDS, CAN_DELETE_PRODUCT_BRANDS
 from ...models.product_brand.orm import ProductBrand
 from ...models.product_brand.schemas import ProductBrandCreate, ProductBrandResponse, ProductBrandUpdate
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 router = APIRouter(
@@ -22,5 +23,5 @@ router = APIRouter(
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_PRODUCT_BRANDS)
 async def read_all(db: db_dependency):
-    product_brands = db.query(ProductBrand).all()
+    product_brands = (await db.scalars(select(ProductBrand))).all()
     return product_brands
\ No newline at end of file
@@ -1,13 +1,14 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
 from ...models.product_categories.orm import ProductCategory
 from ...models.product_categories.schemas import ProductCategoryCreate, ProductCategoryResponse, ProductCategoryUpdate
 from ...utils.permissions import CAN_READ_PRODUCT_CATEGORIES, CAN_CREATE_PRODUCT_CATEGORIES, CAN_UPDATE_PRODUCT_CATEGORIES, CAN_DELETE_PRODUCT_CATEGORIES
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/productscategories",
@@ -22,7 +23,7 @@ router = APIRouter(
             dependencies=CAN_READ_PRODUCT_CATEGORIES
             )
 async def read_all(db: db_dependency):
-    product_categories = db.query(ProductCategory).all()
+    product_categories = (await db.scalars(select(ProductCategory))).all()
     return product_categories
 
 @router.get(
@@ -34,7 +35,7 @@ async def read_all(db: db_dependency):
     dependencies=CAN_READ_PRODUCT_CATEGORIES,
 )
 async def read_one(category_id: int, db: db_dependency):
-    category = db.get(ProductCategory, category_id)
+    category = await db.get(ProductCategory, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found.")
     return category
@@ -47,7 +48,7 @@ async def read_one(category_id: int, db: db_dependency):
                 dependencies=CAN_CREATE_PRODUCT_CATEGORIES
                 )
 async def create(product_category: ProductCategoryCreate, db: db_dependency):
-    existing_category = db.query(ProductCategory).filter(ProductCategory.name == product_category.name).first()
+    existing_category = await db.scalar(select(ProductCategory).where(ProductCategory.name == product_category.name))
     if existing_category:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -55,8 +56,8 @@ async def create(product_category: ProductCategoryCreate, db: db_dependency):
         )
     new_category = ProductCategory(**product_category.model_dump(mode="json"))
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    await db.refresh(new_category)
     return new_category
 
 @router.put(
@@ -68,7 +69,7 @@ async def create(product_category: ProductCategoryCreate, db: db_dependency):
     dependencies=CAN_UPDATE_PRODUCT_CATEGORIES,
 )
 async def update(category_id: int, product_category: ProductCategoryUpdate, db: db_dependency):
-    existing_category = db.get(ProductCategory, category_id)
+    existing_category = await db.get(ProductCategory, category_id)
     if not existing_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,10 +78,10 @@ async def update(category_id: int, product_category: ProductCategoryUpdate, db:
 
     # ✅ Check for duplicate names if name is provided
     if product_category.name:
-        name_conflict = db.query(ProductCategory).filter(
+        name_conflict = await db.scalar(select(ProductCategory).where(
             ProductCategory.name == product_category.name,
             ProductCategory.id != category_id
-        ).first()
+        ))
         if name_conflict:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -92,8 +93,8 @@ async def update(category_id: int, product_category: ProductCategoryUpdate, db:
     for key, value in update_data.items():
         setattr(existing_category, key, value)
 
-    db.commit()
-    db.refresh(existing_category)
+    await db.commit()
+    await db.refresh(existing_category)
     return existing_category
 
 
@@ -105,12 +106,12 @@ async def update(category_id: int, product_category: ProductCategoryUpdate, db:
     dependencies=CAN_DELETE_PRODUCT_CATEGORIES
 )
 async def delete(category_id: int, db: db_dependency):
-    existing_category = db.query(ProductCategory).filter(ProductCategory.id == category_id).first()
+    existing_category = await db.scalar(select(ProductCategory).where(ProductCategory.id == category_id))
     if not existing_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product category not found."
         )
-    db.delete(existing_category)
-    db.commit()
+    await db.delete(existing_category)
+    await db.commit()
     return None
\ No newline at end of file
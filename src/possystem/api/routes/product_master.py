@@ -1,13 +1,14 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
 from ...utils.permissions import CAN_READ_PRODUCT_MASTERS, CAN_CREATE_PRODUCT_MASTERS, CAN_UPDATE_PRODUCT_MASTERS, CAN_DELETE_PRODUCT_MASTERS
 from ...models.product_master.orm import ProductMaster
 from ...models.product_master.schemas import ProductMasterCreate, ProductMasterResponse, ProductMasterUpdate
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 router = APIRouter(
@@ -22,5 +23,5 @@ router = APIRouter(
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_PRODUCT_MASTERS)
 async def read_all(db: db_dependency):
-    product_masters = db.query(ProductMaster).all()
+    product_masters = (await db.scalars(select(ProductMaster))).all()
     return product_masters
\ No newline at end of file
@@ -1,13 +1,25 @@
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import Depends, HTTPException, APIRouter, Query, Request
+from tempfile import SpooledTemporaryFile
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
 from ...models.products.orm import Product
-from ...models.products.schemas import ProductCreate, ProductResponse, ProductUpdate, ProductSearchParams, ProductDetailsResponse
-from ...utils.permissions import CAN_READ_PRODUCTS, CAN_CREATE_PRODUCTS, CAN_UPDATE_PRODUCTS, CAN_DELETE_PRODUCTS
+from ...models.products.schemas import ProductCreate, ProductResponse, ProductUpdate, ProductSearchParams, ProductDetailsResponse, ProductScanResponse, ProductImportReport
+from ...models.product_barcodes.orm import ProductBarcode
+from ...models.product_barcodes.schemas import ProductBarcodeCreate, ProductBarcodeResponse
+from ...models.stock_on_hand.schemas import StockOnHandResponse, StockReconcileResponse
+from ...utils.permissions import CAN_READ_PRODUCTS, CAN_CREATE_PRODUCTS, CAN_UPDATE_PRODUCTS, CAN_DELETE_PRODUCTS, CAN_UPDATE_PRODUCT_BATCHES
+from ...utils.pagination import Page, page_dependency
+from ...utils.fast_json import FastJSONResponse, list_page
+from ...services import product_search
+from ...services.product_codes import product_code_index
+from ...services.product_import import ImportFormat, import_products
+from ...services.stock import get_stock, reconcile_stock
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 router = APIRouter(
@@ -15,31 +27,108 @@ router = APIRouter(
     tags=["Products"]
 )
 
+
+async def _load_product_details(db: AsyncSession, product_id: int):
+    # ProductDetailsResponse reads relationships that are lazy by default;
+    # an AsyncSession cannot lazy-load during serialization, so load them here.
+    return await db.scalar(
+        select(Product)
+        .options(selectinload(Product.brand), selectinload(Product.batches))
+        .where(Product.id == product_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+async def _ensure_code_available(db: AsyncSession, code: str):
+    # SKUs and barcodes are both scan codes; each must identify one product.
+    if await db.scalar(select(Product.id).where(Product.sku == code)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Product with this SKU already exists."
+        )
+    if await db.scalar(select(ProductBarcode.id).where(ProductBarcode.code == code)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This code is already assigned to a product barcode."
+        )
+
+
 @router.get("/",
-            response_model=list[ProductResponse],
+            response_model=Page[ProductResponse],
+            response_class=FastJSONResponse,
             summary="List all products",
-            description="Retrieve all products currently stored in the database.",
+            description="Retrieve products one page at a time, ordered by ID. Follow next_cursor for the next page.",
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_PRODUCTS)
-async def read_all(db: db_dependency):
-    products = db.query(Product).all()
-    return products
+async def read_all(db: db_dependency, page: page_dependency):
+    return await list_page(db, Product, ProductResponse, page)
 
 @router.get("/search",
             response_model=list[ProductResponse],
             summary="Search and filter products",
-            description="Search products by title, or availability.",
+            description="Search products by title, SKU, description, brand or ingredient, ranked by relevance, or filter by availability.",
             dependencies=CAN_READ_PRODUCTS)
 async def search_products(db: db_dependency, params: ProductSearchParams = Depends()):
-    query = db.query(Product)
+    return await product_search.search_products(
+        db,
+        term=params.title,
+        limit=params.limit,
+        is_active=params.is_active,
+        brand_id=params.brand_id,
+        product_master_id=params.product_master_id,
+    )
 
-    if params.title:
-        query = query.filter(Product.title.ilike(f"%{params.title}%"))
-    if params.is_active is not None:
-        query = query.filter(Product.is_active == params.is_active)
+@router.get("/by-code/{code}",
+            response_model=ProductScanResponse,
+            summary="Look up a product by barcode or SKU",
+            description="Exact match on a product barcode or SKU, served from an in-memory map. Returns price, tax and stock flags.",
+            dependencies=CAN_READ_PRODUCTS)
+async def read_product_by_code(code: str, db: db_dependency):
+    card = await product_code_index.lookup(db, code)
+    if card is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found."
+        )
+    return card
 
-    products = query.all()
-    return products
+@router.get("/stock",
+            response_model=list[StockOnHandResponse],
+            summary="Stock on hand for several products",
+            description="Units on hand per product, read from the stock_on_hand table (no aggregation over batches). "
+                        "Products without stock are returned with quantity 0.",
+            dependencies=CAN_READ_PRODUCTS)
+async def read_stock(db: db_dependency, product_id: Annotated[list[int], Query(min_length=1, max_length=500)]):
+    stock = await get_stock(db, product_id)
+    return [{"product_id": pid, "quantity": stock[pid]} for pid in product_id]
+
+@router.post("/stock/reconcile",
+            response_model=StockReconcileResponse,
+            summary="Rebuild stock on hand from the batches",
+            description="Recounts the products whose stock_on_hand no longer matches their batches and fixes them.",
+            dependencies=CAN_UPDATE_PRODUCT_BATCHES)
+async def reconcile_product_stock(db: db_dependency):
+    return await reconcile_stock(db)
+
+@router.post("/import",
+            response_model=ProductImportReport,
+            summary="Bulk import products",
+            description="Create products from a CSV (header row with ProductCreate field names) or NDJSON file sent as the "
+                        "request body. Brand, master and ingredients can be given by ID or by name; list cells in CSV are "
+                        "separated by '|'. Valid rows are imported in chunks and invalid ones are reported per row.",
+            dependencies=CAN_CREATE_PRODUCTS)
+async def import_product_catalog(
+    request: Request,
+    db: db_dependency,
+    import_format: ImportFormat = Query(ImportFormat.csv, alias="format"),
+    dry_run: bool = Query(False, description="Validate and report without writing"),
+):
+    # Spool the upload (to disk past a few MB) so a large catalog is never held in memory.
+    with SpooledTemporaryFile(max_size=8 * 1024 * 1024) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        return await import_products(db, upload, import_format, dry_run)
 
 @router.get("/{product_id}",
             response_model=ProductDetailsResponse,
@@ -48,7 +137,7 @@ async def search_products(db: db_dependency, params: ProductSearchParams = Depen
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_PRODUCTS)
 async def read_product(product_id: int, db: db_dependency):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await _load_product_details(db, product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,30 +155,27 @@ async def read_product(product_id: int, db: db_dependency):
 async def create_product(product_request: ProductCreate, db: db_dependency):
 
     # 1. Validar SKU duplicado
-    existing_product = db.query(Product).filter(Product.sku == product_request.sku).first()
-    if existing_product:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Product with this SKU already exists."
-        )
+    if product_request.sku:
+        await _ensure_code_available(db, product_request.sku)
 
     # 2. Crear modelo base sin ingredientes
     product_model = Product(
         **product_request.model_dump(mode="json", exclude={"ingredient_ids"})
     )
     db.add(product_model)
-    db.commit()
-    db.refresh(product_model)
+    await db.commit()
+    await db.refresh(product_model)
 
     # 3. Asignar ingredientes si se enviaron
     if product_request.ingredient_ids:
         from possystem.models.ingredients.orm import Ingredient
 
         ingredients = (
-            db.query(Ingredient)
-            .filter(Ingredient.id.in_(product_request.ingredient_ids))
-            .all()
-        )
+            await db.scalars(
+                select(Ingredient)
+                .where(Ingredient.id.in_(product_request.ingredient_ids))
+            )
+        ).all()
 
         if not ingredients:
             raise HTTPException(status_code=404, detail="No valid ingredients found")
@@ -105,10 +191,9 @@ async def create_product(product_request: ProductCreate, db: db_dependency):
 
         # Asignación tipo "role.permissions.extend()"
         product_model.ingredients.extend(ingredients)
-        db.commit()
-        db.refresh(product_model)
+        await db.commit()
 
-    return product_model
+    return await _load_product_details(db, product_model.id)
 
 
 @router.put("/{product_id}",
@@ -119,7 +204,7 @@ async def create_product(product_request: ProductCreate, db: db_dependency):
 async def update_product(product_id: int, product_request: ProductUpdate, db: db_dependency):
 
     # 1. Verificar existe
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == product_id))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -128,12 +213,7 @@ async def update_product(product_id: int, product_request: ProductUpdate, db: db
 
     # 2. Validar SKU si cambia
     if product_request.sku and product_request.sku != product.sku:
-        sku_exists = db.query(Product).filter(Product.sku == product_request.sku).first()
-        if sku_exists:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Product with this SKU already exists."
-            )
+        await _ensure_code_available(db, product_request.sku)
 
     # 3. Actualizar campos normales
     for key, value in product_request.model_dump(
@@ -148,10 +228,11 @@ async def update_product(product_id: int, product_request: ProductUpdate, db: db
         from possystem.models.ingredients.orm import Ingredient
 
         ingredients = (
-            db.query(Ingredient)
-            .filter(Ingredient.id.in_(product_request.ingredient_ids))
-            .all()
-        )
+            await db.scalars(
+                select(Ingredient)
+                .where(Ingredient.id.in_(product_request.ingredient_ids))
+            )
+        ).all()
 
         if not ingredients and product_request.ingredient_ids:
             raise HTTPException(status_code=404, detail="No valid ingredients found")
@@ -167,10 +248,12 @@ async def update_product(product_id: int, product_request: ProductUpdate, db: db
 
         # Reemplazar la lista completa (igual que roles)
         product.ingredients = ingredients
+        # The pivot has no timestamp: mark the product changed for /sync/catalog
+        product.updated_at = func.now()
 
-    db.commit()
-    db.refresh(product)
-    return product
+    await db.commit()
+    product_code_index.forget(product.id)
+    return await _load_product_details(db, product.id)
 
 
 @router.patch("/{product_id}/toggle-active",
@@ -179,13 +262,14 @@ async def update_product(product_id: int, product_request: ProductUpdate, db: db
             description="Activate or deactivate a product quickly.",
             dependencies=CAN_UPDATE_PRODUCTS)
 async def toggle_product_active(product_id: int, db: db_dependency):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found.")
 
     product.is_active = not product.is_active
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    product_code_index.forget(product.id)
+    await db.refresh(product)
     return product
 
 
@@ -195,11 +279,56 @@ async def toggle_product_active(product_id: int, db: db_dependency):
             status_code=status.HTTP_204_NO_CONTENT,
             dependencies=CAN_DELETE_PRODUCTS)
 async def delete_product(product_id: int, db: db_dependency):
-    existing_product = db.query(Product).filter(Product.id == product_id).first()
+    existing_product = await db.scalar(select(Product).where(Product.id == product_id))
     if not existing_product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found."
         )
-    db.delete(existing_product)
-    db.commit()
+    await db.delete(existing_product)
+    await db.commit()
+    product_code_index.forget(product_id)
+
+
+@router.get("/{product_id}/barcodes",
+            response_model=list[ProductBarcodeResponse],
+            summary="List product barcodes",
+            dependencies=CAN_READ_PRODUCTS)
+async def read_product_barcodes(product_id: int, db: db_dependency):
+    if not await db.get(Product, product_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found.")
+    return (await db.scalars(select(ProductBarcode).where(ProductBarcode.product_id == product_id))).all()
+
+
+@router.post("/{product_id}/barcodes",
+            response_model=ProductBarcodeResponse,
+            summary="Add a barcode to a product",
+            description="Barcodes and SKUs share one namespace: a code can point to a single product.",
+            status_code=status.HTTP_201_CREATED,
+            dependencies=CAN_UPDATE_PRODUCTS)
+async def create_product_barcode(product_id: int, barcode_request: ProductBarcodeCreate, db: db_dependency):
+    if not await db.get(Product, product_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found.")
+    await _ensure_code_available(db, barcode_request.code)
+
+    barcode = ProductBarcode(product_id=product_id, code=barcode_request.code)
+    db.add(barcode)
+    await db.commit()
+    await db.refresh(barcode)
+    product_code_index.forget(product_id)
+    return barcode
+
+
+@router.delete("/{product_id}/barcodes/{code}",
+            summary="Remove a barcode from a product",
+            status_code=status.HTTP_204_NO_CONTENT,
+            dependencies=CAN_UPDATE_PRODUCTS)
+async def delete_product_barcode(product_id: int, code: str, db: db_dependency):
+    barcode = await db.scalar(
+        select(ProductBarcode).where(ProductBarcode.product_id == product_id, ProductBarcode.code == code)
+    )
+    if not barcode:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Barcode not found.")
+    await db.delete(barcode)
+    await db.commit()
+    product_code_index.forget_code(code)
@@ -1,9 +1,9 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
-from datetime import datetime, timezone
 
 from ...models.purchase_details.orm import PurchaseDetail
 from ...models.purchase_details.schemas import PurchaseDetailCreate, PurchaseDetailUpdate, PurchaseDetailResponse
@@ -13,7 +13,7 @@ from ...models.purchases.orm import Purchase
 from ...models.products.orm import Product
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/purchasedetails",
@@ -29,7 +29,7 @@ router = APIRouter(
     dependencies=CAN_READ_PURCHASE_DETAILS
 )
 async def read_all(db: db_dependency):
-    purchase_details = db.query(PurchaseDetail).all()
+    purchase_details = (await db.scalars(select(PurchaseDetail))).all()
     return purchase_details
 
 
@@ -43,24 +43,24 @@ async def read_all(db: db_dependency):
 )
 async def create(purchase_detail: PurchaseDetailCreate, db: db_dependency):
     # Check if the associated purchase exists
-    purchase = db.query(Purchase).filter(Purchase.id == purchase_detail.purchase_id).first()
+    purchase = await db.scalar(select(Purchase).where(Purchase.id == purchase_detail.purchase_id))
     if not purchase:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated purchase not found")
 
     # Check if the associated product exists
-    product = db.query(Product).filter(Product.id == purchase_detail.product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == purchase_detail.product_id))
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated product not found")
 
     # Check if the associated unit exists
-    # unit = db.query(Unit).filter(Unit.id == purchase_detail.unit_id).first()
+    # unit = await db.scalar(select(Unit).where(Unit.id == purchase_detail.unit_id))
     # if not unit:
     #     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated unit not found")
 
     new_purchase_detail = PurchaseDetail(**purchase_detail.model_dump())
     db.add(new_purchase_detail)
-    db.commit()
-    db.refresh(new_purchase_detail)
+    await db.commit()
+    await db.refresh(new_purchase_detail)
     return new_purchase_detail
 
 
@@ -73,35 +73,33 @@ async def create(purchase_detail: PurchaseDetailCreate, db: db_dependency):
     dependencies=CAN_UPDATE_PURCHASE_DETAILS
 )
 async def update(purchase_detail_id: int, purchase_detail: PurchaseDetailUpdate, db: db_dependency):
-    existing_purchase_detail = db.query(PurchaseDetail).filter(PurchaseDetail.id == purchase_detail_id).first()
+    existing_purchase_detail = await db.scalar(select(PurchaseDetail).where(PurchaseDetail.id == purchase_detail_id))
     if not existing_purchase_detail:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase detail not found")
 
     # If purchase_id is being updated, check if the new purchase exists
     if purchase_detail.purchase_id is not None:
-        purchase = db.query(Purchase).filter(Purchase.id == purchase_detail.purchase_id).first()
+        purchase = await db.scalar(select(Purchase).where(Purchase.id == purchase_detail.purchase_id))
         if not purchase:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated purchase not found")
 
     # If product_id is being updated, check if the new product exists
     if purchase_detail.product_id is not None:
-        product = db.query(Product).filter(Product.id == purchase_detail.product_id).first()
+        product = await db.scalar(select(Product).where(Product.id == purchase_detail.product_id))
         if not product:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated product not found")
 
     # If unit_id is being updated, check if the new unit exists
     # if purchase_detail.unit_id is not None:
-    #     unit = db.query(Unit).filter(Unit.id == purchase_detail.unit_id).first()
+    #     unit = await db.scalar(select(Unit).where(Unit.id == purchase_detail.unit_id))
     #     if not unit:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated unit not found")
 
     for key, value in purchase_detail.model_dump(exclude_unset=True).items():
         setattr(existing_purchase_detail, key, value)
 
-    existing_purchase_detail.updated_at = datetime.now(timezone.utc)
-
-    db.commit()
-    db.refresh(existing_purchase_detail)
+    await db.commit()
+    await db.refresh(existing_purchase_detail)
     return existing_purchase_detail
 
 
@@ -113,10 +111,10 @@ async def update(purchase_detail_id: int, purchase_detail: PurchaseDetailUpdate,
     dependencies=CAN_DELETE_PURCHASE_DETAILS
 )
 async def delete(purchase_detail_id: int, db: db_dependency):
-    existing_purchase_detail = db.query(PurchaseDetail).filter(PurchaseDetail.id == purchase_detail_id).first()
+    existing_purchase_detail = await db.scalar(select(PurchaseDetail).where(PurchaseDetail.id == purchase_detail_id))
     if not existing_purchase_detail:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase detail not found")
 
-    db.delete(existing_purchase_detail)
-    db.commit()
+    await db.delete(existing_purchase_detail)
+    await db.commit()
     return None
\ No newline at end of file
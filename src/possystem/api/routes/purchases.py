@@ -1,20 +1,23 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
-from datetime import datetime, timezone
 
 from ...models.purchases.orm import Purchase
-from ...models.purchases.schemas import PurchaseResponse, PurchaseCreate, PurchaseUpdate
-from ...utils.permissions import CAN_READ_PURCHASES, CAN_CREATE_PURCHASES, CAN_UPDATE_PURCHASES, CAN_DELETE_PURCHASES
+from ...models.purchases.schemas import PurchaseResponse, PurchaseCreate, PurchaseUpdate, PurchaseReceiveRequest, PurchaseReceiveResponse
+from ...utils.permissions import CAN_READ_PURCHASES, CAN_CREATE_PURCHASES, CAN_UPDATE_PURCHASES, CAN_DELETE_PURCHASES, CAN_CREATE_PRODUCT_BATCHES
+from ...utils.pagination import Page, page_dependency, paginate
+from ...utils.security import user_dependency
+from ...services.purchase_receiving import receive_purchase, receive_existing_purchase
 
 from ...models.users.orm import User
 from ...models.branches.orm import Branch
 from ...models.suppliers.orm import Supplier
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/purchases",
@@ -23,15 +26,14 @@ router = APIRouter(
 
 @router.get(
     "/",
-    response_model=list[PurchaseResponse],
+    response_model=Page[PurchaseResponse],
     summary="List all purchases",
-    description="Retrieve all purchases currently stored in the database.",
+    description="Retrieve purchases one page at a time, ordered by ID. Follow next_cursor for the next page.",
     status_code=status.HTTP_200_OK,
     dependencies=CAN_READ_PURCHASES
 )
-async def read_all(db: db_dependency):
-    purchases = db.query(Purchase).all()
-    return purchases
+async def read_all(db: db_dependency, page: page_dependency):
+    return await paginate(db, select(Purchase), Purchase.id, page)
 
 
 @router.post(
@@ -44,32 +46,59 @@ async def read_all(db: db_dependency):
 )
 async def create(purchase: PurchaseCreate, db: db_dependency):
     # Check if the associated user exists
-    user = db.query(User).filter(User.id == purchase.user_id).first()
+    user = await db.scalar(select(User).where(User.id == purchase.user_id))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated user not found")
 
     # Check if the associated warehouse exists
-    # warehouse = db.query(Warehouse).filter(Warehouse.id == purchase.warehouse_id).first()
+    # warehouse = await db.scalar(select(Warehouse).where(Warehouse.id == purchase.warehouse_id))
     # if not warehouse:
     #     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated warehouse not found")
 
     # Check if the associated branch exists
-    branch = db.query(Branch).filter(Branch.id == purchase.branch_id).first()
+    branch = await db.scalar(select(Branch).where(Branch.id == purchase.branch_id))
     if not branch:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated branch not found")
 
     # Check if the associated supplier exists
-    supplier = db.query(Supplier).filter(Supplier.id == purchase.supplier_id).first()
+    supplier = await db.scalar(select(Supplier).where(Supplier.id == purchase.supplier_id))
     if not supplier:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated supplier not found")
 
     new_purchase = Purchase(**purchase.model_dump())
 
     db.add(new_purchase)
-    db.commit()
-    db.refresh(new_purchase)
+    await db.commit()
+    await db.refresh(new_purchase)
     return new_purchase
 
+@router.post(
+    "/receive",
+    response_model=PurchaseReceiveResponse,
+    summary="Receive a delivery",
+    description="Creates the purchase, its lines and one product batch per line in a single transaction, "
+                "adds the units to stock on hand and moves each product's cost to the weighted average.",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=CAN_CREATE_PURCHASES + CAN_CREATE_PRODUCT_BATCHES
+)
+async def receive(request: PurchaseReceiveRequest, db: db_dependency, token_data: user_dependency):
+    result = await receive_purchase(db, token_data["id"], request)
+    await db.commit()
+    return result
+
+@router.post(
+    "/{purchase_id}/receive",
+    response_model=PurchaseReceiveResponse,
+    summary="Receive a registered purchase",
+    description="Creates batches for the lines of an existing purchase that have not been received yet, "
+                "updating stock on hand and product costs in a single transaction.",
+    dependencies=CAN_UPDATE_PURCHASES + CAN_CREATE_PRODUCT_BATCHES
+)
+async def receive_registered(purchase_id: int, db: db_dependency):
+    result = await receive_existing_purchase(db, purchase_id)
+    await db.commit()
+    return result
+
 @router.put(
     "/{purchase_id}",
     response_model=PurchaseResponse,
@@ -79,40 +108,40 @@ async def create(purchase: PurchaseCreate, db: db_dependency):
     dependencies=CAN_UPDATE_PURCHASES
 )
 async def update(purchase_id: int, purchase: PurchaseUpdate, db: db_dependency):
-    existing_purchase = db.query(Purchase).filter(Purchase.id == purchase_id).first()
+    existing_purchase = await db.scalar(select(Purchase).where(Purchase.id == purchase_id))
     if not existing_purchase:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase not found")
 
     # Check if the associated user exists
     if purchase.user_id is not None:
-        user = db.query(User).filter(User.id == purchase.user_id).first()
+        user = await db.scalar(select(User).where(User.id == purchase.user_id))
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated user not found")
 
     # Check if the associated warehouse exists
     # if purchase.warehouse_id is not None:
-    #     warehouse = db.query(Warehouse).filter(Warehouse.id == purchase.warehouse_id).first()
+    #     warehouse = await db.scalar(select(Warehouse).where(Warehouse.id == purchase.warehouse_id))
     #     if not warehouse:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated warehouse not found")
 
     # Check if the associated branch exists
     if purchase.branch_id is not None:
-        branch = db.query(Branch).filter(Branch.id == purchase.branch_id).first()
+        branch = await db.scalar(select(Branch).where(Branch.id == purchase.branch_id))
         if not branch:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated branch not found")
 
     # Check if the associated supplier exists
     if purchase.supplier_id is not None:
-        supplier = db.query(Supplier).filter(Supplier.id == purchase.supplier_id).first()
+        supplier = await db.scalar(select(Supplier).where(Supplier.id == purchase.supplier_id))
         if not supplier:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated supplier not found")
 
     for key, value in purchase.model_dump(exclude_unset=True).items():
         setattr(existing_purchase, key, value)
-    existing_purchase.updated_at = datetime.now(timezone.utc)
+    existing_purchase.updated_at = func.now()
 
-    db.commit()
-    db.refresh(existing_purchase)
+    await db.commit()
+    await db.refresh(existing_purchase)
     return existing_purchase
 
 @router.delete(
@@ -123,10 +152,10 @@ async def update(purchase_id: int, purchase: PurchaseUpdate, db: db_dependency):
     dependencies=CAN_DELETE_PURCHASES
 )
 async def delete(purchase_id: int, db: db_dependency):
-    existing_purchase = db.query(Purchase).filter(Purchase.id == purchase_id).first()
+    existing_purchase = await db.scalar(select(Purchase).where(Purchase.id == purchase_id))
     if not existing_purchase:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase not found")
 
-    db.delete(existing_purchase)
-    db.commit()
+    await db.delete(existing_purchase)
+    await db.commit()
     return None
\ No newline at end of file
@@ -1,13 +1,14 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
-from datetime import datetime, timezone
 
 from ...models.refund_products.orm import RefundProduct
 from ...models.refund_products.schemas import RefundProductCreate, RefundProductResponse, RefundProductUpdate
 from ...utils.permissions import CAN_READ_REFUND_PRODUCTS, CAN_CREATE_REFUND_PRODUCTS, CAN_UPDATE_REFUND_PRODUCTS, CAN_DELETE_REFUND_PRODUCTS
+from ...utils.pagination import Page, page_dependency, paginate
 
 from ...models.products.orm import Product
 from ...models.sale_details.orm import SaleDetail
@@ -15,7 +16,7 @@ from ...models.sale_details.orm import SaleDetail
 from ...models.users.orm import User
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/refundproducts",
@@ -24,15 +25,14 @@ router = APIRouter(
 
 @router.get(
     "/",
-    response_model=list[RefundProductResponse],
+    response_model=Page[RefundProductResponse],
     summary="List all refund products",
-    description="Retrieve all refund products currently stored in the database.",
+    description="Retrieve refund products one page at a time, ordered by ID. Follow next_cursor for the next page.",
     status_code=status.HTTP_200_OK,
     dependencies=CAN_READ_REFUND_PRODUCTS
 )
-async def read_all(db: db_dependency):
-    refund_products = db.query(RefundProduct).all()
-    return refund_products
+async def read_all(db: db_dependency, page: page_dependency):
+    return await paginate(db, select(RefundProduct), RefundProduct.id, page)
 
 
 @router.post(
@@ -45,44 +45,44 @@ async def read_all(db: db_dependency):
 )
 async def create(refund_product: RefundProductCreate, db: db_dependency):
     # Check if the associated product exists
-    product = db.query(Product).filter(Product.id == refund_product.product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == refund_product.product_id))
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated product not found")
 
     # Check if the associated unit exists (if provided)
     # if refund_product.unit_id is not None:
-    #     unit = db.query(Unit).filter(Unit.id == refund_product.unit_id).first()
+    #     unit = await db.scalar(select(Unit).where(Unit.id == refund_product.unit_id))
     #     if not unit:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated unit not found")
 
     # Check if the associated warehouse exists (if provided)
     # if refund_product.warehouse_id is not None:
-    #     warehouse = db.query(Warehouse).filter(Warehouse.id == refund_product.warehouse_id).first()
+    #     warehouse = await db.scalar(select(Warehouse).where(Warehouse.id == refund_product.warehouse_id))
     #     if not warehouse:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated warehouse not found")
 
     # Check if the associated sale detail exists (if provided)
     if refund_product.sale_detail_id is not None:
-        sale_detail = db.query(SaleDetail).filter(SaleDetail.id == refund_product.sale_detail_id).first()
+        sale_detail = await db.scalar(select(SaleDetail).where(SaleDetail.id == refund_product.sale_detail_id))
         if not sale_detail:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated sale detail not found")
 
     # Check if the associated client exists (if provided)
     # if refund_product.client_id is not None:
-    #     client = db.query(Client).filter(Client.id == refund_product.client_id).first()
+    #     client = await db.scalar(select(Client).where(Client.id == refund_product.client_id))
     #     if not client:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated client not found")
 
     # Check if the associated user exists (if provided)
     if refund_product.user_id is not None:
-        user = db.query(User).filter(User.id == refund_product.user_id).first()
+        user = await db.scalar(select(User).where(User.id == refund_product.user_id))
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated user not found")
 
     new_refund_product = RefundProduct(**refund_product.model_dump())
     db.add(new_refund_product)
-    db.commit()
-    db.refresh(new_refund_product)
+    await db.commit()
+    await db.refresh(new_refund_product)
     return new_refund_product
 
 
@@ -95,55 +95,55 @@ async def create(refund_product: RefundProductCreate, db: db_dependency):
     dependencies=CAN_UPDATE_REFUND_PRODUCTS
 )
 async def update(id: int, refund_product: RefundProductUpdate, db: db_dependency):
-    existing_refund_product = db.query(RefundProduct).filter(RefundProduct.id == id).first()
+    existing_refund_product = await db.scalar(select(RefundProduct).where(RefundProduct.id == id))
     if not existing_refund_product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Refund product not found")
 
     # If updating product_id, check if the associated product exists
     if refund_product.product_id is not None:
-        product = db.query(Product).filter(Product.id == refund_product.product_id).first()
+        product = await db.scalar(select(Product).where(Product.id == refund_product.product_id))
         if not product:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated product not found")
 
     # If updating unit_id, check if the associated unit exists
     # if refund_product.unit_id is not None:
-    #     unit = db.query(Unit).filter(Unit.id == refund_product.unit_id).first()
+    #     unit = await db.scalar(select(Unit).where(Unit.id == refund_product.unit_id))
     #     if not unit:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated unit not found")
 
     # If updating warehouse_id, check if the associated warehouse exists
     # if refund_product.warehouse_id is not None:
-    #     warehouse = db.query(Warehouse).filter(Warehouse.id == refund_product.warehouse_id).first()
+    #     warehouse = await db.scalar(select(Warehouse).where(Warehouse.id == refund_product.warehouse_id))
     #     if not warehouse:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated warehouse not found")
 
     # If updating sale_detail_id, check if the associated sale detail exists
     if refund_product.sale_detail_id is not None:
-        sale_detail = db.query(SaleDetail).filter(SaleDetail.id == refund_product.sale_detail_id).first()
+        sale_detail = await db.scalar(select(SaleDetail).where(SaleDetail.id == refund_product.sale_detail_id))
         if not sale_detail:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated sale detail not found")
 
     # If updating client_id, check if the associated client exists
     # if refund_product.client_id is not None:
-    #     client = db.query(Client).filter(Client.id == refund_product.client_id).first()
+    #     client = await db.scalar(select(Client).where(Client.id == refund_product.client_id))
     #     if not client:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated client not found")
 
     # If updating user_id, check if the associated user exists
     if refund_product.user_id is not None:
-        user = db.query(User).filter(User.id == refund_product.user_id).first()
+        user = await db.scalar(select(User).where(User.id == refund_product.user_id))
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated user not found")
 
     for key, value in refund_product.model_dump(exclude_unset=True).items():
         setattr(existing_refund_product, key, value)
     if refund_product.state is not None and refund_product.state in [3, 4]:
-        existing_refund_product.resolution_date = datetime.now(timezone.utc)
-    existing_refund_product.updated_at = datetime.now(timezone.utc)
+        existing_refund_product.resolution_date = func.now()
+    existing_refund_product.updated_at = func.now()
 
 
-    db.commit()
-    db.refresh(existing_refund_product)
+    await db.commit()
+    await db.refresh(existing_refund_product)
     return existing_refund_product
 
 
@@ -155,10 +155,10 @@ async def update(id: int, refund_product: RefundProductUpdate, db: db_dependency
     dependencies=CAN_DELETE_REFUND_PRODUCTS
 )
 async def delete(id: int, db: db_dependency):
-    existing_refund_product = db.query(RefundProduct).filter(RefundProduct.id == id).first()
+    existing_refund_product = await db.scalar(select(RefundProduct).where(RefundProduct.id == id))
     if not existing_refund_product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Refund product not found")
 
-    db.delete(existing_refund_product)
-    db.commit()
+    await db.delete(existing_refund_product)
+    await db.commit()
     return
\ No newline at end of file
@@ -0,0 +1,151 @@
+from datetime import date
+from enum import Enum
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from ...db.session import get_async_db
+from ...models.sales_rollups.orm import SalesDailyByBranch, SalesHourlyByBranch, SalesDailyByProduct, PaymentsDailyByMethod
+from ...models.sales_rollups.schemas import (
+    SalesReportRow, HourlySalesReportRow, ProductSalesReportRow, PaymentsReportRow,
+    RollupStatusResponse, RollupRefreshResponse,
+)
+from ...services.sales_rollups import refresh_rollups, rollup_report, rollup_status
+from ...utils.permissions import CAN_READ_SALES, CAN_READ_SALE_DETAILS, CAN_READ_SALE_PAYMENTS, CAN_UPDATE_SALES
+
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
+
+router = APIRouter(
+    prefix="/reports",
+    tags=["Reports"]
+)
+
+
+class ReportGroup(str, Enum):
+    day = "day"
+    branch = "branch"
+    cashier = "cashier"
+
+
+GROUP_COLUMNS = {ReportGroup.day: "day", ReportGroup.branch: "branch_id", ReportGroup.cashier: "user_id"}
+
+DATES_DESCRIPTION = "Days date_from to date_to, both included. "
+
+
+def _keys(group_by: list[ReportGroup], allowed: set[ReportGroup]) -> list[str]:
+    unsupported = [group.value for group in group_by if group not in allowed]
+    if unsupported:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cannot group this report by: {unsupported}")
+    return [GROUP_COLUMNS[group] for group in dict.fromkeys(group_by)]
+
+
+@router.get(
+    "/sales",
+    response_model=list[SalesReportRow],
+    summary="Sales totals",
+    description=DATES_DESCRIPTION + "Ticket count and amounts, summed per day, branch and/or cashier (group_by, repeatable).",
+    dependencies=CAN_READ_SALES
+)
+async def sales_report(
+    db: db_dependency,
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    branch_id: Optional[int] = Query(None, gt=0),
+    user_id: Optional[int] = Query(None, gt=0),
+    group_by: list[ReportGroup] = Query([ReportGroup.day]),
+):
+    keys = _keys(group_by, {ReportGroup.day, ReportGroup.branch, ReportGroup.cashier})
+    return await rollup_report(
+        db, SalesDailyByBranch.__table__, keys, ["sales", "subtotal", "discount", "tax", "total"],
+        date_from, date_to, {"branch_id": branch_id, "user_id": user_id},
+    )
+
+
+@router.get(
+    "/sales/hourly",
+    response_model=list[HourlySalesReportRow],
+    summary="Sales by hour of day",
+    description=DATES_DESCRIPTION + "Ticket count and total per hour, optionally also per day and/or branch.",
+    dependencies=CAN_READ_SALES
+)
+async def hourly_sales_report(
+    db: db_dependency,
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    branch_id: Optional[int] = Query(None, gt=0),
+    group_by: list[ReportGroup] = Query([]),
+):
+    keys = _keys(group_by, {ReportGroup.day, ReportGroup.branch})
+    return await rollup_report(
+        db, SalesHourlyByBranch.__table__, keys + ["hour"], ["sales", "total"],
+        date_from, date_to, {"branch_id": branch_id},
+    )
+
+
+@router.get(
+    "/products",
+    response_model=list[ProductSalesReportRow],
+    summary="Sales by product",
+    description=DATES_DESCRIPTION + "Units and amounts per product, best sellers (by total) first, "
+                "optionally also per day and/or branch.",
+    dependencies=CAN_READ_SALES + CAN_READ_SALE_DETAILS
+)
+async def product_sales_report(
+    db: db_dependency,
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    branch_id: Optional[int] = Query(None, gt=0),
+    product_id: Optional[int] = Query(None, gt=0),
+    group_by: list[ReportGroup] = Query([]),
+    limit: int = Query(100, ge=1, le=10000),
+):
+    keys = _keys(group_by, {ReportGroup.day, ReportGroup.branch})
+    return await rollup_report(
+        db, SalesDailyByProduct.__table__, keys + ["product_id"], ["sales", "quantity", "discount", "tax", "total"],
+        date_from, date_to, {"branch_id": branch_id, "product_id": product_id},
+        order_by_measure="total", limit=limit,
+    )
+
+
+@router.get(
+    "/payments",
+    response_model=list[PaymentsReportRow],
+    summary="Payments by method",
+    description=DATES_DESCRIPTION + "Payment count and amount per payment method, optionally also per day and/or branch.",
+    dependencies=CAN_READ_SALES + CAN_READ_SALE_PAYMENTS
+)
+async def payments_report(
+    db: db_dependency,
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    branch_id: Optional[int] = Query(None, gt=0),
+    group_by: list[ReportGroup] = Query([]),
+):
+    keys = _keys(group_by, {ReportGroup.day, ReportGroup.branch})
+    return await rollup_report(
+        db, PaymentsDailyByMethod.__table__, keys + ["method_payment"], ["payments", "amount"],
+        date_from, date_to, {"branch_id": branch_id},
+    )
+
+
+@router.get(
+    "/rollups",
+    response_model=RollupStatusResponse,
+    summary="Rollup freshness",
+    description="Newest sale change folded into the report tables, and when they were last refreshed.",
+    dependencies=CAN_READ_SALES
+)
+async def rollups_status(db: db_dependency):
+    return await rollup_status(db)
+
+
+@router.post(
+    "/rollups/refresh",
+    response_model=RollupRefreshResponse,
+    summary="Refresh the report tables",
+    description="Folds sales changed since the last refresh into the report tables now instead of waiting "
+                "for the background refresh. rebuild=true recomputes every day.",
+    dependencies=CAN_UPDATE_SALES
+)
+async def refresh(db: db_dependency, rebuild: bool = Query(False)):
+    return await refresh_rollups(db, rebuild)
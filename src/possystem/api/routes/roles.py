@@ -2,13 +2,16 @@ from fastapi import Depends, HTTPException, APIRouter
 from starlette import status
 from ...models.roles.orm import Role
 from typing import Annotated
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from ...models.roles.schemas import RoleCreate, RoleResponse, RoleUpdate, RoleWithPermissions
 from ...models.permissions.orm import Permission
-from ...db.session import get_db
+from ...db.session import get_async_db
 from ...utils.permissions import CAN_READ_ROLES, CAN_CREATE_ROLES, CAN_UPDATE_ROLES, CAN_DELETE_ROLES
+from ...utils.permission_cache import permission_cache
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 router = APIRouter(
@@ -17,6 +20,16 @@ router = APIRouter(
 )
 
 
+async def _load_role_with_permissions(db: AsyncSession, role_id: int):
+    # Role.permissions is lazy; RoleWithPermissions needs it loaded before serialization.
+    return await db.scalar(
+        select(Role)
+        .options(selectinload(Role.permissions))
+        .where(Role.id == role_id)
+        .execution_options(populate_existing=True)
+    )
+
+
 # user_dependency = Annotated[dict, Depends(get_current_user)]
 @router.get('/',
             response_model=list[RoleResponse],
@@ -26,7 +39,7 @@ router = APIRouter(
             dependencies=CAN_READ_ROLES
             )
 async def read_all(db: db_dependency):
-    roles = db.query(Role).all()
+    roles = (await db.scalars(select(Role))).all()
     return roles
 
 
@@ -38,7 +51,7 @@ async def read_all(db: db_dependency):
             dependencies=CAN_READ_ROLES
             )
 async def read_all_with_permissions(db: db_dependency):
-    roles = db.query(Role).all()
+    roles = (await db.scalars(select(Role).options(selectinload(Role.permissions)))).all()
     return roles
 
 
@@ -49,7 +62,7 @@ async def read_all_with_permissions(db: db_dependency):
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_ROLES)
 async def read_by_id_with_permissions(role_id: int, db: db_dependency):
-    role = db.query(Role).filter(Role.id == role_id).first()
+    role = await _load_role_with_permissions(db, role_id)
 
     if not role:
         raise HTTPException(status_code=404, detail='Role not found')
@@ -67,7 +80,7 @@ async def read_by_id_with_permissions(role_id: int, db: db_dependency):
 )
 async def create_role(db: db_dependency, role_request: RoleCreate):
     # 1. Check if role name already exists (case-insensitive)
-    role_found = db.query(Role).filter(Role.name.ilike(role_request.name)).first()
+    role_found = await db.scalar(select(Role).where(Role.name.ilike(role_request.name)))
     if role_found:
         raise HTTPException(status_code=409, detail="Role name already exists")
 
@@ -75,16 +88,17 @@ async def create_role(db: db_dependency, role_request: RoleCreate):
     role_model = Role(name=role_request.name)
 
     db.add(role_model)
-    db.commit()
-    db.refresh(role_model)
+    await db.commit()
+    await db.refresh(role_model)
 
     # 3. If permission_ids were provided, link them
     if role_request.permission_ids:
         permissions = (
-            db.query(Permission)
-            .filter(Permission.id.in_(role_request.permission_ids))
-            .all()
-        )
+            await db.scalars(
+                select(Permission)
+                .where(Permission.id.in_(role_request.permission_ids))
+            )
+        ).all()
 
         if not permissions:
             raise HTTPException(status_code=404, detail="No valid permissions found")
@@ -99,11 +113,12 @@ async def create_role(db: db_dependency, role_request: RoleCreate):
             )
 
         # 4. Link permissions in batch
+        await db.refresh(role_model, attribute_names=["permissions"])
         role_model.permissions.extend(permissions)
-        db.commit()
-        db.refresh(role_model)
+        await db.commit()
+        permission_cache.invalidate(role_id=role_model.id)
 
-    return role_model
+    return await _load_role_with_permissions(db, role_model.id)
 
 
 @router.put(
@@ -115,17 +130,16 @@ async def create_role(db: db_dependency, role_request: RoleCreate):
     dependencies=CAN_UPDATE_ROLES
 )
 async def update_role(role_id: int, db: db_dependency, role_request: RoleUpdate):
-    # 1. Find the role
-    role = db.query(Role).filter(Role.id == role_id).first()
+    # 1. Find the role (with its permissions, which may be replaced below)
+    role = await _load_role_with_permissions(db, role_id)
     if not role:
         raise HTTPException(status_code=404, detail="Role not found")
 
     # 2. Handle name update
     if role_request.name:
-        existing_role = (
-            db.query(Role)
-            .filter(Role.name.ilike(role_request.name))
-            .first()
+        existing_role = await db.scalar(
+            select(Role)
+            .where(Role.name.ilike(role_request.name))
         )
         if existing_role and existing_role.id != role_id:
             raise HTTPException(status_code=409, detail="Role name already exists")
@@ -135,10 +149,11 @@ async def update_role(role_id: int, db: db_dependency, role_request: RoleUpdate)
     if role_request.permission_ids is not None:
         # Fetch all permissions matching provided IDs
         permissions = (
-            db.query(Permission)
-            .filter(Permission.id.in_(role_request.permission_ids))
-            .all()
-        )
+            await db.scalars(
+                select(Permission)
+                .where(Permission.id.in_(role_request.permission_ids))
+            )
+        ).all()
 
         # If none found
         if not permissions and role_request.permission_ids:
@@ -157,9 +172,9 @@ async def update_role(role_id: int, db: db_dependency, role_request: RoleUpdate)
         role.permissions = permissions
 
     # 4. Commit and return updated role
-    db.commit()
-    db.refresh(role)
-    return role
+    await db.commit()
+    permission_cache.invalidate(role_id=role_id)
+    return await _load_role_with_permissions(db, role_id)
 
 
 @router.delete(
@@ -171,12 +186,14 @@ async def update_role(role_id: int, db: db_dependency, role_request: RoleUpdate)
 )
 async def delete_role(role_id: int, db: db_dependency):
     # 1. Find the role
-    role = db.query(Role).filter(Role.id == role_id).one_or_none()
+    role = await db.scalar(select(Role).where(Role.id == role_id))
     if not role:
         raise HTTPException(status_code=404, detail="Role not found")
 
     # 2. Delete it
-    db.delete(role)
-    db.commit()
+    await db.delete(role)
+    await db.commit()
+    # Users pointing at this role are cached too; drop everything.
+    permission_cache.invalidate()
 
 
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Annotated, List
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from ...models.sale_batch_usage.orm import SaleBatchUsage
 from ...models.sale_batch_usage.schemas import (
     SaleBatchUsageCreate,
@@ -12,8 +12,10 @@ from ...models.sale_details.orm import SaleDetail
 from ...models.product_batch.orm import ProductBatch
 from ...models.permissions.orm import Permission
 from ...utils.permissions import CAN_READ_PRODUCTS, CAN_CREATE_PRODUCTS, CAN_UPDATE_PRODUCTS
+from ...utils.pagination import Page, page_dependency
+from ...utils.fast_json import FastJSONResponse, list_page
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/sale-batch-usages",
@@ -22,11 +24,11 @@ router = APIRouter(
 
 
 @router.get("/",
-            response_model=List[SaleBatchUsageResponse],
+            response_model=Page[SaleBatchUsageResponse],
+            response_class=FastJSONResponse,
             summary="List all sale-batch usages",
-            description="Retrieve all records linking sale details with product batches.",
+            description="Retrieve records linking sale details with product batches, one page at a time, ordered by ID.",
             dependencies=CAN_READ_PRODUCTS)
-async def read_all(db: db_dependency):
-    usages = db.query(SaleBatchUsage).all()
-    return usages
+async def read_all(db: db_dependency, page: page_dependency):
+    return await list_page(db, SaleBatchUsage, SaleBatchUsageResponse, page)
 
@@ -1,19 +1,23 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
-from datetime import datetime, timezone
 from ...models.sale_details.schemas import SaleDetailCreate, SaleDetailResponse, SaleDetailUpdate
 from ...models.sale_details.orm import SaleDetail
+from ...models.sale_batch_usage.orm import SaleBatchUsage
+from ...models.sale_batch_usage.schemas import SaleBatchUsageResponse
+from ...services.batch_allocation import allocate_sale_detail, release_sale_detail
 from ...utils.permissions import CAN_READ_SALE_DETAILS, CAN_CREATE_SALE_DETAILS, CAN_UPDATE_SALE_DETAILS, CAN_DELETE_SALE_DETAILS
+from ...utils.pagination import Page, page_dependency, paginate
 
 from ...models.sales.orm import Sale
 from ...models.products.orm import Product
 from ...models.product_categories.orm import ProductCategory
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/saledetails",
@@ -22,15 +26,14 @@ router = APIRouter(
 
 @router.get(
     "/",
-    response_model=list[SaleDetailResponse],
+    response_model=Page[SaleDetailResponse],
     summary="List all sale details",
-    description="Retrieve all sale details currently stored in the database.",
+    description="Retrieve sale details one page at a time, ordered by ID. Follow next_cursor for the next page.",
     status_code=status.HTTP_200_OK,
     dependencies=CAN_READ_SALE_DETAILS
 )
-async def read_all(db: db_dependency):
-    sale_details = db.query(SaleDetail).all()
-    return sale_details
+async def read_all(db: db_dependency, page: page_dependency):
+    return await paginate(db, select(SaleDetail), SaleDetail.id, page)
 
 @router.post(
     "/",
@@ -42,39 +45,71 @@ async def read_all(db: db_dependency):
 )
 async def create(sale_detail: SaleDetailCreate, db: db_dependency):
     # Check if the associated sale exists
-    sale = db.query(Sale).filter(Sale.id == sale_detail.sale_id).first()
+    sale = await db.scalar(select(Sale).where(Sale.id == sale_detail.sale_id))
     if not sale:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated sale not found")
 
     # Check if the associated product exists
-    product = db.query(Product).filter(Product.id == sale_detail.product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == sale_detail.product_id))
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated product not found")
 
     # Check if the associated product category exists (if provided)
     if sale_detail.product_category_id is not None:
-        product_category = db.query(ProductCategory).filter(ProductCategory.id == sale_detail.product_category_id).first()
+        product_category = await db.scalar(select(ProductCategory).where(ProductCategory.id == sale_detail.product_category_id))
         if not product_category:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated product category not found")
 
     # Check if the associated warehouse exists (if provided)
     # if sale_detail.warehouse_id is not None:
-    #     warehouse = db.query(Warehouse).filter(Warehouse.id == sale_detail.warehouse_id).first()
+    #     warehouse = await db.scalar(select(Warehouse).where(Warehouse.id == sale_detail.warehouse_id))
     #     if not warehouse:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated warehouse not found")
 
     # Check if the associated unit exists (if provided)
     # if sale_detail.unit_id is not None:
-    #     unit = db.query(Unit).filter(Unit.id == sale_detail.unit_id).first()
+    #     unit = await db.scalar(select(Unit).where(Unit.id == sale_detail.unit_id))
     #     if not unit:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated unit not found")
 
     new_sale_detail = SaleDetail(**sale_detail.model_dump())
     db.add(new_sale_detail)
-    db.commit()
-    db.refresh(new_sale_detail)
+    await db.commit()
+    await db.refresh(new_sale_detail)
     return new_sale_detail
 
+@router.post(
+    "/{sale_detail_id}/allocate",
+    response_model=list[SaleBatchUsageResponse],
+    summary="Allocate a sale detail to batches (FEFO)",
+    description="Takes the units of the sale detail not yet linked to a batch from the product's batches, "
+                "earliest expiration first, and records the batch usages.",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=CAN_CREATE_SALE_DETAILS
+)
+async def allocate(sale_detail_id: int, db: db_dependency):
+    # Lock the line first: two concurrent calls must not both see the same units as pending
+    query = select(SaleDetail).where(SaleDetail.id == sale_detail_id, SaleDetail.deleted_at.is_(None))
+    if db.bind.dialect.name == "postgresql":
+        query = query.with_for_update()
+    sale_detail = await db.scalar(query)
+    if not sale_detail:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sale detail not found")
+
+    allocated = await db.scalar(
+        select(func.coalesce(func.sum(SaleBatchUsage.quantity_used), 0))
+        .where(SaleBatchUsage.sale_detail_id == sale_detail_id)
+    )
+    pending = sale_detail.quantity - allocated
+    if pending != int(pending):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only whole units can be allocated to batches")
+    if pending <= 0:
+        return []
+
+    usages = await allocate_sale_detail(db, sale_detail.id, sale_detail.product_id, int(pending))
+    await db.commit()
+    return usages
+
 @router.put(
     "/{sale_detail_id}",
     response_model=SaleDetailResponse,
@@ -84,39 +119,39 @@ async def create(sale_detail: SaleDetailCreate, db: db_dependency):
     dependencies=CAN_UPDATE_SALE_DETAILS
 )
 async def update(sale_detail_id: int, sale_detail: SaleDetailUpdate, db: db_dependency):
-    existing_sale_detail = db.query(SaleDetail).filter(SaleDetail.id == sale_detail_id, SaleDetail.deleted_at.is_(None)).first()
+    existing_sale_detail = await db.scalar(select(SaleDetail).where(SaleDetail.id == sale_detail_id, SaleDetail.deleted_at.is_(None)))
     if not existing_sale_detail:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sale detail not found")
 
     # If product_id is being updated, check if the new product exists
     if sale_detail.product_id is not None:
-        product = db.query(Product).filter(Product.id == sale_detail.product_id).first()
+        product = await db.scalar(select(Product).where(Product.id == sale_detail.product_id))
         if not product:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated product not found")
 
     # If product_category_id is being updated, check if the new product category exists
     if sale_detail.product_category_id is not None:
-        product_category = db.query(ProductCategory).filter(ProductCategory.id == sale_detail.product_category_id).first()
+        product_category = await db.scalar(select(ProductCategory).where(ProductCategory.id == sale_detail.product_category_id))
         if not product_category:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated product category not found")
 
     # If warehouse_id is being updated, check if the new warehouse exists
     # if sale_detail.warehouse_id is not None:
-    #     warehouse = db.query(Warehouse).filter(Warehouse.id == sale_detail.warehouse_id).first()
+    #     warehouse = await db.scalar(select(Warehouse).where(Warehouse.id == sale_detail.warehouse_id))
     #     if not warehouse:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated warehouse not found")
 
     # If unit_id is being updated, check if the new unit exists
     # if sale_detail.unit_id is not None:
-    #     unit = db.query(Unit).filter(Unit.id == sale_detail.unit_id).first()
+    #     unit = await db.scalar(select(Unit).where(Unit.id == sale_detail.unit_id))
     #     if not unit:
     #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated unit not found")
 
     for key, value in sale_detail.model_dump(exclude_unset=True).items():
         setattr(existing_sale_detail, key, value)
 
-    db.commit()
-    db.refresh(existing_sale_detail)
+    await db.commit()
+    await db.refresh(existing_sale_detail)
     return existing_sale_detail
 
 
@@ -124,14 +159,19 @@ async def update(sale_detail_id: int, sale_detail: SaleDetailUpdate, db: db_depe
     "/{sale_detail_id}",
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Delete a sale detail",
-    description="Soft delete a sale detail by its ID.",
+    description="Soft delete a sale detail by its ID. Units it took from batches are put back.",
     dependencies=CAN_DELETE_SALE_DETAILS
 )
 async def delete(sale_detail_id: int, db: db_dependency):
-    existing_sale_detail = db.query(SaleDetail).filter(SaleDetail.id == sale_detail_id, SaleDetail.deleted_at.is_(None)).first()
+    # Locked like in allocate, so an allocation can't land on a line being deleted
+    query = select(SaleDetail).where(SaleDetail.id == sale_detail_id, SaleDetail.deleted_at.is_(None))
+    if db.bind.dialect.name == "postgresql":
+        query = query.with_for_update()
+    existing_sale_detail = await db.scalar(query)
     if not existing_sale_detail:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sale detail not found")
 
-    existing_sale_detail.deleted_at = datetime.now(timezone.utc)
-    db.commit()
+    await release_sale_detail(db, existing_sale_detail.id, existing_sale_detail.product_id)
+    existing_sale_detail.deleted_at = func.now()
+    await db.commit()
     return
\ No newline at end of file
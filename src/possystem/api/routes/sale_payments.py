@@ -1,16 +1,17 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
-from datetime import datetime, timezone
 from ...models.sale_payments.schemas import SalePaymentCreate, SalePaymentResponse, SalePaymentUpdate
 from ...models.sale_payments.orm import SalePayment
 from ...utils.permissions import CAN_READ_SALE_PAYMENTS, CAN_CREATE_SALE_PAYMENTS, CAN_UPDATE_SALE_PAYMENTS, CAN_DELETE_SALE_PAYMENTS
+from ...utils.pagination import Page, page_dependency, paginate
 from ...models.sales.orm import Sale
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/salepayments",
@@ -19,15 +20,14 @@ router = APIRouter(
 
 @router.get(
     "/",
-    response_model=list[SalePaymentResponse],
+    response_model=Page[SalePaymentResponse],
     summary="List all sale payments",
-    description="Retrieve all sale payments currently stored in the database.",
+    description="Retrieve sale payments one page at a time, ordered by ID. Follow next_cursor for the next page.",
     status_code=status.HTTP_200_OK,
     dependencies=CAN_READ_SALE_PAYMENTS
 )
-async def read_all(db: db_dependency):
-    sale_payments = db.query(SalePayment).all()
-    return sale_payments
+async def read_all(db: db_dependency, page: page_dependency):
+    return await paginate(db, select(SalePayment), SalePayment.id, page)
 
 @router.post(
     "/",
@@ -39,14 +39,14 @@ async def read_all(db: db_dependency):
 )
 async def create(sale_payment: SalePaymentCreate, db: db_dependency):
     # Check if the associated sale exists
-    sale = db.query(Sale).filter(Sale.id == sale_payment.sale_id).first()
+    sale = await db.scalar(select(Sale).where(Sale.id == sale_payment.sale_id))
     if not sale:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Associated sale not found")
 
     new_sale_payment = SalePayment(**sale_payment.model_dump())
     db.add(new_sale_payment)
-    db.commit()
-    db.refresh(new_sale_payment)
+    await db.commit()
+    await db.refresh(new_sale_payment)
     return new_sale_payment
 
 @router.put(
@@ -58,15 +58,15 @@ async def create(sale_payment: SalePaymentCreate, db: db_dependency):
     dependencies=CAN_UPDATE_SALE_PAYMENTS
 )
 async def update(sale_payment_id: int, sale_payment: SalePaymentUpdate, db: db_dependency):
-    existing_sale_payment = db.query(SalePayment).filter(SalePayment.id == sale_payment_id, SalePayment.deleted_at.is_(None)).first()
+    existing_sale_payment = await db.scalar(select(SalePayment).where(SalePayment.id == sale_payment_id, SalePayment.deleted_at.is_(None)))
     if not existing_sale_payment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sale payment not found")
 
     for key, value in sale_payment.model_dump(exclude_unset=True).items():
         setattr(existing_sale_payment, key, value)
 
-    db.commit()
-    db.refresh(existing_sale_payment)
+    await db.commit()
+    await db.refresh(existing_sale_payment)
     return existing_sale_payment
 
 @router.delete(
@@ -77,10 +77,10 @@ async def update(sale_payment_id: int, sale_payment: SalePaymentUpdate, db: db_d
     dependencies=CAN_DELETE_SALE_PAYMENTS
 )
 async def delete(sale_payment_id: int, db: db_dependency):
-    existing_sale_payment = db.query(SalePayment).filter(SalePayment.id == sale_payment_id, SalePayment.deleted_at.is_(None)).first()
+    existing_sale_payment = await db.scalar(select(SalePayment).where(SalePayment.id == sale_payment_id, SalePayment.deleted_at.is_(None)))
     if not existing_sale_payment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sale payment not found")
 
-    existing_sale_payment.deleted_at = datetime.now(timezone.utc)
-    db.commit()
+    existing_sale_payment.deleted_at = func.now()
+    await db.commit()
     return
\ No newline at end of file
@@ -1,16 +1,17 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
-from datetime import datetime, timezone
 from ...models.sales.schemas import SaleCreate, SaleResponse, SaleUpdate
 from ...utils.permissions import CAN_READ_SALES, CAN_CREATE_SALES, CAN_UPDATE_SALES, CAN_DELETE_SALES
+from ...utils.pagination import Page, page_dependency, paginate
 from ...models.sales.orm import Sale
 from ...models.users.orm import User
 # from ...models.clients.orm import Client
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/sales",
@@ -19,15 +20,14 @@ router = APIRouter(
 
 @router.get(
     "/",
-    response_model=list[SaleResponse],
+    response_model=Page[SaleResponse],
     summary="List all sales",
-    description="Retrieve all sales currently stored in the database.",
+    description="Retrieve sales one page at a time, ordered by ID. Follow next_cursor for the next page.",
     status_code=status.HTTP_200_OK,
     dependencies=CAN_READ_SALES
 )
-async def read_all(db: db_dependency):
-    sales = db.query(Sale).all()
-    return sales
+async def read_all(db: db_dependency, page: page_dependency):
+    return await paginate(db, select(Sale), Sale.id, page)
 
 @router.post(
     "/",
@@ -42,16 +42,16 @@ async def create(
     db: db_dependency
 ):
     # Validate user exists
-    if not db.query(User).filter_by(id=sale.user_id).first():
+    if not await db.scalar(select(User).filter_by(id=sale.user_id)):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User ID does not exist.")
     # Validate client exists
-    # if sale.client_id and not db.query(Client).filter_by(id=sale.client_id).first():
+    # if sale.client_id and not await db.scalar(select(Client).filter_by(id=sale.client_id)):
     #     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Client ID does not exist.")
 
     new_sale = Sale(**sale.model_dump())
     db.add(new_sale)
-    db.commit()
-    db.refresh(new_sale)
+    await db.commit()
+    await db.refresh(new_sale)
     return new_sale
 
 @router.put(
@@ -67,23 +67,23 @@ async def update(
     sale: SaleUpdate,
     db: db_dependency
 ):
-    existing_sale = db.query(Sale).filter_by(id=sale_id).first()
+    existing_sale = await db.scalar(select(Sale).where(Sale.id == sale_id, Sale.deleted_at.is_(None)))
     if not existing_sale:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sale not found.")
 
     # Validate user exists
-    if sale.user_id and not db.query(User).filter_by(id=sale.user_id).first():
+    if sale.user_id and not await db.scalar(select(User).filter_by(id=sale.user_id)):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User ID does not exist.")
     # Validate client exists
-    # if sale.client_id and not db.query(Client).filter_by(id=sale.client_id).first():
+    # if sale.client_id and not await db.scalar(select(Client).filter_by(id=sale.client_id)):
     #     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Client ID does not exist.")
 
     for key, value in sale.model_dump(exclude_unset=True).items():
         setattr(existing_sale, key, value)
-    existing_sale.updated_at = datetime.now(timezone.utc)
+    existing_sale.updated_at = func.now()
 
-    db.commit()
-    db.refresh(existing_sale)
+    await db.commit()
+    await db.refresh(existing_sale)
     return existing_sale
 
 @router.delete(
@@ -97,10 +97,10 @@ async def delete(
     sale_id: int,
     db: db_dependency
 ):
-    existing_sale = db.query(Sale).filter_by(id=sale_id).first()
+    existing_sale = await db.scalar(select(Sale).where(Sale.id == sale_id, Sale.deleted_at.is_(None)))
     if not existing_sale:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sale not found.")
 
-    existing_sale.deleted_at = datetime.now(timezone.utc)
-    db.commit()
+    existing_sale.deleted_at = func.now()
+    await db.commit()
     return
\ No newline at end of file
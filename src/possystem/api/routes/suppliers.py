@@ -1,15 +1,15 @@
 from fastapi import Depends, HTTPException, APIRouter
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ...db.session import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...db.session import get_async_db
 from starlette import status
-from datetime import datetime, timezone
 
 from ...models.suppliers.orm import Supplier
 from ...models.suppliers.schemas import SupplierCreate, SupplierResponse, SupplierUpdate
 from ...utils.permissions import CAN_READ_SUPPLIERS, CAN_CREATE_SUPPLIERS, CAN_UPDATE_SUPPLIERS, CAN_DELETE_SUPPLIERS
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/suppliers",
@@ -25,7 +25,7 @@ router = APIRouter(
     dependencies=CAN_READ_SUPPLIERS
 )
 async def read_all(db: db_dependency):
-    suppliers = db.query(Supplier).all()
+    suppliers = (await db.scalars(select(Supplier))).all()
     return suppliers
 
 @router.post(
@@ -39,17 +39,17 @@ async def read_all(db: db_dependency):
 async def create(supplier: SupplierCreate, db: db_dependency):
     # Check for unique constraints (e.g., email, ruc)
     if supplier.email:
-        existing_email = db.query(Supplier).filter(Supplier.email == supplier.email).first()
+        existing_email = await db.scalar(select(Supplier).where(Supplier.email == supplier.email))
         if existing_email:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already in use")
     if supplier.ruc:
-        existing_ruc = db.query(Supplier).filter(Supplier.ruc == supplier.ruc).first()
+        existing_ruc = await db.scalar(select(Supplier).where(Supplier.ruc == supplier.ruc))
         if existing_ruc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="RUC already in use")
     new_supplier = Supplier(**supplier.model_dump())
     db.add(new_supplier)
-    db.commit()
-    db.refresh(new_supplier)
+    await db.commit()
+    await db.refresh(new_supplier)
     return new_supplier
 
 @router.put(
@@ -61,25 +61,25 @@ async def create(supplier: SupplierCreate, db: db_dependency):
     dependencies=CAN_UPDATE_SUPPLIERS
 )
 async def update(supplier_id: int, supplier: SupplierUpdate, db: db_dependency):
-    existing_supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+    existing_supplier = await db.scalar(select(Supplier).where(Supplier.id == supplier_id))
     if not existing_supplier:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found")
 
     # Check for unique constraints (e.g., email, ruc) if they are being updated
     if supplier.email and supplier.email != existing_supplier.email:
-        existing_email = db.query(Supplier).filter(Supplier.email == supplier.email).first()
+        existing_email = await db.scalar(select(Supplier).where(Supplier.email == supplier.email))
         if existing_email:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already in use")
     if supplier.ruc and supplier.ruc != existing_supplier.ruc:
-        existing_ruc = db.query(Supplier).filter(Supplier.ruc == supplier.ruc).first()
+        existing_ruc = await db.scalar(select(Supplier).where(Supplier.ruc == supplier.ruc))
         if existing_ruc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="RUC already in use")
 
     for key, value in supplier.model_dump(exclude_unset=True).items():
         setattr(existing_supplier, key, value)
-    existing_supplier.updated_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(existing_supplier)
+    existing_supplier.updated_at = func.now()
+    await db.commit()
+    await db.refresh(existing_supplier)
     return existing_supplier
 
 
@@ -91,9 +91,9 @@ async def update(supplier_id: int, supplier: SupplierUpdate, db: db_dependency):
     dependencies=CAN_DELETE_SUPPLIERS
 )
 async def delete(supplier_id: int, db: db_dependency):
-    existing_supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+    existing_supplier = await db.scalar(select(Supplier).where(Supplier.id == supplier_id))
     if not existing_supplier:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found")
-    db.delete(existing_supplier)
-    db.commit()
+    await db.delete(existing_supplier)
+    await db.commit()
     return
\ No newline at end of file
@@ -0,0 +1,82 @@
+import json
+import zlib
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from ...db.session import get_async_db
+from ...models.catalog_sync.schemas import CatalogSyncResponse
+from ...models.sales.schemas import OfflineSaleUploadResponse
+from ...services.catalog_sync import catalog_changes
+from ...services.offline_sales import MAX_OFFLINE_SALES, ingest_offline_sales
+from ...utils.permissions import CAN_READ_PRODUCTS, CAN_CREATE_SALES
+from ...utils.security import user_dependency
+
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["Sync"]
+)
+
+# Largest upload once decompressed.
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+
+
+def _read_sales(body: bytes, content_encoding: Optional[str]) -> list:
+    """The ``sales`` list of an upload, gunzipped if needed."""
+    if content_encoding == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, MAX_UPLOAD_BYTES)
+        except zlib.error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body is not valid gzip")
+        if decompressor.unconsumed_tail:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Upload too large")
+    elif content_encoding not in (None, "identity"):
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=f"Unsupported Content-Encoding: {content_encoding}")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body is not valid JSON")
+    sales = payload.get("sales") if isinstance(payload, dict) else None
+    if not isinstance(sales, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Expected {"sales": [...]}')
+    if len(sales) > MAX_OFFLINE_SALES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {MAX_OFFLINE_SALES} sales per upload")
+    return sales
+
+
+@router.get(
+    "/catalog",
+    response_model=CatalogSyncResponse,
+    summary="Catalog changes for terminals",
+    description="Products, categories, brands, masters, ingredients and barcodes created, changed or deleted "
+                "since the token. Without a token the whole catalog is sent. Call again with the returned token "
+                "while has_more is true; a 410 means the token expired and the terminal must sync from scratch.",
+    status_code=status.HTTP_200_OK,
+    dependencies=CAN_READ_PRODUCTS
+)
+async def sync_catalog(
+    db: db_dependency,
+    since: Optional[str] = Query(None, description="Token from the previous response"),
+    limit: int = Query(1000, ge=1, le=5000, description="Rows per section"),
+):
+    return await catalog_changes(db, since, limit)
+
+
+@router.post(
+    "/sales",
+    response_model=OfflineSaleUploadResponse,
+    summary="Upload sales made offline",
+    description='Body: {"sales": [...]}, each sale a checkout ticket plus client_uuid, date_sale and the '
+                "price_unit charged on every line; send it with Content-Encoding: gzip to save bandwidth. "
+                "Sales are recorded in order and each one is reported as created, duplicate (UUID already "
+                "uploaded) or rejected, so the whole upload can simply be retried after a dropped connection.",
+    status_code=status.HTTP_200_OK,
+    dependencies=CAN_CREATE_SALES
+)
+async def upload_offline_sales(request: Request, db: db_dependency, token_data: user_dependency):
+    sales = _read_sales(await request.body(), request.headers.get("content-encoding"))
+    return await ingest_offline_sales(db, token_data["id"], sales)
@@ -2,16 +2,19 @@ from fastapi import Depends, HTTPException, APIRouter, Query
 from starlette import status
 from ...models.users.orm import User
 from typing import Annotated
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from ...models.users.schemas import UserResponse, UserCreate, UserUpdate, UserDetailsResponse, UserSearchParams, ChangePasswordRequest
 from ...models.branches.orm import Branch
 from ...models.roles.orm import Role
-from ...db.session import get_db
-from passlib.context import CryptContext
+from ...db.session import get_async_db
 from ...utils.permissions import CAN_READ_USERS, CAN_CREATE_USERS, CAN_UPDATE_USERS, CAN_DELETE_USERS
+from ...utils.pagination import Page, page_dependency, paginate
+from ...utils.permission_cache import permission_cache
+from ...utils.password_hashing import password_hasher
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 router = APIRouter(
     prefix="/users",
@@ -20,15 +23,14 @@ router = APIRouter(
 
 
 @router.get('/',
-            response_model=list[UserResponse],
+            response_model=Page[UserResponse],
             summary="List all users",
-            description="Retrieve all users currently stored in the database.",
+            description="Retrieve users one page at a time, ordered by ID. Follow next_cursor for the next page.",
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_USERS
             )
-async def read_all(db: db_dependency):
-    users = db.query(User).all()
-    return users
+async def read_all(db: db_dependency, page: page_dependency):
+    return await paginate(db, select(User), User.id, page)
 
 
 @router.get(
@@ -50,28 +52,28 @@ async def search_users(
             detail="Debe especificar al menos un filtro para la búsqueda"
         )
 
-    query = db.query(User)
+    query = select(User)
 
     if filters.name:
-        query = query.filter(User.name.ilike(f"%{filters.name}%"))
+        query = query.where(User.name.ilike(f"%{filters.name}%"))
     if filters.surname:
-        query = query.filter(User.surname.ilike(f"%{filters.surname}%"))
+        query = query.where(User.surname.ilike(f"%{filters.surname}%"))
     if filters.email:
-        query = query.filter(User.email.ilike(f"%{filters.email}%"))
+        query = query.where(User.email.ilike(f"%{filters.email}%"))
     if filters.branch_id:
-        query = query.filter(User.branch_id == filters.branch_id)
+        query = query.where(User.branch_id == filters.branch_id)
     if filters.role_id:
-        query = query.filter(User.role_id == filters.role_id)
+        query = query.where(User.role_id == filters.role_id)
     if filters.phone:
-        query = query.filter(User.phone.ilike(f"%{filters.phone}%"))
+        query = query.where(User.phone.ilike(f"%{filters.phone}%"))
     if filters.gender:
-        query = query.filter(User.gender == filters.gender)
+        query = query.where(User.gender == filters.gender)
     if filters.type_document:
-        query = query.filter(User.type_document.ilike(f"%{filters.type_document}%"))
+        query = query.where(User.type_document.ilike(f"%{filters.type_document}%"))
     if filters.n_document:
-        query = query.filter(User.n_document.ilike(f"%{filters.n_document}%"))
+        query = query.where(User.n_document.ilike(f"%{filters.n_document}%"))
 
-    return query.all()
+    return (await db.scalars(query)).all()
 
 
 @router.get('/{user_id}',
@@ -82,7 +84,7 @@ async def search_users(
             dependencies=CAN_READ_USERS
             )
 async def read_user_by_id(user_id: int, db: db_dependency):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,7 +100,11 @@ async def read_user_by_id(user_id: int, db: db_dependency):
             status_code=status.HTTP_200_OK,
             dependencies=CAN_READ_USERS)
 async def read_user_details(user_id: int, db: db_dependency):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(
+        select(User)
+        .options(selectinload(User.role).selectinload(Role.permissions), selectinload(User.branch))
+        .where(User.id == user_id)
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,9 +116,8 @@ async def read_user_details(user_id: int, db: db_dependency):
 @router.post('/', response_model=UserResponse, status_code=status.HTTP_201_CREATED, dependencies=CAN_CREATE_USERS)
 async def create_user(user: UserCreate, db: db_dependency):
     plain_password = user.password.get_secret_value()
-    hashed = bcrypt_context.hash(plain_password)
 
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -120,21 +125,22 @@ async def create_user(user: UserCreate, db: db_dependency):
         )
 
     if user.branch_id:
-        if not db.query(Branch).filter(Branch.id == user.branch_id).first():
+        if not await db.scalar(select(Branch).where(Branch.id == user.branch_id)):
             raise HTTPException(status_code=404, detail="Branch not found")
 
     if user.role_id:
-        if not db.query(Role).filter(Role.id == user.role_id).first():
+        if not await db.scalar(select(Role).where(Role.id == user.role_id)):
             raise HTTPException(status_code=404, detail="Role not found")
 
     # 👇 Dump with mode='json' to automatically convert HttpUrl, enums, etc.
     user_data = user.model_dump(mode="json")
-    user_data["password"] = hashed
+    user_data["password"] = await password_hasher.hash(plain_password)
 
     new_user = User(**user_data)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    permission_cache.invalidate(user_id=new_user.id)
+    await db.refresh(new_user)
     return new_user
 
 
@@ -146,7 +152,7 @@ async def create_user(user: UserCreate, db: db_dependency):
             status_code=status.HTTP_200_OK,
             dependencies=CAN_UPDATE_USERS)
 async def update_user(user_id: int, user: UserUpdate, db: db_dependency):
-    existing_user = db.query(User).filter(User.id == user_id).first()
+    existing_user = await db.scalar(select(User).where(User.id == user_id))
 
     if not existing_user:
         raise HTTPException(
@@ -155,7 +161,7 @@ async def update_user(user_id: int, user: UserUpdate, db: db_dependency):
         )
 
     if user.branch_id is not None:
-        branch = db.query(Branch).filter(Branch.id == user.branch_id).first()
+        branch = await db.scalar(select(Branch).where(Branch.id == user.branch_id))
         if not branch:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -163,7 +169,7 @@ async def update_user(user_id: int, user: UserUpdate, db: db_dependency):
             )
 
     if user.role_id is not None:
-        role = db.query(Role).filter(Role.id == user.role_id).first()
+        role = await db.scalar(select(Role).where(Role.id == user.role_id))
         if not role:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -179,8 +185,9 @@ async def update_user(user_id: int, user: UserUpdate, db: db_dependency):
     for key, value in user_data.items():
         setattr(existing_user, key, value)
 
-    db.commit()
-    db.refresh(existing_user)
+    await db.commit()
+    permission_cache.invalidate(user_id=user_id)
+    await db.refresh(existing_user)
 
     return existing_user
 
@@ -195,7 +202,7 @@ async def change_password(
     data: ChangePasswordRequest,
     db: db_dependency
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
 
     if not user:
         raise HTTPException(
@@ -205,7 +212,7 @@ async def change_password(
 
     # 1️⃣ validar password anterior
     old_pass = data.old_password.get_secret_value()
-    if not bcrypt_context.verify(old_pass, user.password):
+    if not await password_hasher.verify(old_pass, user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="La contraseña anterior es incorrecta"
@@ -215,7 +222,7 @@ async def change_password(
     new_pass = data.new_password.get_secret_value()
 
     # 2.5️⃣ evitar que sea igual a la actual
-    if bcrypt_context.verify(new_pass, user.password):
+    if await password_hasher.verify(new_pass, user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="La nueva contraseña no puede ser igual a la anterior."
@@ -229,11 +236,11 @@ async def change_password(
         )
 
     # 4️⃣ generar hash
-    hashed = bcrypt_context.hash(new_pass)
+    hashed = await password_hasher.hash(new_pass)
     user.password = hashed
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return {"message": "Contraseña actualizada correctamente"}
 
@@ -247,7 +254,7 @@ async def change_password(
             description="Delete an existing user by their ID.",
             dependencies=CAN_DELETE_USERS)
 async def delete_user(user_id: int, db: db_dependency):
-    existing_user = db.query(User).filter(User.id == user_id).first()
+    existing_user = await db.scalar(select(User).where(User.id == user_id))
 
     if not existing_user:
         raise HTTPException(
@@ -255,7 +262,8 @@ async def delete_user(user_id: int, db: db_dependency):
             detail="User not found"
         )
 
-    db.delete(existing_user)
-    db.commit()
+    await db.delete(existing_user)
+    await db.commit()
+    permission_cache.invalidate(user_id=user_id)
 
     return None
\ No newline at end of file
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+class PoolWaitStats:
+    """Accumulates how long callers waited to get a connection from a pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.acquisitions += 1
+                self.total_wait += waited
+                self.last_wait = waited
+                if waited > self.max_wait:
+                    self.max_wait = waited
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg = self.total_wait / self.acquisitions if self.acquisitions else 0.0
+            return {
+                "acquisitions": self.acquisitions,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(avg * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "last_wait_ms": round(self.last_wait * 1000, 3),
+            }
+
+
+class _TimedPoolMixin:
+    """
+    Times Pool.connect(), i.e. the wait for a free connection plus the time
+    to open a new one when the pool grows.
+    """
+
+    wait_stats: PoolWaitStats
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.wait_stats = self.wait_stats
+        return new_pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool) -> dict:
+    """Checked-out / idle / overflow counts plus acquisition wait times."""
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # QueuePool.overflow() starts at -pool_size; only positive values are real overflow connections.
+            "overflow": max(pool.overflow(), 0),
+        })
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status["wait"] = wait_stats.snapshot()
+    return status
+
+
+async def warm_up_pool(async_engine, connections: int):
+    """
+    Open ``connections`` connections at once so the first requests don't pay
+    for them. Capped at what the pool can hand out (``pool_size +
+    max_overflow``); asking for more would wait out the pool timeout and fail startup.
+    """
+    pool = async_engine.pool
+    if isinstance(pool, QueuePool) and pool._max_overflow >= 0:
+        connections = min(connections, pool.size() + pool._max_overflow)
+    if connections <= 0:
+        return 0
+    opened = await asyncio.gather(*(async_engine.connect() for _ in range(connections)))
+    for connection in opened:
+        await connection.close()
+    return len(opened)
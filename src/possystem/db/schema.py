@@ -0,0 +1,37 @@
+"""
+Schema version check for startup.
+
+Migrations (``src/possystem/migrations``) are applied at deploy time with
+``alembic upgrade head``; workers only compare the database's revision with
+the newest one they ship, which is one indexed read however large the
+schema grows, and refuse to start on a mismatch rather than run against
+tables they do not expect.
+"""
+from pathlib import Path
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Engine
+
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+
+def expected_heads() -> set[str]:
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+def check_schema_version(engine: Engine) -> str:
+    """The database's revision; raises ``RuntimeError`` unless it is the newest migration."""
+    expected = expected_heads()
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != expected:
+        found = ", ".join(sorted(current)) or "none (empty or unmanaged database)"
+        raise RuntimeError(
+            f"Database schema is at revision {found}, this build expects {', '.join(sorted(expected))}. "
+            "Run `alembic upgrade head` before starting the API."
+        )
+    return ", ".join(sorted(current))
@@ -0,0 +1,36 @@
+"""
+PostgreSQL trigram indexes behind ``services.product_search``.
+
+GIN ``gin_trgm_ops`` indexes serve ``ILIKE '%term%'`` (and ``similarity()``)
+without scanning the table, but only for terms of at least 3 characters
+(one trigram); shorter terms fall back to a sequential scan, which is why
+``ProductSearchParams.title`` has ``min_length=3``. They are PostgreSQL-only,
+so they are issued as DDL on ``Base.metadata`` create events and skipped on
+other dialects. SQLite test databases fall back to plain scans.
+"""
+from sqlalchemy import DDL, event
+from .session import Base
+
+
+CREATE_EXTENSION = DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+TRIGRAM_INDEXES = {
+    "ix_products_title_trgm": ("products", "title"),
+    "ix_products_sku_trgm": ("products", "sku"),
+    "ix_products_description_trgm": ("products", "description"),
+    "ix_product_brands_name_trgm": ("product_brands", "name"),
+    "ix_ingredients_name_trgm": ("ingredients", "name"),
+}
+
+CREATE_INDEXES = [
+    DDL(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)")
+    for name, (table, column) in TRIGRAM_INDEXES.items()
+] + [
+    # The pivot's primary key starts with product_id; ingredient -> products needs its own index.
+    DDL("CREATE INDEX IF NOT EXISTS ix_product_has_ingredients_ingredient_id ON product_has_ingredients (ingredient_id)"),
+]
+
+
+event.listen(Base.metadata, "before_create", CREATE_EXTENSION.execute_if(dialect="postgresql"))
+for statement in CREATE_INDEXES:
+    event.listen(Base.metadata, "after_create", statement.execute_if(dialect="postgresql"))
@@ -1,40 +1,128 @@
 from fastapi import FastAPI
-from .db.session import Base, engine
+from fastapi.responses import PlainTextResponse
+from .db.session import engine, async_engine, AsyncSessionLocal
+from .db.schema import check_schema_version
+from .db.pool import pool_status, warm_up_pool
+from .config import settings
+from .observability.sql_stats import SqlStatsMiddleware, instrument_engine, sql_stats_store
+from .observability import metrics
+from .services.product_codes import product_code_index
+from .services.stock import run_reconciler
+from .services.sales_rollups import run_rollup_refresher
+from .services.catalog_sync import run_tombstone_pruner
+from .utils.permission_cache import permission_cache
+from .utils.idempotency import IdempotencyMiddleware, IdempotencyStore, run_idempotency_cleanup
+from .utils.password_hashing import password_hasher, login_latency
 from contextlib import asynccontextmanager
+import asyncio
 from .api.routes import permissions, roles, users, branches, auth, product_categories, products, sales, sale_payments, sale_details, refund_products, suppliers, purchases, purchase_details, product_batch, sale_batch_usage
-from .api.routes import product_master, product_brand, ingredients
+from .api.routes import product_master, product_brand, ingredients, exports, checkout, reports, sync
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup code
-    # Optionally drop all tables (useful during development)
-    print("🔧 Dropping all tables...")
-    Base.metadata.drop_all(bind=engine)
-    # Create all tables
-    print("🔧 Creating database tables (if not exist)...")
-    Base.metadata.create_all(bind=engine)
+    # The schema is migrated and seeded at deploy time (`alembic upgrade head`,
+    # then `python -m possystem.seeds.init_db`); here we only check we match it.
+    revision = check_schema_version(engine)
+    print(f"🔧 Database schema at revision {revision}")
 
-    # Optionally, you could call your init_db seeding function here
-    from .seeds.init_db import init_db
-    init_db()
+    # Open the minimum pool up front so the first requests don't pay for connecting
+    warmup = settings.db_pool_size if settings.db_pool_warmup < 0 else settings.db_pool_warmup
+    opened = await warm_up_pool(async_engine, warmup)
+    print(f"🔧 Connection pool warmed up ({opened} connections)")
+
+    # Work that grows with the data runs in the background, so startup time does not:
+    # per-product stock on hand: fill/repair it from the batches, then re-check periodically
+    stock_reconciler = asyncio.create_task(run_reconciler(AsyncSessionLocal, settings.stock_reconcile_seconds))
+
+    # Barcode/SKU -> product map for /products/by-code; misses fall back to the database until it is loaded
+    code_refresher = asyncio.create_task(product_code_index.run(AsyncSessionLocal))
+
+    # Report rollups: catch up on sales written while we were down, then keep folding new ones in
+    rollup_refresher = asyncio.create_task(run_rollup_refresher(AsyncSessionLocal, settings.sales_rollup_refresh_seconds))
+
+    # Deletes older than the sync token lifetime are no longer needed by terminals
+    tombstone_pruner = asyncio.create_task(run_tombstone_pruner(AsyncSessionLocal))
+
+    # Stored Idempotency-Key responses past their TTL
+    idempotency_cleanup = asyncio.create_task(run_idempotency_cleanup(idempotency_store)) if settings.idempotency_enabled else None
 
     yield  # Everything after this is shutdown code
 
     # Shutdown code (if needed)
+    if idempotency_cleanup is not None:
+        idempotency_cleanup.cancel()
+    tombstone_pruner.cancel()
+    rollup_refresher.cancel()
+    code_refresher.cancel()
+    stock_reconciler.cancel()
+    await async_engine.dispose()
+    password_hasher.shutdown()
     print("🛑 Application shutdown")
 
 app = FastAPI(lifespan=lifespan)
 
+idempotency_store = IdempotencyStore(async_engine, settings.idempotency_ttl_seconds, settings.idempotency_lock_seconds)
+if settings.idempotency_enabled:
+    # Innermost, so a replayed response still shows up in metrics and its lookup in the SQL stats
+    app.add_middleware(IdempotencyMiddleware, store=idempotency_store, max_body=settings.idempotency_max_body_bytes)
+if settings.sql_stats_enabled:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    app.add_middleware(SqlStatsMiddleware, store=sql_stats_store, repeat_warning=settings.sql_repeat_warning)
+if settings.metrics_enabled:
+    # Added last so it is the outermost middleware and times everything below it
+    app.add_middleware(metrics.MetricsMiddleware, registry=metrics.metrics_registry)
+
 @app.get('/', tags=["Root"])
 def root():
     """Root endpoint."""
     return {"message": "Welcome to the POS System API"}
 
+@app.get('/metrics', tags=["Health Check"], response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Per-route request counts, errors, latency and payload size histograms in Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render(metrics.metrics_registry, sql_stats_store if settings.sql_stats_enabled else None),
+        media_type=metrics.CONTENT_TYPE,
+    )
+
 @app.get('/healthcheck', tags=["Health Check"])
 def health_check():
     """Health check endpoint."""
     return {"status": "ok", "message": "API is running"}
 
+@app.get('/healthcheck/permission-cache', tags=["Health Check"])
+def permission_cache_check():
+    """Permission cache hit rate and invalidation counters."""
+    return permission_cache.stats()
+
+@app.get('/healthcheck/auth', tags=["Health Check"])
+def auth_check():
+    """Login latency and bcrypt pool saturation."""
+    return {
+        "login_latency": login_latency.snapshot(),
+        "password_hashing": password_hasher.stats(),
+    }
+
+@app.get('/healthcheck/product-codes', tags=["Health Check"])
+def product_codes_check():
+    """Size, hit rate and freshness of the barcode/SKU lookup map."""
+    return product_code_index.stats()
+
+@app.get('/healthcheck/sql', tags=["Health Check"])
+def sql_stats_check():
+    """Statements, DB time and rows per route, plus how often a route tripped the N+1 warning."""
+    return sql_stats_store.snapshot()
+
+@app.get('/healthcheck/db-pool', tags=["Health Check"])
+def db_pool_check():
+    """Connection pool usage: checked-out/idle/overflow counts and acquisition wait times."""
+    return {
+        "api": pool_status(async_engine.pool),
+        "sync": pool_status(engine.pool),
+    }
+
 app.include_router(auth.router)
 app.include_router(permissions.router)
 app.include_router(roles.router)
@@ -53,4 +141,8 @@ app.include_router(refund_products.router)
 app.include_router(suppliers.router)
 app.include_router(purchases.router)
 app.include_router(purchase_details.router)
-app.include_router(sale_batch_usage.router)
\ No newline at end of file
+app.include_router(sale_batch_usage.router)
+app.include_router(exports.router)
+app.include_router(checkout.router)
+app.include_router(reports.router)
+app.include_router(sync.router)
\ No newline at end of file
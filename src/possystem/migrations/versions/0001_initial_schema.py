@@ -0,0 +1,460 @@
+"""Initial schema: every table as of the switch from create_all to migrations.
+
+Databases created by the old startup create_all already have all of this;
+mark them with ``alembic stamp 0001`` instead of upgrading.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 04:25:45.219458
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# PostgreSQL-only trigram indexes behind product search (see db/search_indexes.py).
+TRIGRAM_INDEXES = {
+    "ix_products_title_trgm": ("products", "title"),
+    "ix_products_sku_trgm": ("products", "sku"),
+    "ix_products_description_trgm": ("products", "description"),
+    "ix_product_brands_name_trgm": ("product_brands", "name"),
+    "ix_ingredients_name_trgm": ("ingredients", "name"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('branches',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('address', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('idempotency_keys',
+    sa.Column('key_hash', sa.String(length=64), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.SmallInteger(), nullable=True),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('body', sa.LargeBinary(), nullable=True),
+    sa.Column('expires_at', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('key_hash')
+    )
+    op.create_index(op.f('ix_idempotency_keys_expires_at'), 'idempotency_keys', ['expires_at'], unique=False)
+    op.create_table('ingredients',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingredients_name'), 'ingredients', ['name'], unique=True)
+    op.create_index(op.f('ix_ingredients_updated_at'), 'ingredients', ['updated_at'], unique=False)
+    op.create_table('payments_daily_by_method',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('branch_id', sa.BigInteger(), nullable=True),
+    sa.Column('method_payment', sa.String(length=100), nullable=False),
+    sa.Column('payments', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Double(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_payments_daily_by_method_day'), 'payments_daily_by_method', ['day'], unique=False)
+    op.create_table('permissions',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('product_brands',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('logo', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_product_brands_updated_at'), 'product_brands', ['updated_at'], unique=False)
+    op.create_table('product_categories',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=250), nullable=False),
+    sa.Column('image', sa.String(length=250), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_categories_updated_at'), 'product_categories', ['updated_at'], unique=False)
+    op.create_table('roles',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_roles_name'), 'roles', ['name'], unique=True)
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('watermark', sa.TIMESTAMP(), nullable=True),
+    sa.Column('refreshed_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('sales_daily_by_branch',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('branch_id', sa.BigInteger(), nullable=True),
+    sa.Column('user_id', sa.BigInteger(), nullable=True),
+    sa.Column('sales', sa.Integer(), nullable=False),
+    sa.Column('subtotal', sa.Double(), nullable=False),
+    sa.Column('discount', sa.Double(), nullable=False),
+    sa.Column('tax', sa.Double(), nullable=False),
+    sa.Column('total', sa.Double(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sales_daily_by_branch_day'), 'sales_daily_by_branch', ['day'], unique=False)
+    op.create_table('sales_daily_by_product',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('branch_id', sa.BigInteger(), nullable=True),
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('sales', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Double(), nullable=False),
+    sa.Column('discount', sa.Double(), nullable=False),
+    sa.Column('tax', sa.Double(), nullable=False),
+    sa.Column('total', sa.Double(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sales_daily_by_product_day'), 'sales_daily_by_product', ['day'], unique=False)
+    op.create_index(op.f('ix_sales_daily_by_product_product_id'), 'sales_daily_by_product', ['product_id'], unique=False)
+    op.create_table('sales_hourly_by_branch',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('hour', sa.SmallInteger(), nullable=False),
+    sa.Column('branch_id', sa.BigInteger(), nullable=True),
+    sa.Column('sales', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Double(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sales_hourly_by_branch_day'), 'sales_hourly_by_branch', ['day'], unique=False)
+    op.create_table('suppliers',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=250), nullable=True),
+    sa.Column('phone', sa.String(length=25), nullable=True),
+    sa.Column('address', sa.String(length=250), nullable=True),
+    sa.Column('rfc', sa.String(length=50), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('sync_tombstones',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('entity', sa.String(length=50), nullable=False),
+    sa.Column('entity_id', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_tombstones_deleted_at'), 'sync_tombstones', ['deleted_at'], unique=False)
+    op.create_table('product_master',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=250), nullable=False),
+    sa.Column('description', sa.String(length=2000), nullable=True),
+    sa.Column('product_category_id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['product_category_id'], ['product_categories.id'], ondelete='RESTRICT'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_master_updated_at'), 'product_master', ['updated_at'], unique=False)
+    op.create_table('role_has_permissions',
+    sa.Column('role_id', sa.BigInteger(), nullable=False),
+    sa.Column('permission_id', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['permission_id'], ['permissions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('role_id', 'permission_id')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('surname', sa.String(length=255), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('email_verified_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('remember_token', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('role_id', sa.BigInteger(), nullable=True),
+    sa.Column('avatar', sa.String(length=255), nullable=True),
+    sa.Column('branch_id', sa.BigInteger(), nullable=True),
+    sa.Column('phone', sa.String(length=50), nullable=True),
+    sa.Column('type_document', sa.String(length=50), nullable=True),
+    sa.Column('n_document', sa.String(length=50), nullable=True),
+    sa.Column('gender', sa.String(length=5), nullable=True),
+    sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_table('products',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('title', sa.String(length=250), nullable=False),
+    sa.Column('image', sa.String(length=250), nullable=True),
+    sa.Column('brand_id', sa.BigInteger(), nullable=True),
+    sa.Column('product_master_id', sa.BigInteger(), nullable=True),
+    sa.Column('price_retail', sa.Double(), nullable=False),
+    sa.Column('price_cost', sa.Double(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('sku', sa.String(length=100), nullable=True),
+    sa.Column('is_active', sa.Boolean(), server_default='1', nullable=False),
+    sa.Column('allow_without_stock', sa.Boolean(), server_default='1', nullable=False),
+    sa.Column('is_discount', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('max_discount', sa.Double(), nullable=True),
+    sa.Column('is_taxable', sa.Boolean(), server_default='1', nullable=False),
+    sa.Column('tax_percentage', sa.Double(), nullable=True),
+    sa.Column('allow_warranty', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('warranty_days', sa.Double(), nullable=True),
+    sa.Column('unit_name', sa.String(length=50), nullable=False),
+    sa.Column('base_unit_name', sa.String(length=50), nullable=True),
+    sa.Column('units_per_base', sa.Double(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['brand_id'], ['product_brands.id'], ondelete='RESTRICT'),
+    sa.ForeignKeyConstraint(['product_master_id'], ['product_master.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sku')
+    )
+    op.create_index(op.f('ix_products_updated_at'), 'products', ['updated_at'], unique=False)
+    op.create_table('purchases',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('supplier_id', sa.BigInteger(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('date_emision', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('total', sa.Double(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['supplier_id'], ['suppliers.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('sales',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=True),
+    sa.Column('branch_id', sa.BigInteger(), nullable=True),
+    sa.Column('subtotal', sa.Double(), nullable=True),
+    sa.Column('total', sa.Double(), nullable=True),
+    sa.Column('discount', sa.Double(), nullable=True),
+    sa.Column('tax', sa.Double(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('client_uuid', sa.Uuid(), nullable=True),
+    sa.Column('date_sale', sa.TIMESTAMP(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('client_uuid')
+    )
+    op.create_index(op.f('ix_sales_date_sale'), 'sales', ['date_sale'], unique=False)
+    op.create_index(op.f('ix_sales_updated_at'), 'sales', ['updated_at'], unique=False)
+    op.create_table('product_barcodes',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('code', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code')
+    )
+    op.create_index(op.f('ix_product_barcodes_product_id'), 'product_barcodes', ['product_id'], unique=False)
+    op.create_index(op.f('ix_product_barcodes_updated_at'), 'product_barcodes', ['updated_at'], unique=False)
+    op.create_table('product_batches',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('lot_code', sa.String(length=100), nullable=True),
+    sa.Column('expiration_date', sa.Date(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('purchase_price', sa.Double(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_product_batches_fefo', 'product_batches', ['product_id', 'expiration_date', 'id'], unique=False, postgresql_where=sa.text('quantity > 0'))
+    op.create_index(op.f('ix_product_batches_updated_at'), 'product_batches', ['updated_at'], unique=False)
+    op.create_table('product_has_ingredients',
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('ingredient_id', sa.BigInteger(), nullable=False),
+    sa.Column('amount', sa.String(length=50), nullable=True),
+    sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'ingredient_id')
+    )
+    op.create_table('sale_details',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('sale_id', sa.BigInteger(), nullable=False),
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity', sa.Double(), nullable=False),
+    sa.Column('price_unit', sa.Double(), nullable=False),
+    sa.Column('discount', sa.Double(), nullable=True),
+    sa.Column('tax', sa.Double(), nullable=True),
+    sa.Column('subtotal', sa.Double(), nullable=True),
+    sa.Column('total', sa.Double(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['sale_id'], ['sales.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sale_details_updated_at'), 'sale_details', ['updated_at'], unique=False)
+    op.create_table('sale_payments',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('sale_id', sa.BigInteger(), nullable=False),
+    sa.Column('method_payment', sa.String(length=100), nullable=False),
+    sa.Column('n_transaction', sa.String(length=100), nullable=True),
+    sa.Column('bank', sa.String(length=100), nullable=True),
+    sa.Column('amount', sa.Double(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['sale_id'], ['sales.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sale_payments_updated_at'), 'sale_payments', ['updated_at'], unique=False)
+    op.create_table('stock_on_hand',
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index(op.f('ix_stock_on_hand_updated_at'), 'stock_on_hand', ['updated_at'], unique=False)
+    op.create_table('purchase_details',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('purchase_id', sa.BigInteger(), nullable=False),
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity', sa.Double(), nullable=False),
+    sa.Column('unit_price', sa.Double(), nullable=False),
+    sa.Column('expiration_date', sa.TIMESTAMP(), nullable=True),
+    sa.Column('lot_code', sa.String(length=100), nullable=True),
+    sa.Column('product_batch_id', sa.BigInteger(), nullable=True),
+    sa.ForeignKeyConstraint(['product_batch_id'], ['product_batches.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['purchase_id'], ['purchases.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_purchase_details_product_batch_id'), 'purchase_details', ['product_batch_id'], unique=False)
+    op.create_table('refund_products',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity', sa.Double(), nullable=False),
+    sa.Column('sale_detail_id', sa.BigInteger(), nullable=True),
+    sa.Column('type', sa.SmallInteger(), nullable=False, comment='1=Repair, 2=Replacement, 3=Return'),
+    sa.Column('state', sa.SmallInteger(), nullable=False, comment='1=Pending, 2=Review, 3=Repaired, 4=Discarded'),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.BigInteger(), nullable=True),
+    sa.Column('resolution_date', sa.TIMESTAMP(), nullable=True),
+    sa.Column('description_resolution', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('deleted_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('state_clone', sa.SmallInteger(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['sale_detail_id'], ['sale_details.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('sale_batch_usages',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('sale_detail_id', sa.BigInteger(), nullable=False),
+    sa.Column('batch_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity_used', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['batch_id'], ['product_batches.id'], ),
+    sa.ForeignKeyConstraint(['sale_detail_id'], ['sale_details.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, (table, column) in TRIGRAM_INDEXES.items():
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_product_has_ingredients_ingredient_id ON product_has_ingredients (ingredient_id)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_product_has_ingredients_ingredient_id")
+        for name in TRIGRAM_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.drop_table('sale_batch_usages')
+    op.drop_table('refund_products')
+    op.drop_index(op.f('ix_purchase_details_product_batch_id'), table_name='purchase_details')
+    op.drop_table('purchase_details')
+    op.drop_index(op.f('ix_stock_on_hand_updated_at'), table_name='stock_on_hand')
+    op.drop_table('stock_on_hand')
+    op.drop_index(op.f('ix_sale_payments_updated_at'), table_name='sale_payments')
+    op.drop_table('sale_payments')
+    op.drop_index(op.f('ix_sale_details_updated_at'), table_name='sale_details')
+    op.drop_table('sale_details')
+    op.drop_table('product_has_ingredients')
+    op.drop_index(op.f('ix_product_batches_updated_at'), table_name='product_batches')
+    op.drop_index('ix_product_batches_fefo', table_name='product_batches', postgresql_where=sa.text('quantity > 0'))
+    op.drop_table('product_batches')
+    op.drop_index(op.f('ix_product_barcodes_updated_at'), table_name='product_barcodes')
+    op.drop_index(op.f('ix_product_barcodes_product_id'), table_name='product_barcodes')
+    op.drop_table('product_barcodes')
+    op.drop_index(op.f('ix_sales_updated_at'), table_name='sales')
+    op.drop_index(op.f('ix_sales_date_sale'), table_name='sales')
+    op.drop_table('sales')
+    op.drop_table('purchases')
+    op.drop_index(op.f('ix_products_updated_at'), table_name='products')
+    op.drop_table('products')
+    op.drop_table('users')
+    op.drop_table('role_has_permissions')
+    op.drop_index(op.f('ix_product_master_updated_at'), table_name='product_master')
+    op.drop_table('product_master')
+    op.drop_index(op.f('ix_sync_tombstones_deleted_at'), table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    op.drop_table('suppliers')
+    op.drop_index(op.f('ix_sales_hourly_by_branch_day'), table_name='sales_hourly_by_branch')
+    op.drop_table('sales_hourly_by_branch')
+    op.drop_index(op.f('ix_sales_daily_by_product_product_id'), table_name='sales_daily_by_product')
+    op.drop_index(op.f('ix_sales_daily_by_product_day'), table_name='sales_daily_by_product')
+    op.drop_table('sales_daily_by_product')
+    op.drop_index(op.f('ix_sales_daily_by_branch_day'), table_name='sales_daily_by_branch')
+    op.drop_table('sales_daily_by_branch')
+    op.drop_table('rollup_watermarks')
+    op.drop_index(op.f('ix_roles_name'), table_name='roles')
+    op.drop_table('roles')
+    op.drop_index(op.f('ix_product_categories_updated_at'), table_name='product_categories')
+    op.drop_table('product_categories')
+    op.drop_index(op.f('ix_product_brands_updated_at'), table_name='product_brands')
+    op.drop_table('product_brands')
+    op.drop_table('permissions')
+    op.drop_index(op.f('ix_payments_daily_by_method_day'), table_name='payments_daily_by_method')
+    op.drop_table('payments_daily_by_method')
+    op.drop_index(op.f('ix_ingredients_updated_at'), table_name='ingredients')
+    op.drop_index(op.f('ix_ingredients_name'), table_name='ingredients')
+    op.drop_table('ingredients')
+    op.drop_index(op.f('ix_idempotency_keys_expires_at'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    op.drop_table('branches')
@@ -0,0 +1,36 @@
+"""Soft delete for sale lines and payments: the deleted_at their DELETE routes set.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 04:36:10.356959
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('sale_details', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.TIMESTAMP(), nullable=True))
+
+    with op.batch_alter_table('sale_payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.TIMESTAMP(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('sale_payments', schema=None) as batch_op:
+        batch_op.drop_column('deleted_at')
+
+    with op.batch_alter_table('sale_details', schema=None) as batch_op:
+        batch_op.drop_column('deleted_at')
@@ -0,0 +1,30 @@
+"""Soft delete for sales: the deleted_at DELETE /sales sets, left out of the rollups.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 04:51:48.381113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.TIMESTAMP(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_column('deleted_at')
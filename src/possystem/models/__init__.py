@@ -50,6 +50,15 @@ from .sale_batch_usage.orm import SaleBatchUsage
 from .product_master.orm import ProductMaster
 from .product_brand.orm import ProductBrand
 from .ingredients.orm import Ingredient
+from .product_barcodes.orm import ProductBarcode
+from .stock_on_hand.orm import StockOnHand
+from .sales_rollups.orm import SalesDailyByBranch, SalesHourlyByBranch, SalesDailyByProduct, PaymentsDailyByMethod, RollupWatermark, RollupStaleDay
+from .catalog_sync.orm import SyncTombstone
+from .idempotency_keys.orm import IdempotencyKey
+from .permission_versions.orm import PermissionVersion
+
+# PostgreSQL-only search indexes, attached to Base.metadata create events
+from ..db import search_indexes  # noqa: F401
 
 # when you have all coorect you can try
 # # src/possystem/models/__init__.py
@@ -15,7 +15,7 @@ class Branch(Base):
     # is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
     # deleted_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
 
-    users: Mapped[list["User"]] = relationship("User", back_populates="branch", lazy="selectin")
+    users: Mapped[list["User"]] = relationship("User", back_populates="branch")
     sales: Mapped[list["Sale"]] = relationship("Sale", back_populates="branch")
     # purchases = relationship("Purchase", back_populates="branch")
     # warehouses: Mapped[list["Warehouse"]] = relationship("Warehouse", back_populates="branch")
@@ -0,0 +1,48 @@
+from sqlalchemy import BigInteger, String, TIMESTAMP, event, insert
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from ...db.session import Base
+from ..products.orm import Product
+from ..product_categories.orm import ProductCategory
+from ..product_brand.orm import ProductBrand
+from ..product_master.orm import ProductMaster
+from ..ingredients.orm import Ingredient
+from ..product_barcodes.orm import ProductBarcode
+
+
+class SyncTombstone(Base):
+    """
+    One row per deleted catalog row, so ``GET /sync/catalog`` can tell
+    terminals what to drop. Written by the ``after_delete`` hooks below in
+    the same flush as the delete; rows older than the token lifetime are pruned.
+    """
+    __tablename__ = "sync_tombstones"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    entity: Mapped[str] = mapped_column(String(50), nullable=False)
+    entity_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now(), index=True)
+
+
+# Feed section name of every synced model.
+CATALOG_ENTITIES = {
+    ProductCategory: "categories",
+    ProductBrand: "brands",
+    ProductMaster: "masters",
+    Ingredient: "ingredients",
+    Product: "products",
+    ProductBarcode: "barcodes",
+}
+
+
+def _tombstone_hook(entity: str):
+    def after_delete(mapper, connection, target):
+        connection.execute(insert(SyncTombstone.__table__).values(entity=entity, entity_id=target.id))
+    return after_delete
+
+
+# Only ORM deletes (session.delete) are seen. Rows removed by ON DELETE CASCADE,
+# such as a deleted product's barcodes, are implied by their parent's tombstone.
+for _model, _entity in CATALOG_ENTITIES.items():
+    event.listen(_model, "after_delete", _tombstone_hook(_entity))
@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+# =========================================================
+# 🔵 Rows sent to terminals (only what a till needs)
+# =========================================================
+class SyncCategory(BaseModel):
+    id: int
+    name: str
+    image: Optional[str] = None
+    is_active: bool
+    updated_at: datetime
+
+
+class SyncBrand(BaseModel):
+    id: int
+    name: str
+    logo: Optional[str] = None
+    updated_at: datetime
+
+
+class SyncMaster(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    product_category_id: int
+    updated_at: datetime
+
+
+class SyncIngredient(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    updated_at: datetime
+
+
+class SyncProduct(BaseModel):
+    id: int
+    title: str
+    image: Optional[str] = None
+    sku: Optional[str] = None
+    brand_id: Optional[int] = None
+    product_master_id: Optional[int] = None
+    price_retail: float
+    is_active: bool
+    allow_without_stock: bool
+    is_discount: bool
+    max_discount: Optional[float] = None
+    is_taxable: bool
+    tax_percentage: Optional[float] = None
+    unit_name: str
+    base_unit_name: Optional[str] = None
+    units_per_base: Optional[float] = None
+    ingredient_ids: list[int]
+    updated_at: datetime
+
+
+class SyncBarcode(BaseModel):
+    id: int
+    product_id: int
+    code: str
+    updated_at: datetime
+
+
+class CatalogChanges(BaseModel):
+    categories: list[SyncCategory] = []
+    brands: list[SyncBrand] = []
+    masters: list[SyncMaster] = []
+    ingredients: list[SyncIngredient] = []
+    products: list[SyncProduct] = []
+    barcodes: list[SyncBarcode] = []
+
+
+class CatalogDeletions(BaseModel):
+    categories: list[int] = []
+    brands: list[int] = []
+    masters: list[int] = []
+    ingredients: list[int] = []
+    products: list[int] = []
+    barcodes: list[int] = []
+
+
+class CatalogSyncResponse(BaseModel):
+    token: str = Field(..., description="Pass as ?since= on the next call")
+    has_more: bool = Field(..., description="More changes are waiting: call again right away with the new token")
+    full: bool = Field(..., description="No token was given: changes hold the whole catalog, page by page")
+    changes: CatalogChanges
+    deleted: CatalogDeletions = Field(..., description="Ids to drop. A deleted product's barcodes are not listed separately")
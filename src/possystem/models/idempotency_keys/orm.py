@@ -0,0 +1,23 @@
+from sqlalchemy import String, SmallInteger, LargeBinary, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+from ...db.session import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Outcome of a write sent with an ``Idempotency-Key`` header, replayed by
+    ``utils.idempotency`` when the same request is retried. A row with no
+    status is a request still running. Times are UTC.
+    """
+    __tablename__ = "idempotency_keys"
+
+    # sha256 of the caller and the key: one primary-key lookup per write
+    key_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # sha256 of method, path, query and body; a reused key with another request is refused
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    content_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    body: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=False, index=True)
@@ -17,7 +17,7 @@ class Ingredient(Base):
         TIMESTAMP(timezone=False), server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
-        TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now()
+        TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now(), index=True
     )
 
     # --- Relación muchos a muchos ---
@@ -0,0 +1,46 @@
+from sqlalchemy import BigInteger, SmallInteger, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Mapped, mapped_column
+from ...db.session import Base
+from ..permissions.orm import Permission
+from ..roles.orm import Role
+from ..users.orm import User
+
+
+class PermissionVersion(Base):
+    """
+    Single row counting changes to roles, their permissions and users' roles,
+    shared by every worker. The hooks below bump it in the same flush as the
+    change; tokens carry the value they were issued at (``pv``) and
+    ``utils.permission_cache`` compares against it.
+    """
+    __tablename__ = "permission_versions"
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+def bump_permission_version(connection):
+    """Increments the shared version, creating the row on first use."""
+    table = PermissionVersion.__table__
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(table).values(id=1, version=1)
+    connection.execute(stmt.on_conflict_do_update(index_elements=[table.c.id], set_={"version": table.c.version + 1}))
+
+
+def _bump(mapper, connection, target):
+    bump_permission_version(connection)
+
+
+# A role's permission list is a relationship, so editing it marks the role
+# dirty and fires after_update even when no column changed.
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Role, _event, _bump)
+    event.listen(Permission, _event, _bump)
+event.listen(User, "after_delete", _bump)
+
+
+@event.listens_for(User, "after_update")
+def _user_role_changed(mapper, connection, target):
+    if inspect(target).attrs.role_id.history.has_changes():
+        bump_permission_version(connection)
@@ -17,6 +17,5 @@ class Permission(Base):
     roles: Mapped[list["Role"]] = relationship(
         "Role",
         secondary=role_has_permissions,  # pivot table name
-        back_populates="permissions",
-        lazy="selectin"
+        back_populates="permissions"
     )
@@ -0,0 +1,28 @@
+from sqlalchemy import String, BigInteger, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import datetime
+from ...db.session import Base
+
+
+class ProductBarcode(Base):
+    __tablename__ = "product_barcodes"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    product_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("products.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    # Scanned code (EAN-13, UPC-A, internal); one product can have several.
+    code: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now(), index=True
+    )
+
+    product = relationship("Product", back_populates="barcodes")
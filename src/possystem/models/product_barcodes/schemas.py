@@ -0,0 +1,31 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from possystem.types.products import ProductBarcodeStr
+
+
+# =========================================================
+# 🟢 Create
+# =========================================================
+class ProductBarcodeCreate(BaseModel):
+    code: ProductBarcodeStr
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={
+            "example": {
+                "code": "7501234567890"
+            }
+        }
+    )
+
+
+# =========================================================
+# 🔵 Response
+# =========================================================
+class ProductBarcodeResponse(BaseModel):
+    id: int
+    product_id: int
+    code: str
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
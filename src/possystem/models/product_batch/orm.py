@@ -1,5 +1,5 @@
-from sqlalchemy import String, BigInteger, Double, Date, ForeignKey, Integer, TIMESTAMP
-from sqlalchemy.sql import func
+from sqlalchemy import String, BigInteger, Double, Date, ForeignKey, Index, Integer, TIMESTAMP
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, date
 from ...db.session import Base
@@ -8,6 +8,13 @@ from typing import Optional
 
 class ProductBatch(Base):
     __tablename__ = "product_batches"
+    __table_args__ = (
+        # FEFO allocation: a product's batches with stock, earliest expiration first
+        Index(
+            "ix_product_batches_fefo", "product_id", "expiration_date", "id",
+            postgresql_where=text("quantity > 0"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     product_id: Mapped[int] = mapped_column(BigInteger,ForeignKey("products.id", ondelete="CASCADE"),nullable=False)
@@ -16,6 +23,7 @@ class ProductBatch(Base):
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     purchase_price: Mapped[Optional[float]] = mapped_column(Double, nullable=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), index=True)
 
     product: Mapped["Product"] = relationship("Product", back_populates="batches")
     sale_usages: Mapped[list["SaleBatchUsage"]] = relationship("SaleBatchUsage", back_populates="batch")
@@ -14,6 +14,9 @@ class ProductBrand(Base):
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=False), server_default=func.now()
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now(), index=True
+    )
 
     products: Mapped[list["Product"]] = relationship(
         "Product",
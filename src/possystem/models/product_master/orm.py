@@ -19,6 +19,12 @@ class ProductMaster(Base):
         TIMESTAMP(timezone=False),
         server_default=func.now()
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False),
+        server_default=func.now(),
+        onupdate=func.now(),
+        index=True
+    )
 
     # --- Relaciones ---
     products: Mapped[list["Product"]] = relationship(
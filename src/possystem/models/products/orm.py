@@ -33,7 +33,7 @@ class Product(Base):
 
     # --- Descripción y control ---
     description: Mapped[str] = mapped_column(Text, nullable=True)
-    sku: Mapped[str] = mapped_column(String(100), nullable=True)
+    sku: Mapped[str] = mapped_column(String(100), nullable=True, unique=True)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="1")
     allow_without_stock: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="1")
 
@@ -60,7 +60,8 @@ class Product(Base):
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=False),
         server_default=func.now(),
-        onupdate=func.now()
+        onupdate=func.now(),
+        index=True
     )
 
     # --- Relaciones ---
@@ -74,6 +75,12 @@ class Product(Base):
         cascade="all, delete-orphan"
     )
 
+    barcodes = relationship(
+        "ProductBarcode",
+        back_populates="product",
+        cascade="all, delete-orphan"
+    )
+
     master = relationship("ProductMaster", back_populates="products")
     brand = relationship("ProductBrand", back_populates="products")
 
@@ -1,6 +1,6 @@
 from typing import Optional, List, TYPE_CHECKING
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 
 from possystem.types.products import (
     ProductTitleStr,
@@ -19,6 +19,7 @@ from possystem.types.products import (
     AllowWithoutStockFlag,
     ProductUnitName,
     ProductBaseUnitName,
+    ProductBarcodeStr,
 )
 
 # =========================================================
@@ -281,14 +282,59 @@ class ProductDetailsResponse(ProductResponse):
 
 
 
+# =========================================================
+# 📟 Scan card (GET /products/by-code/{code})
+# =========================================================
+class ProductScanResponse(BaseModel):
+    code: str
+    id: int
+    title: str
+    sku: Optional[str] = None
+    unit_name: Optional[str] = None
+    price_retail: float
+    is_discount: bool
+    max_discount: Optional[float] = None
+    is_taxable: bool
+    tax_percentage: Optional[float] = None
+    is_active: bool
+    allow_without_stock: bool
+    stock: int = Field(..., description="Unidades en lotes")
+    in_stock: bool
+    sellable: bool = Field(..., description="Activo y con stock (o se permite vender sin stock)")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "code": "7501234567890",
+                "id": 12,
+                "title": "Ibuprofeno 400mg",
+                "sku": "IBU400",
+                "unit_name": "pieza",
+                "price_retail": 45.5,
+                "is_discount": False,
+                "max_discount": None,
+                "is_taxable": True,
+                "tax_percentage": 16,
+                "is_active": True,
+                "allow_without_stock": False,
+                "stock": 35,
+                "in_stock": True,
+                "sellable": True
+            }
+        }
+    )
+
+
+
 # =========================================================
 # 🔍 Search params
 # =========================================================
 class ProductSearchParams(BaseModel):
-    title: Optional[str] = Field(None, min_length=2, max_length=100)
+    title: Optional[str] = Field(None, min_length=3, max_length=100, description="Matches title, SKU, description, brand or ingredient names (at least 3 characters)")
     is_active: Optional[bool] = None
     brand_id: Optional[int] = None
     product_master_id: Optional[int] = None
+    limit: int = Field(20, ge=1, le=100, description="Maximum number of results")
 
     model_config = ConfigDict(
         extra="forbid",
@@ -304,6 +350,43 @@ class ProductSearchParams(BaseModel):
 
 
 
+# =========================================================
+# 📥 Bulk import
+# =========================================================
+class ProductImportRow(ProductCreate):
+    """
+    One row of a catalog import. Brand, master and ingredients can be given
+    by ID (as in ``ProductCreate``) or by exact name; barcodes are optional.
+    """
+    brand: Optional[str] = Field(None, max_length=200, description="Nombre de la marca (en lugar de brand_id)")
+    product_master: Optional[str] = Field(None, max_length=250, description="Nombre del producto maestro (en lugar de product_master_id)")
+    ingredients: Optional[List[str]] = Field(None, description="Nombres de ingredientes (además de ingredient_ids)")
+    barcodes: Optional[List[ProductBarcodeStr]] = Field(None, description="Códigos de barras del producto")
+
+    @field_validator("ingredients")
+    @classmethod
+    def normalize_ingredients(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        # Ingredient names are stored lower-cased (see IngredientCreate)
+        return [name.strip().lower() for name in v] if v is not None else None
+
+
+class ProductImportError(BaseModel):
+    row: int = Field(..., description="Número de fila en el archivo (1 = primera fila de datos)")
+    sku: Optional[str] = None
+    errors: List[str]
+
+
+class ProductImportReport(BaseModel):
+    rows: int = Field(..., description="Filas leídas")
+    created: int = Field(..., description="Productos creados")
+    failed: int = Field(..., description="Filas rechazadas")
+    dry_run: bool = False
+    errors: List[ProductImportError] = Field(default_factory=list, description="Detalle por fila (limitado)")
+    errors_truncated: bool = Field(False, description="Hubo más errores de los listados")
+    seconds: float
+
+
+
 # =========================================================
 # 🔁 Forward references
 # =========================================================
@@ -14,6 +14,10 @@ class PurchaseDetail(Base):
     unit_price: Mapped[float] = mapped_column(Double, nullable=False)
     expiration_date: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=True)
     lot_code: Mapped[str] = mapped_column(String(100), nullable=True)
+    # Batch created when the line was received; null until then
+    product_batch_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("product_batches.id", ondelete="SET NULL"), nullable=True, index=True
+    )
 
     purchase = relationship("Purchase", back_populates="details")
     product = relationship("Product", back_populates="purchase_details")
@@ -1,6 +1,7 @@
 from typing import Optional
-from datetime import datetime
-from pydantic import BaseModel, Field
+from datetime import date, datetime
+from pydantic import BaseModel, Field, field_validator
+from ...utils.db_time import to_server_time
 
 
 # -----------------------
@@ -144,3 +145,68 @@ class PurchaseSearchParams(BaseModel):
     date_emision_from: Optional[datetime] = None
     date_emision_to: Optional[datetime] = None
     n_comprobant: Optional[str] = None
+
+
+# -----------------------
+# Receiving
+# -----------------------
+class PurchaseReceiveLine(BaseModel):
+    product_id: int = Field(..., gt=0, description="ID del producto")
+    quantity: int = Field(..., gt=0, description="Unidades recibidas")
+    unit_price: float = Field(..., ge=0, description="Costo unitario")
+    lot_code: Optional[str] = Field(None, max_length=100, description="Lote del proveedor")
+    expiration_date: date = Field(..., description="Fecha de caducidad del lote")
+
+    model_config = {"extra": "forbid"}
+
+
+class PurchaseReceiveRequest(BaseModel):
+    supplier_id: int = Field(..., gt=0, description="ID del proveedor")
+    date_emision: Optional[datetime] = Field(None, description="Fecha del comprobante; por defecto ahora")
+    description: Optional[str] = Field(None, description="Notas de la recepción")
+    lines: list[PurchaseReceiveLine] = Field(..., min_length=1, max_length=1000)
+
+    date_emision_to_server_time = field_validator("date_emision")(to_server_time)
+
+    model_config = {
+        "extra": "forbid",
+        "json_schema_extra": {
+            "example": {
+                "supplier_id": 5,
+                "description": "Entrega semanal",
+                "lines": [
+                    {"product_id": 20, "quantity": 50, "unit_price": 25.5, "lot_code": "A2025-01", "expiration_date": "2026-12-31"},
+                    {"product_id": 21, "quantity": 24, "unit_price": 12.0, "expiration_date": "2027-03-31"}
+                ]
+            }
+        }
+    }
+
+
+class PurchaseReceiveLineResponse(BaseModel):
+    id: int
+    product_id: int
+    quantity: float
+    unit_price: float
+    lot_code: Optional[str] = None
+    expiration_date: Optional[datetime] = None
+    product_batch_id: Optional[int] = None
+
+    model_config = {"from_attributes": True}
+
+
+class PurchaseCostUpdate(BaseModel):
+    product_id: int
+    previous_cost: float
+    price_cost: float = Field(..., description="Costo promedio ponderado tras la recepción")
+
+
+class PurchaseReceiveResponse(BaseModel):
+    id: int
+    supplier_id: Optional[int] = None
+    user_id: Optional[int] = None
+    date_emision: Optional[datetime] = None
+    total: float
+    description: Optional[str] = None
+    lines: list[PurchaseReceiveLineResponse]
+    costs: list[PurchaseCostUpdate]
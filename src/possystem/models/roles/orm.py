@@ -15,12 +15,11 @@ class Role(Base):
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now())
 
-    users: Mapped[list["User"]] = relationship("User", back_populates="role", lazy="selectin")
+    users: Mapped[list["User"]] = relationship("User", back_populates="role")
 
     permissions: Mapped[list["Permission"]] = relationship(
         "Permission",
         secondary=role_has_permissions,  # pivot table name
         back_populates="roles",
-        lazy="selectin",
         passive_deletes=True
     )
@@ -18,11 +18,11 @@ class SaleDetail(Base):
     total: Mapped[float] = mapped_column(Double, nullable=True)     # subtotal * quantity
     description: Mapped[str] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now())
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now(), index=True)
     # product_category_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("product_categories.id"), nullable=True)
     # unit_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
     # warehouse_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("warehouses.id"), nullable=True)
-    # deleted_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
+    deleted_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
     # state_attention: Mapped[int] = mapped_column(SmallInteger, nullable=True)  # 1 = pending, 2 = partial, 3 = complete
     # quantity_pending: Mapped[float] = mapped_column(Double, nullable=True)  # pending quantity to attend
 
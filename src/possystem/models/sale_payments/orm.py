@@ -14,8 +14,8 @@ class SalePayment(Base):
     bank: Mapped[str] = mapped_column(String(100), nullable=True)
     amount: Mapped[float] = mapped_column(Double, nullable=False)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now(),onupdate=func.now())
-    # deleted_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now(),onupdate=func.now(), index=True)
+    deleted_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
 
     # Relationship
     sale: Mapped["Sale"] = relationship("Sale", back_populates="sale_payments")
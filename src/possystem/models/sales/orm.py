@@ -1,8 +1,10 @@
-from sqlalchemy import String, BigInteger, SmallInteger, Double, TIMESTAMP, ForeignKey, Text
+from sqlalchemy import String, BigInteger, SmallInteger, Double, TIMESTAMP, ForeignKey, Text, Uuid
 from sqlalchemy.sql import func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ...db.session import Base
 from datetime import datetime
+from typing import Optional
+import uuid
 
 class Sale(Base):
     __tablename__ = "sales"
@@ -15,9 +17,11 @@ class Sale(Base):
     discount: Mapped[float] = mapped_column(Double, nullable=True)
     tax: Mapped[float] = mapped_column(Double, nullable=True)  # igv Could rename to 'tax' if you prefer
     description: Mapped[str] = mapped_column(Text, nullable=True)
-    date_sale: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), default=func.now())
+    # Set by terminals on sales rung up offline; uploads are deduplicated on it
+    client_uuid: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid, nullable=True, unique=True)
+    date_sale: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), default=func.now(), index=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now())
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now(), index=True)
     # state_sale: Mapped[int] = mapped_column(SmallInteger, nullable=False)  # 1 = sale, 2 = quotation
     # date_validation: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=True)  # sale date
     # state_payment: Mapped[int] = mapped_column(SmallInteger, nullable=False)  # 1 = pending, 2 = partial, 3 = complete
@@ -26,7 +30,7 @@ class Sale(Base):
     # paid_out: Mapped[float] = mapped_column(Double, nullable=True)  # paid or canceled
     # client_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("clients.id"), nullable=True)
     # type_client: Mapped[int] = mapped_column(SmallInteger, nullable=False)  # 1 = end customer, 2 = company
-    # deleted_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
+    deleted_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
     # state_delivery: Mapped[int] = mapped_column(SmallInteger, nullable=True)  # 1 = pending, 2 = partial, 3 = complete
 
     # Relationships
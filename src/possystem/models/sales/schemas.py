@@ -1,6 +1,9 @@
 from typing import Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from enum import Enum
+from uuid import UUID
+from pydantic import BaseModel, Field, field_validator
+from ...utils.db_time import to_server_time
 
 
 # -----------------------
@@ -190,6 +193,125 @@ class SaleSearchParams(BaseModel):
     date_validation: Optional[datetime] = Field(None, description="Filter by validation date")
 
 
+# -----------------------
+# Checkout (POST /checkout)
+# -----------------------
+class CheckoutLine(BaseModel):
+    product_id: int = Field(..., gt=0, description="ID del producto")
+    quantity: float = Field(..., gt=0, description="Cantidad vendida")
+    price_unit: Optional[float] = Field(None, ge=0, description="Precio unitario; por defecto el precio de venta del producto")
+    discount: float = Field(0.0, ge=0, description="Descuento por unidad")
+    batch_id: Optional[int] = Field(None, gt=0, description="Lote del que sale la mercancía; si se omite se asigna por caducidad (FEFO)")
+    description: Optional[str] = Field(None, description="Nota de la línea")
+
+    model_config = {"extra": "forbid"}
+
+
+class CheckoutPayment(BaseModel):
+    method_payment: str = Field(..., max_length=100, description="Método de pago utilizado")
+    n_transaction: Optional[str] = Field(None, max_length=100, description="Número de transacción")
+    bank: Optional[str] = Field(None, max_length=100, description="Banco emisor/receptor")
+    amount: float = Field(..., gt=0, description="Monto del pago")
+
+    model_config = {"extra": "forbid"}
+
+
+class CheckoutRequest(BaseModel):
+    branch_id: Optional[int] = Field(None, gt=0, description="ID de la sucursal")
+    description: Optional[str] = Field(None, description="Descripción de la venta")
+    lines: list[CheckoutLine] = Field(..., min_length=1, max_length=500)
+    payments: list[CheckoutPayment] = Field(..., min_length=1, max_length=20)
+
+    model_config = {
+        "extra": "forbid",
+        "json_schema_extra": {
+            "example": {
+                "branch_id": 1,
+                "lines": [
+                    {"product_id": 5, "quantity": 2},
+                    {"product_id": 8, "quantity": 1, "discount": 5.0, "batch_id": 12}
+                ],
+                "payments": [
+                    {"method_payment": "efectivo", "amount": 150.0}
+                ]
+            }
+        }
+    }
+
+
+class CheckoutLineResponse(BaseModel):
+    id: int
+    product_id: int
+    quantity: float
+    price_unit: float
+    discount: Optional[float] = None
+    subtotal: Optional[float] = None
+    tax: Optional[float] = None
+    total: Optional[float] = None
+    description: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
+
+class CheckoutPaymentResponse(CheckoutPayment):
+    id: int
+
+    model_config = {"from_attributes": True}
+
+
+class CheckoutResponse(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    branch_id: Optional[int] = None
+    subtotal: float
+    discount: float
+    tax: float
+    total: float
+    description: Optional[str] = None
+    date_sale: Optional[datetime] = None
+    lines: list[CheckoutLineResponse]
+    payments: list[CheckoutPaymentResponse]
+
+
+# -----------------------
+# Offline sales (POST /sync/sales)
+# -----------------------
+class OfflineSaleLine(CheckoutLine):
+    price_unit: float = Field(..., ge=0, description="Precio cobrado en la terminal")
+
+
+class OfflineSale(CheckoutRequest):
+    client_uuid: UUID = Field(..., description="Generado por la terminal; una venta repetida se ignora")
+    date_sale: datetime = Field(..., description="Momento de la venta en la terminal")
+    lines: list[OfflineSaleLine] = Field(..., min_length=1, max_length=500)
+
+    # date_sale is stored without a time zone, in server local time
+    date_sale_to_server_time = field_validator("date_sale")(to_server_time)
+
+
+class OfflineSaleStatus(str, Enum):
+    created = "created"
+    duplicate = "duplicate"
+    rejected = "rejected"
+
+
+class OfflineSaleResult(BaseModel):
+    index: int = Field(..., description="Posición de la venta en el lote")
+    client_uuid: Optional[str] = None
+    status: OfflineSaleStatus
+    sale_id: Optional[int] = Field(None, description="Venta creada, o la ya existente si es duplicada")
+    errors: list[str] = []
+
+
+class OfflineSaleUploadResponse(BaseModel):
+    received: int
+    created: int
+    duplicates: int
+    rejected: int
+    results: list[OfflineSaleResult]
+    seconds: float
+
+
 # -----------------------
 # Forward references
 # -----------------------
@@ -0,0 +1,110 @@
+from sqlalchemy import BigInteger, Date, Double, Integer, SmallInteger, String, TIMESTAMP, event, insert, inspect
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date, datetime
+from typing import Optional
+from ...db.session import Base
+from ..sales.orm import Sale
+
+# Pre-aggregated copies of sales, sale_details and sale_payments, one row per
+# day and dimension values. Maintained by ``services.sales_rollups``: every
+# refresh recomputes the days touched since the watermark, so the rows are
+# never edited anywhere else. Branch, cashier and product ids are plain
+# columns (no foreign keys) so history survives deletes.
+
+
+class SalesDailyByBranch(Base):
+    __tablename__ = "sales_daily_by_branch"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    branch_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    user_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)  # cashier
+    sales: Mapped[int] = mapped_column(Integer, nullable=False)
+    subtotal: Mapped[float] = mapped_column(Double, nullable=False)
+    discount: Mapped[float] = mapped_column(Double, nullable=False)
+    tax: Mapped[float] = mapped_column(Double, nullable=False)
+    total: Mapped[float] = mapped_column(Double, nullable=False)
+
+
+class SalesHourlyByBranch(Base):
+    __tablename__ = "sales_hourly_by_branch"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    hour: Mapped[int] = mapped_column(SmallInteger, nullable=False)  # 0-23, local time of date_sale
+    branch_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    sales: Mapped[int] = mapped_column(Integer, nullable=False)
+    total: Mapped[float] = mapped_column(Double, nullable=False)
+
+
+class SalesDailyByProduct(Base):
+    __tablename__ = "sales_daily_by_product"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    branch_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    product_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    sales: Mapped[int] = mapped_column(Integer, nullable=False)  # tickets with the product
+    quantity: Mapped[float] = mapped_column(Double, nullable=False)
+    discount: Mapped[float] = mapped_column(Double, nullable=False)  # discount per unit * quantity
+    tax: Mapped[float] = mapped_column(Double, nullable=False)
+    total: Mapped[float] = mapped_column(Double, nullable=False)  # sum of sale_details.total (before tax)
+
+
+class PaymentsDailyByMethod(Base):
+    __tablename__ = "payments_daily_by_method"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    branch_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    method_payment: Mapped[str] = mapped_column(String(100), nullable=False)
+    payments: Mapped[int] = mapped_column(Integer, nullable=False)
+    amount: Mapped[float] = mapped_column(Double, nullable=False)
+
+
+class RollupWatermark(Base):
+    """Highest fact-table ``updated_at`` already folded into the rollups."""
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    watermark: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
+    refreshed_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
+
+
+class RollupStaleDay(Base):
+    """
+    A day a sale moved away from (its ``date_sale`` was changed) or was
+    deleted from. The watermark only finds the day a sale is on now, so
+    the refresh also recomputes these and then clears them.
+    """
+    __tablename__ = "rollup_stale_days"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+
+
+def _mark_stale(connection, moment):
+    if isinstance(moment, datetime):  # not NO_VALUE (never loaded) or None
+        connection.execute(insert(RollupStaleDay.__table__).values(day=moment.date()))
+
+
+@event.listens_for(Sale, "after_update")
+def _sale_moved(mapper, connection, target):
+    for previous in inspect(target).attrs.date_sale.history.deleted:
+        _mark_stale(connection, previous)
+
+
+@event.listens_for(Sale, "before_update")
+def _sale_soft_deleted(mapper, connection, target):
+    # Soft delete or restore: the sale leaves or rejoins its day. Checked before
+    # the UPDATE because a SQL value such as func.now() has no history after it.
+    state = inspect(target)
+    if state.attrs.deleted_at.history.has_changes():
+        _mark_stale(connection, state.attrs.date_sale.loaded_value)
+
+
+@event.listens_for(Sale, "after_delete")
+def _sale_deleted(mapper, connection, target):
+    # Only ORM deletes (session.delete) are seen, like the sync tombstones.
+    _mark_stale(connection, inspect(target).attrs.date_sale.loaded_value)
+
@@ -0,0 +1,58 @@
+from datetime import date, datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+# =========================================================
+# 🔵 Report rows (dimensions not grouped by come back as null)
+# =========================================================
+class SalesReportRow(BaseModel):
+    day: Optional[date] = None
+    branch_id: Optional[int] = None
+    user_id: Optional[int] = None
+    sales: int
+    subtotal: float
+    discount: float
+    tax: float
+    total: float
+
+
+class HourlySalesReportRow(BaseModel):
+    day: Optional[date] = None
+    branch_id: Optional[int] = None
+    hour: int
+    sales: int
+    total: float
+
+
+class ProductSalesReportRow(BaseModel):
+    day: Optional[date] = None
+    branch_id: Optional[int] = None
+    product_id: int
+    sales: int
+    quantity: float
+    discount: float
+    tax: float
+    total: float
+
+
+class PaymentsReportRow(BaseModel):
+    day: Optional[date] = None
+    branch_id: Optional[int] = None
+    method_payment: str
+    payments: int
+    amount: float
+
+
+# =========================================================
+# 🔵 Refresh
+# =========================================================
+class RollupStatusResponse(BaseModel):
+    watermark: Optional[datetime] = None
+    refreshed_at: Optional[datetime] = None
+
+
+class RollupRefreshResponse(RollupStatusResponse):
+    rebuilt: bool
+    days_refreshed: int
+    seconds: float
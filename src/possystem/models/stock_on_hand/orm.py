@@ -0,0 +1,26 @@
+from sqlalchemy import BigInteger, Integer, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from ...db.session import Base
+
+
+class StockOnHand(Base):
+    """
+    Units on hand per product: the sum of ``product_batches.quantity``, kept
+    up to date by ``services.stock`` in the same transaction as every batch
+    movement and rebuilt from the batches by ``reconcile_stock``.
+    """
+    __tablename__ = "stock_on_hand"
+
+    # Batches carry no branch, so stock is tracked per product.
+    product_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("products.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False), server_default=func.now(), onupdate=func.now(), index=True
+    )
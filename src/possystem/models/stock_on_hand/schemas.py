@@ -0,0 +1,25 @@
+from pydantic import BaseModel, ConfigDict
+
+
+# =========================================================
+# 🔵 Response
+# =========================================================
+class StockOnHandResponse(BaseModel):
+    product_id: int
+    quantity: int
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "example": {
+                "product_id": 5,
+                "quantity": 120
+            }
+        }
+    )
+
+
+class StockReconcileResponse(BaseModel):
+    products_checked: int
+    products_fixed: int
+    rows_removed: int
@@ -0,0 +1,201 @@
+"""
+Request metrics in Prometheus text format.
+
+``MetricsMiddleware`` records, per route template and method: requests by
+status code, errors (5xx or unhandled exceptions), a latency histogram and
+request/response payload size histograms, plus an in-flight gauge.
+Everything lives in plain dicts of per-worker counters updated from the
+event loop, so the hot path takes no locks. Each worker process exposes its
+own numbers under a ``worker`` (pid) label; aggregate across workers in PromQL.
+"""
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from typing import Optional
+from .sql_stats import SqlStatsStore, route_template
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            running += count
+            yield bound, running
+
+
+class RouteMetrics:
+    __slots__ = ("statuses", "errors", "latency", "request_size", "response_size")
+
+    def __init__(self):
+        self.statuses: dict[int, int] = {}
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.request_size = Histogram(SIZE_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.in_flight: dict[str, int] = {}
+        self.started = time.time()
+
+    def route(self, method: str, route: str) -> RouteMetrics:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        return metrics
+
+    def reset(self):
+        self.routes.clear()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, histogram: Histogram, **labels) -> list[str]:
+    lines = [
+        f"{name}_bucket{_labels(**labels, le='+Inf' if bound == float('inf') else repr(bound))} {count}"
+        for bound, count in histogram.cumulative()
+    ]
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+def render(registry: MetricsRegistry, sql_store: Optional[SqlStatsStore] = None) -> str:
+    """The registry (and SQL totals, if given) in Prometheus text exposition format 0.0.4."""
+    worker = str(os.getpid())
+    routes = sorted(registry.routes.items())
+    out = [
+        "# HELP possystem_process_start_time_seconds Start time of this worker since the Unix epoch.",
+        "# TYPE possystem_process_start_time_seconds gauge",
+        f"possystem_process_start_time_seconds{_labels(worker=worker)} {registry.started}",
+        "# HELP possystem_http_requests_in_flight Requests being served right now.",
+        "# TYPE possystem_http_requests_in_flight gauge",
+    ]
+    out += [
+        f"possystem_http_requests_in_flight{_labels(worker=worker, method=method)} {count}"
+        for method, count in sorted(registry.in_flight.items())
+    ]
+
+    out += ["# HELP possystem_http_requests_total Requests served, by status code.",
+            "# TYPE possystem_http_requests_total counter"]
+    for (method, route), metrics in routes:
+        out += [
+            f"possystem_http_requests_total{_labels(worker=worker, method=method, route=route, status=status)} {count}"
+            for status, count in sorted(metrics.statuses.items())
+        ]
+
+    out += ["# HELP possystem_http_request_errors_total Requests that ended in a 5xx or an unhandled exception.",
+            "# TYPE possystem_http_request_errors_total counter"]
+    out += [
+        f"possystem_http_request_errors_total{_labels(worker=worker, method=method, route=route)} {metrics.errors}"
+        for (method, route), metrics in routes
+    ]
+
+    for name, attribute, help_text in (
+        ("possystem_http_request_duration_seconds", "latency", "Time from request start to the end of the response body."),
+        ("possystem_http_request_size_bytes", "request_size", "Request body size."),
+        ("possystem_http_response_size_bytes", "response_size", "Response body size."),
+    ):
+        out += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (method, route), metrics in routes:
+            out += _histogram_lines(name, getattr(metrics, attribute), worker=worker, method=method, route=route)
+
+    if sql_store is not None:
+        totals = sorted(sql_store.totals().items())
+        for name, field, kind, help_text in (
+            ("possystem_db_queries_total", "queries", "counter", "SQL statements issued by requests."),
+            ("possystem_db_time_seconds_total", "db_time", "counter", "Time spent in SQL statements by requests."),
+            ("possystem_db_rows_total", "rows", "counter", "Rows fetched by requests whose driver reports row counts."),
+            ("possystem_db_repeat_warnings_total", "repeat_warnings", "counter", "Requests that tripped the N+1 warning."),
+        ):
+            out += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for key, entry in totals:
+                method, route = key.split(" ", 1)
+                out.append(f"{name}{_labels(worker=worker, method=method, route=route)} {entry[field]}")
+
+    return "\n".join(out) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; the route template is read from the scope once routing has run."""
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        method = scope["method"]
+        registry.in_flight[method] = registry.in_flight.get(method, 0) + 1
+        started = time.perf_counter()
+        sizes = [0, 0]  # request body, response body
+        status = [500]
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                sizes[0] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                sizes[1] += len(message.get("body", b""))
+            await send(message)
+
+        failed = disconnected = False
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        except asyncio.CancelledError:
+            disconnected = True
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            registry.in_flight[method] -= 1
+            metrics = registry.route(method, route_template(scope))
+            # 499: client went away before the response finished (not a server error)
+            code = 499 if disconnected else 500 if failed else status[0]
+            metrics.statuses[code] = metrics.statuses.get(code, 0) + 1
+            if failed or code >= 500:
+                metrics.errors += 1
+            metrics.latency.observe(time.perf_counter() - started)
+            metrics.request_size.observe(sizes[0])
+            metrics.response_size.observe(sizes[1])
+
+
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,189 @@
+"""
+Per-request SQL accounting.
+
+``instrument_engine`` hooks ``before/after_cursor_execute`` on an engine and
+charges every statement (count, time, rows fetched, statement shape) to the
+request running in the current context. ``SqlStatsMiddleware`` opens that
+context per HTTP request, adds ``X-DB-Queries``/``X-DB-Time``/``X-DB-Rows``
+to the response, folds the numbers into ``sql_stats_store`` per route and
+warns when one statement shape repeats often enough to look like an N+1.
+Rows come from the DB-API ``rowcount``; a request that ran a query whose
+driver can't report it (SQLite, server-side cursors) has no row count.
+"""
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+
+_PLACEHOLDER = re.compile(r"\?|\$\d+|%\(\w+\)s|%s")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def statement_shape(statement: str) -> str:
+    """The statement with its bound values folded, so ``IN (?, ?, ?)`` of any length is one shape."""
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RequestSqlStats:
+    __slots__ = ("queries", "db_time", "rows", "shapes")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows: Optional[int] = 0  # None once a query's rows could not be counted
+        self.shapes: dict[str, int] = {}
+
+    def record(self, statement: str, elapsed: float, rows: Optional[int]):
+        self.queries += 1
+        self.db_time += elapsed
+        self.rows = None if rows is None or self.rows is None else self.rows + rows
+        self.shapes[statement] = self.shapes.get(statement, 0) + 1
+
+    def most_repeated(self) -> tuple[Optional[str], int]:
+        """Most frequent statement shape and how often it ran."""
+        counts: dict[str, int] = {}
+        for statement, count in self.shapes.items():
+            shape = statement_shape(statement)
+            counts[shape] = counts.get(shape, 0) + count
+        if not counts:
+            return None, 0
+        shape = max(counts, key=counts.get)
+        return shape, counts[shape]
+
+
+_current: ContextVar[Optional[RequestSqlStats]] = ContextVar("possystem_sql_stats", default=None)
+
+
+def current_sql_stats() -> Optional[RequestSqlStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._sql_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_sql_stats_started", None)
+    if stats is None or started is None:
+        return
+    # DB-API rowcount: the rows a SELECT returned on PostgreSQL (psycopg2 and
+    # asyncpg alike); -1 where the driver can't tell.
+    rows = 0
+    if cursor.description:
+        rows = cursor.rowcount if cursor.rowcount >= 0 else None
+    stats.record(statement, time.perf_counter() - started, rows)
+
+
+def instrument_engine(sync_engine: Engine):
+    """Charge this engine's statements to the current request (pass ``async_engine.sync_engine`` for async engines)."""
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SqlStatsStore:
+    """Running SQL totals per ``METHOD route-template``."""
+
+    def __init__(self):
+        self._routes: dict[str, dict] = {}
+
+    def record(self, key: str, stats: RequestSqlStats, repeated: bool):
+        entry = self._routes.get(key)
+        if entry is None:
+            entry = self._routes[key] = {
+                "requests": 0, "queries": 0, "db_time": 0.0, "rows": 0, "rows_requests": 0,
+                "max_queries": 0, "repeat_warnings": 0,
+            }
+        entry["requests"] += 1
+        entry["queries"] += stats.queries
+        entry["db_time"] += stats.db_time
+        if stats.rows is not None:
+            entry["rows"] += stats.rows
+            entry["rows_requests"] += 1
+        entry["max_queries"] = max(entry["max_queries"], stats.queries)
+        entry["repeat_warnings"] += repeated
+
+    def totals(self) -> dict[str, dict]:
+        """Raw running totals per route key (for the /metrics exposition)."""
+        return self._routes
+
+    def snapshot(self) -> dict:
+        """Per-route averages, heaviest total DB time first."""
+        ordered = sorted(self._routes.items(), key=lambda item: item[1]["db_time"], reverse=True)
+        return {
+            key: {
+                "requests": entry["requests"],
+                "queries_avg": round(entry["queries"] / entry["requests"], 2),
+                "queries_max": entry["max_queries"],
+                "db_time_ms_avg": round(entry["db_time"] / entry["requests"] * 1000, 3),
+                "db_time_ms_total": round(entry["db_time"] * 1000, 1),
+                "rows_avg": round(entry["rows"] / entry["rows_requests"], 1) if entry["rows_requests"] else None,
+                "repeat_warnings": entry["repeat_warnings"],
+            }
+            for key, entry in ordered
+        }
+
+    def reset(self):
+        self._routes.clear()
+
+
+def route_template(scope) -> str:
+    # FastAPI stores the matched route in the scope; its template keeps label values bounded.
+    return getattr(scope.get("route"), "path", "<unmatched>")
+
+
+def route_key(scope) -> str:
+    return f"{scope['method']} {route_template(scope)}"
+
+
+class SqlStatsMiddleware:
+    """Pure ASGI middleware, so the endpoint runs in the context holding the request's stats."""
+
+    def __init__(self, app, store: SqlStatsStore, repeat_warning: int = 0):
+        self.app = app
+        self.store = store
+        self.repeat_warning = repeat_warning
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSqlStats()
+        token = _current.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.queries)
+                headers["X-DB-Time"] = f"{stats.db_time * 1000:.2f}"
+                if stats.rows is not None:
+                    headers["X-DB-Rows"] = str(stats.rows)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            key = route_key(scope)
+            repeated = False
+            if self.repeat_warning and stats.queries > self.repeat_warning:
+                shape, count = stats.most_repeated()
+                if count > self.repeat_warning:
+                    repeated = True
+                    print(f"⚠️ Possible N+1 in {key}: statement ran {count} times in one request: {shape[:200]}")
+            self.store.record(key, stats, repeated)
+
+
+sql_stats_store = SqlStatsStore()
@@ -1,3 +1,4 @@
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from possystem.models.permissions.orm import Permission
 from possystem.db.session import SessionLocal
@@ -77,18 +78,17 @@ PERMISSIONS = [
 
 
 def seed_permissions(db: Session):
-    """Agrega permisos base a la base de datos, sin duplicar los existentes."""
-    created_count = 0
-
-    for perm_name in PERMISSIONS:
-        exists = db.query(Permission).filter_by(name=perm_name).first()
-        if not exists:
-            permission = Permission(name=perm_name)
-            db.add(permission)
-            created_count += 1
+    """Agrega permisos base a la base de datos, sin duplicar los existentes (un solo INSERT ... ON CONFLICT DO NOTHING)."""
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    created = db.execute(
+        dialect.insert(Permission)
+        .values([{"name": name} for name in PERMISSIONS])
+        .on_conflict_do_nothing(index_elements=[Permission.name])
+        .returning(Permission.id)
+    ).all()
 
     db.commit()
-    print(f"✅ Seeding completado: {created_count} nuevos permisos creados.")
+    print(f"✅ Seeding completado: {len(created)} nuevos permisos creados.")
 
 
 if __name__ == "__main__":
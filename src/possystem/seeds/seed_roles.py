@@ -1,6 +1,10 @@
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from possystem.models.roles.orm import Role
 from possystem.models.permissions.orm import Permission
+from possystem.models.role_has_permissions.orm import role_has_permissions
+from possystem.models.permission_versions.orm import bump_permission_version
 from possystem.db.session import SessionLocal
 
 
@@ -42,44 +46,52 @@ def seed_roles(db: Session):
         # ],
     }
 
-    created_count = 0
-    updated_count = 0
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
 
-    # --- Recuperamos todos los permisos existentes ---
-    all_permissions = db.query(Permission).all()
-    perm_map = {p.name: p for p in all_permissions}
+    # --- Recuperamos todos los permisos existentes (id por nombre) ---
+    perm_map = dict(db.execute(select(Permission.name, Permission.id)).all())
 
     # --- Helper para hacer matching tipo wildcard ("*") ---
-    def match_permissions(patterns: list[str]):
+    def match_permissions(patterns: list[str]) -> set[int]:
         matched = set()
         for pattern in patterns:
             if pattern == "*":
-                matched.update(all_permissions)
+                matched.update(perm_map.values())
             elif pattern.endswith(".*"):
                 prefix = pattern[:-2]
-                matched.update([p for name, p in perm_map.items() if name.startswith(prefix)])
+                matched.update([perm_id for name, perm_id in perm_map.items() if name.startswith(prefix)])
             else:
                 if pattern in perm_map:
                     matched.add(perm_map[pattern])
-        return list(matched)
+        return matched
 
-    # --- Crear o actualizar roles ---
-    for role_name, perm_patterns in role_permissions.items():
-        role = db.query(Role).filter_by(name=role_name).first()
-        perms = match_permissions(perm_patterns)
+    # --- Crear los roles que falten, en un solo INSERT ---
+    created = db.execute(
+        dialect.insert(Role)
+        .values([{"name": role_name} for role_name in role_permissions])
+        .on_conflict_do_nothing(index_elements=[Role.name])
+        .returning(Role.id)
+    ).all()
+    role_ids = dict(db.execute(select(Role.name, Role.id).where(Role.name.in_(role_permissions))).all())
 
-        if not role:
-            role = Role(name=role_name)
-            role.permissions = perms
-            db.add(role)
-            created_count += 1
-        else:
-            role.permissions = perms
-            updated_count += 1
+    # --- Dejar a cada rol exactamente con sus permisos: agregar los que falten y quitar los sobrantes ---
+    links = []
+    for role_name, perm_patterns in role_permissions.items():
+        perm_ids = match_permissions(perm_patterns)
+        links.extend({"role_id": role_ids[role_name], "permission_id": perm_id} for perm_id in perm_ids)
+        db.execute(
+            delete(role_has_permissions)
+            .where(role_has_permissions.c.role_id == role_ids[role_name])
+            .where(role_has_permissions.c.permission_id.not_in(perm_ids))
+        )
+    if links:
+        db.execute(dialect.insert(role_has_permissions).values(links).on_conflict_do_nothing())
+    # Core inserts skip the ORM hooks; make issued tokens re-check their permissions.
+    bump_permission_version(db.connection())
 
     db.commit()
 
-    print(f"✅ Seeding completado: {created_count} roles creados, {updated_count} actualizados.")
+    print(f"✅ Seeding completado: {len(created)} roles creados, {len(role_ids) - len(created)} actualizados.")
 
 
 if __name__ == "__main__":
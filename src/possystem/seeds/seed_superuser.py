@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from possystem.models.users.orm import User
 from possystem.models.roles.orm import Role
@@ -21,35 +23,29 @@ def seed_superuser(db: Session):
     SUPERUSER_NAME = "Adm"
     SUPERUSER_SURNAME = "Principal"
 
-    # Buscar rol admin
-    admin_role = db.query(Role).filter_by(name="admin").first()
-    if not admin_role:
-        raise ValueError("❌ No se encontró el rol 'admin'. Ejecuta primero seed_roles.py")
-
-    # Verificar si ya existe un superuser
-    existing_user = db.query(User).filter_by(email=SUPERUSER_EMAIL).first()
-
-    if existing_user:
+    # Verificar si ya existe un superuser (antes de hashear: bcrypt es lo más caro del seeding)
+    if db.scalar(select(User.id).where(User.email == SUPERUSER_EMAIL)) is not None:
         print(f"ℹ️ El usuario superadmin ya existe: {SUPERUSER_EMAIL}")
         return
 
-    # Crear usuario
-    superuser = User(
-        name=SUPERUSER_NAME,
-        surname=SUPERUSER_SURNAME,
-        email=SUPERUSER_EMAIL,
-        password=get_password_hash(SUPERUSER_PASSWORD),
-        role_id=admin_role.id,
-        email_verified_at=None,
-        gender=None,
-        avatar=None,
-        phone=None,
-        type_document=None,
-        n_document=None,
-        branch_id=None,
-    )
+    # Buscar rol admin
+    admin_role_id = db.scalar(select(Role.id).where(Role.name == "admin"))
+    if admin_role_id is None:
+        raise ValueError("❌ No se encontró el rol 'admin'. Ejecuta primero seed_roles.py")
 
-    db.add(superuser)
+    # Crear usuario; ON CONFLICT cubre a otro proceso que lo haya creado mientras tanto
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    db.execute(
+        dialect.insert(User)
+        .values(
+            name=SUPERUSER_NAME,
+            surname=SUPERUSER_SURNAME,
+            email=SUPERUSER_EMAIL,
+            password=get_password_hash(SUPERUSER_PASSWORD),
+            role_id=admin_role_id,
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+    )
     db.commit()
 
     print(f"✅ Superusuario creado correctamente: {SUPERUSER_EMAIL}")
@@ -0,0 +1,190 @@
+from collections import defaultdict
+from datetime import date
+from typing import Hashable, Iterable, Optional
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from ..models.product_batch.orm import ProductBatch
+from ..models.sale_batch_usage.orm import SaleBatchUsage
+from .stock import adjust_stock
+
+
+_batches = ProductBatch.__table__
+
+# One executemany for every batch touched; the guard only matters on
+# dialects without row locks (the rows are already locked on PostgreSQL).
+_DECREMENT = (
+    update(_batches)
+    .where(_batches.c.id == bindparam("b_id"), _batches.c.quantity >= bindparam("units"))
+    .values(quantity=_batches.c.quantity - bindparam("units"))
+)
+_INCREMENT = (
+    update(_batches)
+    .where(_batches.c.id == bindparam("b_id"))
+    .values(quantity=_batches.c.quantity + bindparam("units"))
+)
+
+
+async def _lock_next(
+    db: AsyncSession,
+    product_id: int,
+    today: date,
+    after: Optional[tuple],
+    exclude: set[int],
+    skip_locked: bool,
+):
+    """
+    The next batch in FEFO order after ``after``, locked. One row per round
+    trip: locking a page ahead would make concurrent checkouts skip batches
+    this one never consumes and take later-expiring stock instead.
+    """
+    query = (
+        select(ProductBatch.id, ProductBatch.expiration_date, ProductBatch.quantity)
+        .where(
+            ProductBatch.product_id == product_id,
+            ProductBatch.quantity > 0,
+            ProductBatch.expiration_date >= today,
+        )
+        .order_by(ProductBatch.expiration_date, ProductBatch.id)
+        .limit(1)
+    )
+    if after is not None:
+        query = query.where(tuple_(ProductBatch.expiration_date, ProductBatch.id) > after)
+    if exclude:
+        query = query.where(ProductBatch.id.not_in(exclude))
+    if db.bind.dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=skip_locked)
+    return (await db.execute(query)).first()
+
+
+async def _take_from_product(db: AsyncSession, product_id: int, units: int, today: date) -> list[tuple[int, int]]:
+    """
+    ``(batch_id, units)`` taken from ``product_id``, earliest expiration first.
+
+    The first pass skips rows another checkout holds, so concurrent sales of
+    the same SKU spread over different batches instead of queueing on the
+    oldest one. Only if that leaves the line short does a second pass wait
+    for the skipped rows, which may still have stock once those transactions finish.
+    """
+    taken: list[tuple[int, int]] = []
+    seen: set[int] = set()
+    passes = (True, False) if db.bind.dialect.name == "postgresql" else (True,)
+    for skip_locked in passes:
+        after = None
+        while units > 0:
+            row = await _lock_next(db, product_id, today, after, set() if skip_locked else seen, skip_locked)
+            if row is None:
+                break
+            seen.add(row.id)
+            used = min(units, row.quantity)
+            taken.append((row.id, used))
+            units -= used
+            after = (row.expiration_date, row.id)
+        if not units:
+            break
+    return taken
+
+
+async def take_fefo(
+    db: AsyncSession,
+    demands: dict[Hashable, tuple[int, int]],
+    allow_short: Iterable[int] = (),
+    today: Optional[date] = None,
+) -> dict[Hashable, list[tuple[int, int]]]:
+    """
+    Takes stock for ``demands`` (``key -> (product_id, units)``) first-expired-first-out.
+
+    Locks only the batches it consumes, decrements them with one statement
+    and returns ``key -> [(batch_id, units), ...]``. Expired batches are
+    never used. Products in ``allow_short`` may be sold past their stock;
+    the uncovered units are left without a batch. Any other shortfall
+    raises 409. The caller owns the transaction and records the units
+    taken with ``services.stock.adjust_stock`` (one call per transaction,
+    so stock rows are always locked in product order).
+    """
+    today = today or date.today()
+    allow_short = set(allow_short)
+
+    needed: dict[int, int] = defaultdict(int)
+    for product_id, units in demands.values():
+        needed[product_id] += units
+
+    # Fixed product order so two multi-product tickets can't deadlock
+    available: dict[int, list[list[int]]] = {}
+    for product_id in sorted(needed):
+        taken = await _take_from_product(db, product_id, needed[product_id], today)
+        short = needed[product_id] - sum(units for _, units in taken)
+        if short and product_id not in allow_short:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Not enough stock for product {product_id}: {short} unit(s) short"
+            )
+        available[product_id] = [[batch_id, units] for batch_id, units in taken]
+
+    decrements = [
+        {"b_id": batch_id, "units": units}
+        for batches in available.values()
+        for batch_id, units in batches
+    ]
+    if decrements:
+        result = await db.execute(_DECREMENT, decrements)
+        if db.bind.dialect.supports_sane_multi_rowcount and result.rowcount != len(decrements):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Stock changed concurrently, please retry")
+
+    # Hand the taken units out to the demands in order
+    allocations: dict[Hashable, list[tuple[int, int]]] = {}
+    for key, (product_id, units) in demands.items():
+        allocations[key] = []
+        batches = available[product_id]
+        while units and batches:
+            batch_id, left = batches[0]
+            used = min(units, left)
+            allocations[key].append((batch_id, used))
+            units -= used
+            if used == left:
+                batches.pop(0)
+            else:
+                batches[0][1] = left - used
+    return allocations
+
+
+async def write_usages(db: AsyncSession, usages: list[dict]):
+    """Bulk insert of ``sale_batch_usages`` rows (``sale_detail_id``, ``batch_id``, ``quantity_used``)."""
+    if usages:
+        await db.execute(insert(SaleBatchUsage), usages)
+
+
+async def allocate_sale_detail(db: AsyncSession, sale_detail_id: int, product_id: int, units: int) -> list[SaleBatchUsage]:
+    """FEFO-allocate ``units`` of an existing sale line and return the usages written for it."""
+    allocation = await take_fefo(db, {sale_detail_id: (product_id, units)})
+    await adjust_stock(db, {product_id: -sum(used for _, used in allocation[sale_detail_id])})
+    usages = [
+        {"sale_detail_id": sale_detail_id, "batch_id": batch_id, "quantity_used": used}
+        for batch_id, used in allocation[sale_detail_id]
+    ]
+    return (await db.scalars(
+        insert(SaleBatchUsage).returning(SaleBatchUsage, sort_by_parameter_order=True), usages
+    )).all()
+
+
+async def release_sale_detail(db: AsyncSession, sale_detail_id: int, product_id: int) -> int:
+    """
+    Undoes the allocations of a sale line: deletes its batch usages and puts
+    the units back in their batches and in the stock on hand. Returns the
+    units released.
+    """
+    usages = (await db.execute(
+        delete(SaleBatchUsage)
+        .where(SaleBatchUsage.sale_detail_id == sale_detail_id)
+        .returning(SaleBatchUsage.batch_id, SaleBatchUsage.quantity_used)
+    )).all()
+    returned: dict[int, int] = defaultdict(int)
+    for usage in usages:
+        returned[usage.batch_id] += usage.quantity_used
+    if returned:
+        # Batch id order, like the explicit batches at checkout
+        await db.execute(_INCREMENT, [{"b_id": batch_id, "units": units} for batch_id, units in sorted(returned.items())])
+    released = sum(returned.values())
+    await adjust_stock(db, {product_id: released})
+    return released
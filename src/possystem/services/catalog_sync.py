@@ -0,0 +1,207 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import TIMESTAMP, and_, cast, delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from ..config import settings
+from ..models.products.orm import Product
+from ..models.product_categories.orm import ProductCategory
+from ..models.product_brand.orm import ProductBrand
+from ..models.product_master.orm import ProductMaster
+from ..models.ingredients.orm import Ingredient
+from ..models.product_barcodes.orm import ProductBarcode
+from ..models.product_has_ingredients.orm import product_has_ingredients
+from ..models.catalog_sync.orm import CATALOG_ENTITIES, SyncTombstone
+from ..utils.pagination import decode_cursor, encode_cursor
+
+
+# Rows stamped within this window of "now" may still be joined by rows from
+# transactions that started earlier, so the token stops short of them.
+SETTLE_WINDOW = timedelta(seconds=5)
+TOMBSTONE_PRUNE_SECONDS = 3600.0
+
+SYNC_COLUMNS = {
+    ProductCategory: (ProductCategory.id, ProductCategory.name, ProductCategory.image, ProductCategory.is_active),
+    ProductBrand: (ProductBrand.id, ProductBrand.name, ProductBrand.logo),
+    ProductMaster: (ProductMaster.id, ProductMaster.name, ProductMaster.description, ProductMaster.product_category_id),
+    Ingredient: (Ingredient.id, Ingredient.name, Ingredient.description),
+    Product: (
+        Product.id, Product.title, Product.image, Product.sku, Product.brand_id, Product.product_master_id,
+        Product.price_retail, Product.is_active, Product.allow_without_stock, Product.is_discount,
+        Product.max_discount, Product.is_taxable, Product.tax_percentage, Product.unit_name,
+        Product.base_unit_name, Product.units_per_base,
+    ),
+    ProductBarcode: (ProductBarcode.id, ProductBarcode.product_id, ProductBarcode.code),
+}
+
+
+def _db_now(db: AsyncSession):
+    # now() is timestamptz on PostgreSQL; the catalog's updated_at columns are naive local time.
+    return cast(func.now(), TIMESTAMP(timezone=False)) if db.bind.dialect.name == "postgresql" else func.now()
+
+
+def _stamp(db: AsyncSession, column):
+    # SQLite keeps timestamps as text, with or without microseconds depending on
+    # who wrote them; compare and order them normalised so equal stamps match.
+    if db.bind.dialect.name == "sqlite":
+        return func.datetime(column, type_=column.type)
+    return column
+
+
+def _updated_at(db: AsyncSession, model):
+    return _stamp(db, model.updated_at)
+
+
+def _read_token(since: str) -> dict:
+    state = decode_cursor(since)
+    try:
+        return {
+            "t": datetime.fromisoformat(state["t"]),
+            "d": int(state["d"]),
+            "c": {
+                entity: (datetime.fromisoformat(stamp), int(last_id))
+                for entity, (stamp, last_id) in state["c"].items()
+                if entity in CATALOG_ENTITIES.values()
+            },
+        }
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+
+
+def _write_token(issued: datetime, cursors: dict, tombstone_id: int) -> str:
+    return encode_cursor({
+        "t": issued.isoformat(),
+        "d": tombstone_id,
+        "c": {entity: [stamp.isoformat(), last_id] for entity, (stamp, last_id) in cursors.items()},
+    })
+
+
+async def _changed(db: AsyncSession, model, cursor: Optional[tuple[datetime, int]], limit: int) -> tuple[list[dict], bool]:
+    """Up to ``limit`` rows of ``model`` after ``cursor`` in (updated_at, id) order, and whether more follow."""
+    updated_at = _updated_at(db, model)
+    query = select(*SYNC_COLUMNS[model], updated_at.label("updated_at")).order_by(updated_at, model.id).limit(limit + 1)
+    if cursor is not None:
+        stamp, last_id = cursor
+        if db.bind.dialect.name == "sqlite":
+            stamp = func.datetime(stamp)
+        query = query.where(or_(updated_at > stamp, and_(updated_at == stamp, model.id > last_id)))
+    rows = [dict(row._mapping) for row in (await db.execute(query)).all()]
+    return rows[:limit], len(rows) > limit
+
+
+async def _attach_ingredients(db: AsyncSession, products: list[dict]):
+    if not products:
+        return
+    ingredient_ids = defaultdict(list)
+    links = await db.execute(
+        select(product_has_ingredients.c.product_id, product_has_ingredients.c.ingredient_id)
+        .where(product_has_ingredients.c.product_id.in_([product["id"] for product in products]))
+        .order_by(product_has_ingredients.c.product_id, product_has_ingredients.c.ingredient_id)
+    )
+    for product_id, ingredient_id in links.all():
+        ingredient_ids[product_id].append(ingredient_id)
+    for product in products:
+        product["ingredient_ids"] = ingredient_ids[product["id"]]
+
+
+def _next_cursor(rows: list[dict], more: bool, cursor, settled: datetime):
+    if not rows:
+        return cursor
+    last = rows[-1]
+    if more or last["updated_at"] <= settled:
+        return last["updated_at"], last["id"]
+    # Caught up on rows that may not be final yet: ask for them again next time.
+    return settled, 0
+
+
+async def catalog_changes(db: AsyncSession, since: Optional[str], limit: int) -> dict:
+    """
+    Catalog rows created, changed or deleted since the ``since`` token.
+
+    Each section is read in ``(updated_at, id)`` order, up to ``limit`` rows,
+    from where the token left it; deletes come from ``sync_tombstones``. With
+    no token the whole catalog is sent, page by page, and no deletes. Tokens
+    older than ``sync_tombstone_days`` get 410: the tombstones they need may be gone.
+    """
+    now = await db.scalar(select(_db_now(db)))
+    settled = now - SETTLE_WINDOW
+    if since is None:
+        cursors = {}
+        tombstone_id = await _settled_tombstone_id(db, settled)
+    else:
+        state = _read_token(since)
+        if state["t"] < now - timedelta(days=settings.sync_tombstone_days):
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail="Sync token expired; sync again without a token")
+        cursors, tombstone_id = state["c"], state["d"]
+
+    has_more = False
+    changes, deleted = {}, {}
+    for model, entity in CATALOG_ENTITIES.items():
+        rows, more = await _changed(db, model, cursors.get(entity), limit)
+        if model is Product:
+            await _attach_ingredients(db, rows)
+        changes[entity] = rows
+        has_more |= more
+        cursor = _next_cursor(rows, more, cursors.get(entity), settled)
+        if cursor is not None:
+            cursors[entity] = cursor
+
+    if since is not None:
+        tombstones = (await db.execute(
+            select(SyncTombstone.id, SyncTombstone.entity, SyncTombstone.entity_id, SyncTombstone.deleted_at)
+            .where(SyncTombstone.id > tombstone_id)
+            .order_by(SyncTombstone.id)
+            .limit(limit + 1)
+        )).all()
+        has_more |= len(tombstones) > limit
+        # Ids are handed out before commit, so a lower one can still appear: recent
+        # tombstones are sent but the token stays before the first of them, and
+        # they come again next time (dropping a row twice is harmless).
+        settling = False
+        for tombstone in tombstones[:limit]:
+            deleted.setdefault(tombstone.entity, []).append(tombstone.entity_id)
+            settling |= tombstone.deleted_at > settled
+            if not settling:
+                tombstone_id = tombstone.id
+
+    return {
+        "token": _write_token(now, cursors, tombstone_id),
+        "has_more": has_more,
+        "full": since is None,
+        "changes": changes,
+        "deleted": deleted,
+    }
+
+
+async def _settled_tombstone_id(db: AsyncSession, settled: datetime) -> int:
+    """Highest tombstone id with no possibly uncommitted one below it: where a full sync starts the delete feed."""
+    deleted_at = _stamp(db, SyncTombstone.deleted_at)
+    bound = func.datetime(settled) if db.bind.dialect.name == "sqlite" else settled
+    first_recent = await db.scalar(select(func.min(SyncTombstone.id)).where(deleted_at > bound))
+    if first_recent is not None:
+        return first_recent - 1
+    return await db.scalar(select(func.coalesce(func.max(SyncTombstone.id), 0)))
+
+
+async def prune_tombstones(db: AsyncSession) -> int:
+    """Drops tombstones older than the token lifetime; clients that old resync from scratch."""
+    cutoff = await db.scalar(select(_db_now(db))) - timedelta(days=settings.sync_tombstone_days)
+    removed = (await db.execute(delete(SyncTombstone).where(SyncTombstone.deleted_at < cutoff))).rowcount
+    await db.commit()
+    return removed
+
+
+async def run_tombstone_pruner(session_factory, interval: float = TOMBSTONE_PRUNE_SECONDS):
+    """Background pruning; start it from the app lifespan and cancel it on shutdown."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as db:
+                await prune_tombstones(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            print(f"⚠️ Sync tombstone pruning failed: {error!r}")
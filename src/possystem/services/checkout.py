@@ -0,0 +1,242 @@
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from ..models.branches.orm import Branch
+from ..models.products.orm import Product
+from ..models.product_batch.orm import ProductBatch
+from ..models.sales.orm import Sale
+from ..models.sale_details.orm import SaleDetail
+from ..models.sale_payments.orm import SalePayment
+from ..models.sales.schemas import CheckoutRequest
+from .batch_allocation import take_fefo, write_usages
+from .stock import adjust_stock
+
+
+# Tolerance when comparing the payments against the computed total
+PAYMENT_TOLERANCE = 0.01
+
+
+def _money(value: float) -> float:
+    return round(value, 2)
+
+
+async def _load_products(db: AsyncSession, request: CheckoutRequest, replay: bool) -> dict:
+    product_ids = {line.product_id for line in request.lines}
+    rows = (await db.execute(
+        select(
+            Product.id,
+            Product.price_retail,
+            Product.is_active,
+            Product.is_discount,
+            Product.max_discount,
+            Product.is_taxable,
+            Product.tax_percentage,
+            Product.allow_without_stock,
+        ).where(Product.id.in_(product_ids))
+    )).all()
+    products = {row.id: row for row in rows}
+
+    missing = product_ids - products.keys()
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Products not found: {sorted(missing)}")
+    inactive = sorted(row.id for row in rows if not row.is_active)
+    if inactive and not replay:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Products are inactive: {inactive}")
+    return products
+
+
+async def _check_batches(db: AsyncSession, request: CheckoutRequest) -> dict[int, int]:
+    """Units to take from each batch, after checking the batch belongs to the line's product."""
+    taken: dict[int, int] = defaultdict(int)
+    for line in request.lines:
+        if line.batch_id is None:
+            continue
+        if line.quantity != int(line.quantity):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Batch {line.batch_id}: quantity must be a whole number")
+        taken[line.batch_id] += int(line.quantity)
+    if not taken:
+        return {}
+
+    batches = {
+        row.id: row
+        for row in (await db.execute(
+            select(ProductBatch.id, ProductBatch.product_id).where(ProductBatch.id.in_(taken.keys()))
+        )).all()
+    }
+    missing = taken.keys() - batches.keys()
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Batches not found: {sorted(missing)}")
+    for line in request.lines:
+        if line.batch_id is not None and batches[line.batch_id].product_id != line.product_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Batch {line.batch_id} does not belong to product {line.product_id}"
+            )
+    return taken
+
+
+def _fefo_demands(request: CheckoutRequest, oversell: set[int]) -> dict[int, tuple[int, int]]:
+    """``line index -> (product_id, units)`` for lines without an explicit batch."""
+    demands = {}
+    for index, line in enumerate(request.lines):
+        if line.batch_id is not None:
+            continue
+        if line.quantity != int(line.quantity):
+            # Batches count whole units; fractional sales need allow_without_stock
+            if line.product_id not in oversell:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Product {line.product_id}: quantity must be a whole number"
+                )
+            continue
+        demands[index] = (line.product_id, int(line.quantity))
+    return demands
+
+
+async def checkout(
+    db: AsyncSession,
+    user_id: int,
+    request: CheckoutRequest,
+    date_sale: Optional[datetime] = None,
+    client_uuid: Optional[uuid.UUID] = None,
+    replay: bool = False,
+) -> dict:
+    """
+    Records a whole ticket (sale, lines, payments, batch usages) in one transaction.
+
+    Lines with a ``batch_id`` take stock from that batch; the rest are
+    allocated first-expired-first-out by ``services.batch_allocation``.
+    Reference data is validated with one ``IN (...)`` query per table, and
+    every child table is written with a single multi-row ``INSERT ... RETURNING``.
+    Nothing is written if any validation fails. The caller commits.
+
+    ``replay`` is for tickets already rung up offline: products deactivated
+    since, and stock the server doesn't have, no longer reject them.
+    """
+    products = await _load_products(db, request, replay)
+    oversell = set(products) if replay else {product.id for product in products.values() if product.allow_without_stock}
+
+    if request.branch_id is not None:
+        if not await db.scalar(select(Branch.id).where(Branch.id == request.branch_id)):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Branch not found")
+
+    batch_quantities = await _check_batches(db, request)
+    fefo_demands = _fefo_demands(request, oversell)
+
+    # --- Price every line ---
+    detail_rows = []
+    sale_subtotal = sale_discount = sale_tax = 0.0
+    for line in request.lines:
+        product = products[line.product_id]
+        price_unit = line.price_unit if line.price_unit is not None else product.price_retail
+
+        if line.discount:
+            if not product.is_discount:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Product {product.id} does not allow discounts")
+            if product.max_discount is not None and line.discount > price_unit * product.max_discount / 100 + PAYMENT_TOLERANCE:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Discount exceeds the maximum allowed for product {product.id}")
+            if line.discount > price_unit:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Discount exceeds the price of product {product.id}")
+
+        subtotal = _money(price_unit - line.discount)
+        total = _money(subtotal * line.quantity)
+        tax = _money(total * product.tax_percentage / 100) if product.is_taxable and product.tax_percentage else 0.0
+
+        sale_subtotal += total
+        sale_discount += line.discount * line.quantity
+        sale_tax += tax
+        detail_rows.append({
+            "product_id": product.id,
+            "quantity": line.quantity,
+            "price_unit": price_unit,
+            "discount": line.discount,
+            "subtotal": subtotal,
+            "tax": tax,
+            "total": total,
+            "description": line.description,
+        })
+
+    sale_total = _money(sale_subtotal + sale_tax)
+    paid = _money(sum(payment.amount for payment in request.payments))
+    if abs(paid - sale_total) > PAYMENT_TOLERANCE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Payments ({paid}) do not match the sale total ({sale_total})"
+        )
+
+    # --- Take stock: explicit batches, then FEFO ---
+    # The WHERE guard keeps a batch from being oversold or sold past its
+    # expiration (FEFO skips those too); batch id order keeps two tickets
+    # naming the same batches from locking them in opposite orders.
+    today = date.today()
+    for batch_id, units in sorted(batch_quantities.items()):
+        taken = await db.scalar(
+            update(ProductBatch)
+            .where(
+                ProductBatch.id == batch_id,
+                ProductBatch.quantity >= units,
+                ProductBatch.expiration_date >= today,
+            )
+            .values(quantity=ProductBatch.quantity - units)
+            .returning(ProductBatch.id)
+        )
+        if taken is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Batch {batch_id} is expired or does not have enough stock")
+    allocations = await take_fefo(db, fefo_demands, allow_short=oversell, today=today)
+    stock_deltas: dict[int, int] = defaultdict(int)
+    for index, line in enumerate(request.lines):
+        units = int(line.quantity) if line.batch_id is not None else sum(used for _, used in allocations.get(index, ()))
+        stock_deltas[line.product_id] -= units
+    await adjust_stock(db, stock_deltas)
+
+    # --- Write the ticket ---
+    sale_row = {
+        "user_id": user_id,
+        "branch_id": request.branch_id,
+        "subtotal": _money(sale_subtotal),
+        "discount": _money(sale_discount),
+        "tax": _money(sale_tax),
+        "total": sale_total,
+        "description": request.description,
+    }
+    if date_sale is not None:
+        sale_row["date_sale"] = date_sale
+    if client_uuid is not None:
+        sale_row["client_uuid"] = client_uuid
+    sale = await db.scalar(insert(Sale).returning(Sale), [sale_row])
+    for row in detail_rows:
+        row["sale_id"] = sale.id
+    details = (await db.scalars(
+        insert(SaleDetail).returning(SaleDetail, sort_by_parameter_order=True), detail_rows
+    )).all()
+    payments = (await db.scalars(
+        insert(SalePayment).returning(SalePayment, sort_by_parameter_order=True),
+        [{"sale_id": sale.id, **payment.model_dump()} for payment in request.payments],
+    )).all()
+
+    usage_rows = []
+    for index, (line, detail) in enumerate(zip(request.lines, details)):
+        if line.batch_id is not None:
+            usage_rows.append({"sale_detail_id": detail.id, "batch_id": line.batch_id, "quantity_used": int(line.quantity)})
+        for batch_id, used in allocations.get(index, ()):
+            usage_rows.append({"sale_detail_id": detail.id, "batch_id": batch_id, "quantity_used": used})
+    await write_usages(db, usage_rows)
+
+    return {
+        "id": sale.id,
+        "user_id": sale.user_id,
+        "branch_id": sale.branch_id,
+        "subtotal": sale.subtotal,
+        "discount": sale.discount,
+        "tax": sale.tax,
+        "total": sale.total,
+        "description": sale.description,
+        "date_sale": sale.date_sale,
+        "lines": details,
+        "payments": payments,
+    }
@@ -0,0 +1,97 @@
+import time
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.sales.orm import Sale
+from ..models.sales.schemas import OfflineSale, OfflineSaleStatus
+from .checkout import checkout
+from .product_import import validation_messages
+
+
+# Sales checked against already-uploaded UUIDs with one query.
+OFFLINE_SALES_CHUNK = 200
+MAX_OFFLINE_SALES = 5000
+
+
+def _result(index: int, client_uuid, status: OfflineSaleStatus, sale_id=None, errors=()) -> dict:
+    return {
+        "index": index,
+        "client_uuid": str(client_uuid) if client_uuid is not None else None,
+        "status": status,
+        "sale_id": sale_id,
+        "errors": list(errors),
+    }
+
+
+async def _known_sales(db: AsyncSession, sales: list[OfflineSale]) -> dict:
+    known = dict((await db.execute(
+        select(Sale.client_uuid, Sale.id).where(Sale.client_uuid.in_({sale.client_uuid for sale in sales}))
+    )).all())
+    await db.rollback()  # end the read; every sale below gets its own transaction
+    return known
+
+
+async def ingest_offline_sales(db: AsyncSession, user_id: int, records: list) -> dict:
+    """
+    Records sales rung up while a terminal was offline, in upload order.
+
+    Each record is validated on its own, so a bad one is reported without
+    holding up the rest. UUIDs already uploaded are looked up
+    ``OFFLINE_SALES_CHUNK`` sales at a time and skipped as duplicates. Every new
+    sale goes through ``services.checkout`` in replay mode and is committed on
+    its own, keeping checkout's product-ordered locking intact under live traffic.
+    A concurrent upload of the same sale loses on the unique
+    ``client_uuid`` and is reported as a duplicate too.
+    """
+    started = time.perf_counter()
+    results: list[dict] = []
+    sales: list[tuple[int, OfflineSale]] = []
+    for index, record in enumerate(records):
+        try:
+            sales.append((index, OfflineSale.model_validate(record)))
+        except ValidationError as error:
+            client_uuid = record.get("client_uuid") if isinstance(record, dict) else None
+            results.append(_result(index, client_uuid, OfflineSaleStatus.rejected, errors=validation_messages(error)))
+
+    for start in range(0, len(sales), OFFLINE_SALES_CHUNK):
+        chunk = sales[start:start + OFFLINE_SALES_CHUNK]
+        known = await _known_sales(db, [sale for _, sale in chunk])
+        for index, sale in chunk:
+            if sale.client_uuid in known:
+                results.append(_result(index, sale.client_uuid, OfflineSaleStatus.duplicate, known[sale.client_uuid]))
+                continue
+            try:
+                ticket = await checkout(
+                    db, user_id, sale, date_sale=sale.date_sale, client_uuid=sale.client_uuid, replay=True
+                )
+                await db.commit()
+            except HTTPException as error:
+                await db.rollback()
+                results.append(_result(index, sale.client_uuid, OfflineSaleStatus.rejected, errors=[str(error.detail)]))
+                continue
+            except IntegrityError:
+                await db.rollback()
+                sale_id = await db.scalar(select(Sale.id).where(Sale.client_uuid == sale.client_uuid))
+                if sale_id is None:
+                    raise
+                await db.rollback()
+                known[sale.client_uuid] = sale_id
+                results.append(_result(index, sale.client_uuid, OfflineSaleStatus.duplicate, sale_id))
+                continue
+            known[sale.client_uuid] = ticket["id"]
+            results.append(_result(index, sale.client_uuid, OfflineSaleStatus.created, ticket["id"]))
+
+    results.sort(key=lambda result: result["index"])
+    counts = {status: 0 for status in OfflineSaleStatus}
+    for result in results:
+        counts[result["status"]] += 1
+    return {
+        "received": len(records),
+        "created": counts[OfflineSaleStatus.created],
+        "duplicates": counts[OfflineSaleStatus.duplicate],
+        "rejected": counts[OfflineSaleStatus.rejected],
+        "results": results,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,260 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..models.products.orm import Product
+from ..models.product_barcodes.orm import ProductBarcode
+from ..models.stock_on_hand.orm import StockOnHand
+from ..models.catalog_sync.orm import SyncTombstone
+
+
+# Re-read rows stamped slightly before the watermark: now() is the transaction
+# start time on PostgreSQL, so a long transaction can commit "in the past".
+WATERMARK_LOOKBACK = timedelta(seconds=5)
+# Keep IN (...) lists well under driver parameter limits.
+LOAD_CHUNK = 5000
+
+CARD_COLUMNS = (
+    Product.id,
+    Product.title,
+    Product.sku,
+    Product.unit_name,
+    Product.price_retail,
+    Product.is_discount,
+    Product.max_discount,
+    Product.is_taxable,
+    Product.tax_percentage,
+    Product.is_active,
+    Product.allow_without_stock,
+)
+
+
+class _CodeMaps:
+    def __init__(self):
+        self.cards: dict[int, dict] = {}
+        self.codes: dict[str, int] = {}
+        self.codes_by_product: dict[int, set[str]] = {}
+        # Barcode id -> product id, to resolve barcode tombstones.
+        self.barcode_products: dict[int, int] = {}
+
+    def set_product(self, card: dict, codes: set[str]):
+        product_id = card["id"]
+        for stale in self.codes_by_product.get(product_id, set()) - codes:
+            if self.codes.get(stale) == product_id:
+                del self.codes[stale]
+        for code in codes:
+            self.codes[code] = product_id
+        self.codes_by_product[product_id] = codes
+        self.cards[product_id] = card
+
+    def forget(self, product_id: int):
+        self.cards.pop(product_id, None)
+        for code in self.codes_by_product.pop(product_id, ()):
+            if self.codes.get(code) == product_id:
+                del self.codes[code]
+
+    def forget_code(self, code: str):
+        product_id = self.codes.pop(code, None)
+        if product_id is not None:
+            self.codes_by_product.get(product_id, set()).discard(code)
+
+
+class ProductCodeIndex:
+    """
+    In-process ``code -> product card`` map for barcode scans.
+
+    Every product is reachable by its SKU and by each of its ``product_barcodes``
+    codes. A background task refreshes the map incrementally from
+    ``updated_at`` on products, barcodes and ``stock_on_hand``, reloads the
+    products named by new ``sync_tombstones`` so deletes made by other workers
+    drop out, and rebuilds it every ``full_reload_interval`` seconds. Handlers
+    in this process call ``forget``/``forget_code`` on deletes so they take
+    effect immediately.
+    """
+
+    def __init__(self, refresh_interval: float, full_reload_interval: float):
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self._maps = _CodeMaps()
+        # Maps being rebuilt by full_reload(); deletes are applied to both.
+        self._building: Optional[_CodeMaps] = None
+        self._watermark: Optional[datetime] = None
+        self._tombstone_id = 0
+        self._last_full_reload = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.full_reloads = 0
+
+    # --- Lookups ---
+
+    def get(self, code: str) -> Optional[dict]:
+        """Card for ``code`` from memory, ``None`` if it isn't indexed."""
+        maps = self._maps
+        product_id = maps.codes.get(code)
+        card = maps.cards.get(product_id) if product_id is not None else None
+        if card is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"code": code, **card}
+
+    async def lookup(self, db: AsyncSession, code: str) -> Optional[dict]:
+        """Card for ``code``; on a miss, look it up in the database and index the product."""
+        card = self.get(code)
+        if card is not None:
+            return card
+        # Two point lookups on their unique indexes; an OR across a join would scan.
+        product_id = await db.scalar(select(Product.id).where(Product.sku == code))
+        if product_id is None:
+            product_id = await db.scalar(select(ProductBarcode.product_id).where(ProductBarcode.code == code))
+        if product_id is None:
+            return None
+        await self._load(db, self._maps, [product_id])
+        product_id = self._maps.codes.get(code)
+        return {"code": code, **self._maps.cards[product_id]} if product_id in self._maps.cards else None
+
+    # --- Maintenance ---
+
+    def forget(self, product_id: int):
+        for maps in (self._maps, self._building):
+            if maps is not None:
+                maps.forget(product_id)
+
+    def forget_code(self, code: str):
+        for maps in (self._maps, self._building):
+            if maps is not None:
+                maps.forget_code(code)
+
+    async def _load(self, db: AsyncSession, maps: _CodeMaps, product_ids: Optional[Iterable[int]] = None):
+        """(Re)build cards for ``product_ids``, or for every product when ``None``."""
+        chunks = [None] if product_ids is None else [
+            ids[i:i + LOAD_CHUNK] for ids in [list(product_ids)] for i in range(0, len(ids), LOAD_CHUNK)
+        ]
+        for chunk in chunks:
+            products = select(*CARD_COLUMNS)
+            stock = select(StockOnHand.product_id, StockOnHand.quantity)
+            barcodes = select(ProductBarcode.id, ProductBarcode.product_id, ProductBarcode.code)
+            if chunk is not None:
+                products = products.where(Product.id.in_(chunk))
+                stock = stock.where(StockOnHand.product_id.in_(chunk))
+                barcodes = barcodes.where(ProductBarcode.product_id.in_(chunk))
+
+            stock_by_product = dict((await db.execute(stock)).all())
+            codes_by_product: dict[int, set[str]] = {}
+            for barcode_id, product_id, code in (await db.execute(barcodes)).all():
+                maps.barcode_products[barcode_id] = product_id
+                codes_by_product.setdefault(product_id, set()).add(code)
+
+            found = set()
+            for row in (await db.execute(products)).mappings():
+                found.add(row["id"])
+                units = int(stock_by_product.get(row["id"]) or 0)
+                codes = codes_by_product.get(row["id"], set())
+                if row["sku"]:
+                    codes.add(row["sku"])
+                maps.set_product({
+                    **row,
+                    "stock": units,
+                    "in_stock": units > 0,
+                    "sellable": row["is_active"] and (units > 0 or row["allow_without_stock"]),
+                }, codes)
+
+            if chunk is not None:
+                for missing in set(chunk) - found:
+                    maps.forget(missing)
+
+    async def _max_updated_at(self, db: AsyncSession) -> Optional[datetime]:
+        stamps = [
+            await db.scalar(select(func.max(column)))
+            for column in (Product.updated_at, ProductBarcode.updated_at, StockOnHand.updated_at)
+        ]
+        stamps = [stamp for stamp in stamps if stamp is not None]
+        return max(stamps) if stamps else None
+
+    async def _max_tombstone_id(self, db: AsyncSession) -> int:
+        return await db.scalar(select(func.max(SyncTombstone.id))) or 0
+
+    async def _deleted_since_last_refresh(self, db: AsyncSession) -> set[int]:
+        """Products that were deleted, or lost a barcode, since the last tombstone seen."""
+        tombstones = await db.execute(
+            select(SyncTombstone.entity, SyncTombstone.entity_id)
+            .where(SyncTombstone.id > self._tombstone_id, SyncTombstone.entity.in_(("products", "barcodes")))
+        )
+        product_ids = set()
+        for entity, entity_id in tombstones.all():
+            if entity == "products":
+                product_ids.add(entity_id)
+            elif (product_id := self._maps.barcode_products.pop(entity_id, None)) is not None:
+                product_ids.add(product_id)
+        return product_ids
+
+    async def full_reload(self, db: AsyncSession):
+        """Build a fresh map and swap it in; lookups keep using the old one meanwhile."""
+        watermark = await self._max_updated_at(db)
+        tombstone_id = await self._max_tombstone_id(db)
+        self._building = _CodeMaps()
+        try:
+            await self._load(db, self._building)
+            self._maps = self._building
+        finally:
+            self._building = None
+        self._watermark = watermark
+        self._tombstone_id = tombstone_id
+        self._last_full_reload = time.monotonic()
+        self.full_reloads += 1
+
+    async def refresh(self, db: AsyncSession):
+        """Reload only products whose row, barcodes or stock changed, or that were deleted, since the last refresh."""
+        if self._watermark is None or time.monotonic() - self._last_full_reload > self.full_reload_interval:
+            await self.full_reload(db)
+            return
+
+        watermark = await self._max_updated_at(db)
+        tombstone_id = await self._max_tombstone_id(db)
+        since = self._watermark - WATERMARK_LOOKBACK
+        # Deleted products are missing on reload and get forgotten; products
+        # that lost a barcode are rebuilt without it.
+        changed = await self._deleted_since_last_refresh(db)
+        changed.update((await db.scalars(select(Product.id).where(Product.updated_at >= since))).all())
+        changed.update((await db.scalars(select(ProductBarcode.product_id).where(ProductBarcode.updated_at >= since))).all())
+        changed.update((await db.scalars(select(StockOnHand.product_id).where(StockOnHand.updated_at >= since))).all())
+        if changed:
+            await self._load(db, self._maps, changed)
+        self._watermark = watermark
+        self._tombstone_id = tombstone_id
+        self.refreshes += 1
+
+    async def run(self, session_factory):
+        """Background refresher; start it from the app lifespan and cancel it on shutdown."""
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:  # keep serving the last good map
+                print(f"⚠️ Product code index refresh failed: {error!r}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "products": len(self._maps.cards),
+            "codes": len(self._maps.codes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "full_reloads": self.full_reloads,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+        }
+
+
+product_code_index = ProductCodeIndex(
+    refresh_interval=settings.product_code_refresh_seconds,
+    full_reload_interval=settings.product_code_full_reload_seconds,
+)
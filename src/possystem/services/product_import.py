@@ -0,0 +1,276 @@
+import asyncio
+import csv
+import io
+import json
+import time
+from enum import Enum
+from typing import BinaryIO, Iterator
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.products.orm import Product
+from ..models.products.schemas import ProductImportRow
+from ..models.product_barcodes.orm import ProductBarcode
+from ..models.product_brand.orm import ProductBrand
+from ..models.product_master.orm import ProductMaster
+from ..models.ingredients.orm import Ingredient
+from ..models.product_has_ingredients.orm import product_has_ingredients
+
+
+# Rows validated, resolved and inserted together (and committed together).
+IMPORT_CHUNK = 1000
+# Rows listed in the report; the counts always cover every row.
+MAX_REPORTED_ERRORS = 1000
+# CSV cells holding several values (ingredient_ids, ingredients, barcodes): "1|2|3".
+LIST_SEPARATOR = "|"
+
+_products = Product.__table__
+
+_LIST_FIELDS = ("ingredient_ids", "ingredients", "barcodes")
+_REFERENCE_FIELDS = {"ingredient_ids", "brand", "product_master", "ingredients", "barcodes"}
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+def iter_records(source: BinaryIO, import_format: ImportFormat) -> Iterator[tuple[int, dict | str]]:
+    """
+    ``(row number, record)`` for every data row of the file, read one row at
+    a time. A row that can't even be parsed comes back as an error message.
+    Empty CSV cells are left out so the schema defaults apply.
+    """
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    if import_format == ImportFormat.csv:
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            if None in row:
+                yield row_number, "More cells than header columns"
+                continue
+            record = {key.strip(): value.strip() for key, value in row.items() if value and value.strip()}
+            if not record:
+                continue  # blank line, or a row of empty cells
+            for field in _LIST_FIELDS:
+                if field in record:
+                    record[field] = [item.strip() for item in record[field].split(LIST_SEPARATOR) if item.strip()]
+            yield row_number, record
+    else:
+        row_number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield row_number, f"Invalid JSON: {error}"
+                continue
+            yield row_number, record if isinstance(record, dict) else "Each line must be a JSON object"
+
+
+def validation_messages(error: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors(include_url=False)
+    ]
+
+
+class _ImportRun:
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+        # SKUs and barcodes taken by earlier rows of the same file
+        self.seen_codes: set[str] = set()
+
+    def reject(self, row_number: int, sku, messages: list[str]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "sku": sku, "errors": messages})
+
+    def report(self, started: float) -> dict:
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "failed": self.failed,
+            "dry_run": self.dry_run,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+async def _names_to_ids(db: AsyncSession, column, id_column, names: set[str]) -> dict[str, int]:
+    if not names:
+        return {}
+    return dict((await db.execute(select(column, id_column).where(column.in_(names)))).all())
+
+
+async def _existing_ids(db: AsyncSession, id_column, ids: set[int]) -> set[int]:
+    if not ids:
+        return set()
+    return set((await db.scalars(select(id_column).where(id_column.in_(ids)))).all())
+
+
+async def _taken_codes(db: AsyncSession, codes: set[str]) -> set[str]:
+    if not codes:
+        return set()
+    taken = set((await db.scalars(select(Product.sku).where(Product.sku.in_(codes)))).all())
+    taken.update((await db.scalars(select(ProductBarcode.code).where(ProductBarcode.code.in_(codes)))).all())
+    return taken
+
+
+async def _import_chunk(db: AsyncSession, run: _ImportRun, chunk: list[tuple[int, ProductImportRow]]):
+    """Resolves the chunk's references with one query per kind, then inserts the rows that passed."""
+    brand_names = {row.brand for _, row in chunk if row.brand}
+    master_names = {row.product_master for _, row in chunk if row.product_master}
+    ingredient_names = {name for _, row in chunk for name in row.ingredients or ()}
+    brands = await _names_to_ids(db, ProductBrand.name, ProductBrand.id, brand_names)
+    masters = await _names_to_ids(db, ProductMaster.name, ProductMaster.id, master_names)
+    ingredients = await _names_to_ids(db, Ingredient.name, Ingredient.id, ingredient_names)
+    brand_ids = await _existing_ids(db, ProductBrand.id, {row.brand_id for _, row in chunk if row.brand_id})
+    master_ids = await _existing_ids(db, ProductMaster.id, {row.product_master_id for _, row in chunk if row.product_master_id})
+    ingredient_ids = await _existing_ids(db, Ingredient.id, {i for _, row in chunk for i in row.ingredient_ids or ()})
+    taken = await _taken_codes(db, {code for _, row in chunk for code in [row.sku, *(row.barcodes or ())] if code})
+
+    accepted = []
+    for row_number, row in chunk:
+        messages = []
+        if row.brand and row.brand_id:
+            messages.append("Give brand or brand_id, not both")
+        if row.product_master and row.product_master_id:
+            messages.append("Give product_master or product_master_id, not both")
+
+        brand_id = brands.get(row.brand) if row.brand else row.brand_id
+        if row.brand and brand_id is None:
+            messages.append(f"Brand not found: {row.brand}")
+        elif row.brand_id and row.brand_id not in brand_ids:
+            messages.append(f"Brand not found: {row.brand_id}")
+
+        master_id = masters.get(row.product_master) if row.product_master else row.product_master_id
+        if row.product_master and master_id is None:
+            messages.append(f"Product master not found: {row.product_master}")
+        elif row.product_master_id and row.product_master_id not in master_ids:
+            messages.append(f"Product master not found: {row.product_master_id}")
+
+        missing = [name for name in row.ingredients or () if name not in ingredients]
+        missing += [i for i in row.ingredient_ids or () if i not in ingredient_ids]
+        if missing:
+            messages.append(f"Ingredients not found: {missing}")
+
+        codes = [code for code in [row.sku, *(row.barcodes or ())] if code]
+        clashes = sorted({code for code in codes if code in taken or code in run.seen_codes})
+        if len(set(codes)) < len(codes):
+            messages.append("The same code appears twice in the row")
+        if clashes:
+            messages.append(f"Codes already assigned to a product: {clashes}")
+
+        if messages:
+            run.reject(row_number, row.sku, messages)
+            continue
+        run.seen_codes.update(codes)
+        product_ingredients = {ingredients[name] for name in row.ingredients or ()} | set(row.ingredient_ids or ())
+        accepted.append((row_number, row, brand_id, master_id, product_ingredients))
+
+    if run.dry_run or not accepted:
+        run.created += len(accepted)
+        return
+
+    product_rows = [
+        {**row.model_dump(mode="json", exclude=_REFERENCE_FIELDS), "brand_id": brand_id, "product_master_id": master_id}
+        for _, row, brand_id, master_id, _ in accepted
+    ]
+    try:
+        # Core insert on the table: the ORM bulk path would split the batch wherever
+        # the set of NULL columns changes from one row to the next.
+        product_ids = (await db.scalars(
+            insert(_products).returning(_products.c.id, sort_by_parameter_order=True), product_rows
+        )).all()
+        ingredient_rows = [
+            {"product_id": product_id, "ingredient_id": ingredient_id}
+            for product_id, (*_, product_ingredients) in zip(product_ids, accepted)
+            for ingredient_id in sorted(product_ingredients)
+        ]
+        barcode_rows = [
+            {"product_id": product_id, "code": code}
+            for product_id, (_, row, *_) in zip(product_ids, accepted)
+            for code in row.barcodes or ()
+        ]
+        if ingredient_rows:
+            await db.execute(insert(product_has_ingredients), ingredient_rows)
+        if barcode_rows:
+            await db.execute(insert(ProductBarcode), barcode_rows)
+        await db.commit()
+    except IntegrityError as error:
+        # A code taken by a concurrent request since the lookup: the whole chunk is rolled back.
+        await db.rollback()
+        for row_number, row, *_ in accepted:
+            run.reject(row_number, row.sku, [f"Conflicts with a concurrent change: {error.orig}"])
+        return
+    run.created += len(accepted)
+
+
+async def import_products(
+    db: AsyncSession,
+    source: BinaryIO,
+    import_format: ImportFormat,
+    dry_run: bool = False,
+    chunk_size: int = IMPORT_CHUNK,
+) -> dict:
+    """
+    Creates products from a CSV or NDJSON file, ``chunk_size`` rows at a time.
+
+    Rows are validated with the same types as ``POST /products/``. Each chunk
+    resolves its brand, master and ingredient references and checks its codes
+    against products and barcodes with one query per kind, then inserts its
+    valid rows with multi-row INSERTs and commits. Rows that fail are listed
+    in the report and the rest are imported. With ``dry_run`` nothing is written.
+    """
+    started = time.perf_counter()
+    run = _ImportRun(dry_run)
+    chunk: list[tuple[int, ProductImportRow]] = []
+    for row_number, record in iter_records(source, import_format):
+        run.rows += 1
+        if isinstance(record, str):
+            run.reject(row_number, None, [record])
+            continue
+        try:
+            chunk.append((row_number, ProductImportRow.model_validate(record)))
+        except ValidationError as error:
+            run.reject(row_number, record.get("sku"), validation_messages(error))
+        if len(chunk) >= chunk_size:
+            await _import_chunk(db, run, chunk)
+            chunk = []
+            await asyncio.sleep(0)  # parsing is synchronous; let other requests in between chunks
+    if chunk:
+        await _import_chunk(db, run, chunk)
+    return run.report(started)
+
+
+async def _main():
+    import argparse
+    from ..db.session import AsyncSessionLocal, async_engine
+
+    parser = argparse.ArgumentParser(description="Import products from a CSV or NDJSON file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", dest="import_format", choices=[f.value for f in ImportFormat],
+                        help="Defaults to the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK)
+    args = parser.parse_args()
+
+    import_format = ImportFormat(args.import_format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"))
+    try:
+        with open(args.path, "rb") as source:
+            async with AsyncSessionLocal() as db:
+                report = await import_products(db, source, import_format, args.dry_run, args.chunk_size)
+    finally:
+        await async_engine.dispose()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
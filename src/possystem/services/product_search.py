@@ -0,0 +1,92 @@
+from typing import Optional
+from sqlalchemy import Select, case, func, literal, or_, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.products.orm import Product
+from ..models.product_brand.orm import ProductBrand
+from ..models.ingredients.orm import Ingredient
+from ..models.product_has_ingredients.orm import product_has_ingredients
+
+
+SEARCH_LIMIT_DEFAULT = 20
+SEARCH_LIMIT_MAX = 100
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def _candidate_ids(pattern: str):
+    """
+    Ids of products whose title, SKU, description, brand name or an ingredient
+    name contains the term. Each branch of the UNION can use its own trigram
+    index on PostgreSQL; a single OR across the joined tables could not.
+    """
+    return union(
+        select(Product.id).where(or_(
+            Product.title.ilike(pattern, escape="/"),
+            Product.sku.ilike(pattern, escape="/"),
+            Product.description.ilike(pattern, escape="/"),
+        )),
+        select(Product.id)
+        .join(ProductBrand, ProductBrand.id == Product.brand_id)
+        .where(ProductBrand.name.ilike(pattern, escape="/")),
+        select(product_has_ingredients.c.product_id)
+        .join(Ingredient, Ingredient.id == product_has_ingredients.c.ingredient_id)
+        .where(Ingredient.name.ilike(pattern, escape="/")),
+    ).subquery()
+
+
+def _rank(term: str, dialect_name: str):
+    escaped = _escape_like(term)
+    exact_sku = case((func.lower(Product.sku) == term.lower(), 2.0), else_=0.0)
+    title_prefix = case((Product.title.ilike(f"{escaped}%", escape="/"), 1.0), else_=0.0)
+    if dialect_name == "postgresql":
+        # pg_trgm similarity in [0, 1]: closer titles first among the rest
+        return exact_sku + title_prefix + func.similarity(Product.title, term)
+    title_contains = case((Product.title.ilike(f"%{escaped}%", escape="/"), 0.5), else_=0.0)
+    return exact_sku + title_prefix + title_contains
+
+
+def build_search_query(
+    dialect_name: str,
+    term: Optional[str] = None,
+    limit: int = SEARCH_LIMIT_DEFAULT,
+    is_active: Optional[bool] = None,
+    brand_id: Optional[int] = None,
+    product_master_id: Optional[int] = None,
+) -> Select:
+    query = select(Product)
+
+    if term:
+        candidates = _candidate_ids(f"%{_escape_like(term)}%")
+        query = query.where(Product.id.in_(select(candidates.c.id)))
+        rank = _rank(term, dialect_name)
+    else:
+        rank = literal(0.0)
+
+    if is_active is not None:
+        query = query.where(Product.is_active == is_active)
+    if brand_id is not None:
+        query = query.where(Product.brand_id == brand_id)
+    if product_master_id is not None:
+        query = query.where(Product.product_master_id == product_master_id)
+
+    return query.order_by(rank.desc(), Product.title, Product.id).limit(min(limit, SEARCH_LIMIT_MAX))
+
+
+async def search_products(
+    db: AsyncSession,
+    term: Optional[str] = None,
+    limit: int = SEARCH_LIMIT_DEFAULT,
+    is_active: Optional[bool] = None,
+    brand_id: Optional[int] = None,
+    product_master_id: Optional[int] = None,
+) -> list[Product]:
+    """
+    Ranked product search over title, SKU, description, brand and ingredient names.
+
+    Ranking: exact SKU match, then title prefix, then trigram similarity of the
+    title (PostgreSQL) or plain containment (SQLite fallback). At most ``limit`` rows.
+    """
+    query = build_search_query(db.bind.dialect.name, term, limit, is_active, brand_id, product_master_id)
+    return (await db.scalars(query)).all()
@@ -0,0 +1,185 @@
+from collections import defaultdict
+from datetime import date, datetime, time
+from fastapi import HTTPException
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from ..models.products.orm import Product
+from ..models.product_batch.orm import ProductBatch
+from ..models.purchases.orm import Purchase
+from ..models.purchase_details.orm import PurchaseDetail
+from ..models.purchases.schemas import PurchaseReceiveRequest
+from ..models.suppliers.orm import Supplier
+from .stock import adjust_stock, get_stock
+
+
+_products = Product.__table__
+
+# Executemany update: one statement for every product of the delivery
+_SET_COST = (
+    update(_products)
+    .where(_products.c.id == bindparam("p_id"))
+    .values(price_cost=bindparam("cost"))
+)
+
+
+def _money(value: float) -> float:
+    return round(value, 2)
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+async def _lock_products(db: AsyncSession, product_ids: set[int]) -> dict[int, float]:
+    """Current cost of each product, holding the product rows (in id order) until commit on PostgreSQL."""
+    query = select(Product.id, Product.price_cost).where(Product.id.in_(product_ids)).order_by(Product.id)
+    if db.bind.dialect.name == "postgresql":
+        query = query.with_for_update()
+    costs = dict((await db.execute(query)).all())
+    missing = product_ids - costs.keys()
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Products not found: {sorted(missing)}")
+    return costs
+
+
+async def _book_lines(db: AsyncSession, lines: list[dict]) -> list[dict]:
+    """
+    Turns received lines (``product_id``, ``quantity``, ``unit_price``,
+    ``lot_code``, ``expiration_date``) into batches and books them: one
+    multi-row insert for the batches, one upsert for the stock on hand, and
+    the products' cost moved to the weighted average of the units on hand
+    (at the old cost) and the units received (at their price).
+    Returns the cost changes.
+    """
+    received: dict[int, list[float]] = defaultdict(lambda: [0, 0.0])  # product -> [units, value]
+    for line in lines:
+        received[line["product_id"]][0] += line["quantity"]
+        received[line["product_id"]][1] += line["quantity"] * line["unit_price"]
+
+    previous_costs = await _lock_products(db, set(received))
+    on_hand = await get_stock(db, received)
+    costs = []
+    for product_id, (units, value) in sorted(received.items()):
+        held = max(on_hand[product_id], 0)  # oversold stock has no cost to carry over
+        cost = _money((held * previous_costs[product_id] + value) / (held + units))
+        costs.append({"product_id": product_id, "previous_cost": previous_costs[product_id], "price_cost": cost})
+
+    batch_ids = (await db.scalars(
+        insert(ProductBatch).returning(ProductBatch.id, sort_by_parameter_order=True),
+        [
+            {
+                "product_id": line["product_id"],
+                "lot_code": line["lot_code"],
+                "expiration_date": _as_date(line["expiration_date"]),
+                "quantity": line["quantity"],
+                "purchase_price": line["unit_price"],
+            }
+            for line in lines
+        ],
+    )).all()
+    for line, batch_id in zip(lines, batch_ids):
+        line["product_batch_id"] = batch_id
+
+    await db.execute(_SET_COST, [{"p_id": c["product_id"], "cost": c["price_cost"]} for c in costs])
+    await adjust_stock(db, {product_id: units for product_id, (units, _) in received.items()})
+    return costs
+
+
+def _receipt(purchase: Purchase, details, costs: list[dict]) -> dict:
+    return {
+        "id": purchase.id,
+        "supplier_id": purchase.supplier_id,
+        "user_id": purchase.user_id,
+        "date_emision": purchase.date_emision,
+        "total": purchase.total,
+        "description": purchase.description,
+        "lines": details,
+        "costs": costs,
+    }
+
+
+async def receive_purchase(db: AsyncSession, user_id: int, request: PurchaseReceiveRequest) -> dict:
+    """
+    Creates a purchase together with its lines and the batches they
+    deliver, updating stock on hand and product costs. Everything is written
+    with multi-row statements, whatever the number of lines; the caller commits.
+    """
+    if not await db.scalar(select(Supplier.id).where(Supplier.id == request.supplier_id)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found")
+
+    lines = [line.model_dump() for line in request.lines]
+    costs = await _book_lines(db, lines)
+
+    purchase_row = {
+        "supplier_id": request.supplier_id,
+        "user_id": user_id,
+        "total": _money(sum(line["quantity"] * line["unit_price"] for line in lines)),
+        "description": request.description,
+    }
+    if request.date_emision is not None:
+        purchase_row["date_emision"] = request.date_emision
+    purchase = await db.scalar(insert(Purchase).returning(Purchase), [purchase_row])
+
+    details = (await db.scalars(
+        insert(PurchaseDetail).returning(PurchaseDetail, sort_by_parameter_order=True),
+        [
+            {
+                "purchase_id": purchase.id,
+                "product_id": line["product_id"],
+                "quantity": line["quantity"],
+                "unit_price": line["unit_price"],
+                "lot_code": line["lot_code"],
+                # purchase_details keeps a timestamp; batches keep the date
+                "expiration_date": datetime.combine(line["expiration_date"], time.min),
+                "product_batch_id": line["product_batch_id"],
+            }
+            for line in lines
+        ],
+    )).all()
+    return _receipt(purchase, details, costs)
+
+
+async def receive_existing_purchase(db: AsyncSession, purchase_id: int) -> dict:
+    """
+    Receives the lines of an already registered purchase that have no batch
+    yet (each needs an expiration date and a whole quantity). Lines are held
+    while this runs, so two receipts of one purchase can't both book them.
+    """
+    purchase = await db.get(Purchase, purchase_id)
+    if purchase is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase not found")
+
+    query = (
+        select(PurchaseDetail)
+        .where(PurchaseDetail.purchase_id == purchase_id, PurchaseDetail.product_batch_id.is_(None))
+        .order_by(PurchaseDetail.id)
+    )
+    if db.bind.dialect.name == "postgresql":
+        query = query.with_for_update()
+    details = (await db.scalars(query)).all()
+    if not details:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Every line of this purchase has already been received")
+
+    undated = [d.id for d in details if d.expiration_date is None]
+    if undated:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Lines without an expiration date: {undated}")
+    fractional = [d.id for d in details if d.quantity != int(d.quantity)]
+    if fractional:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Lines with a fractional quantity: {fractional}")
+
+    lines = [
+        {
+            "product_id": d.product_id,
+            "quantity": int(d.quantity),
+            "unit_price": d.unit_price,
+            "lot_code": d.lot_code,
+            "expiration_date": d.expiration_date,
+        }
+        for d in details
+    ]
+    costs = await _book_lines(db, lines)
+    for detail, line in zip(details, lines):
+        detail.product_batch_id = line["product_batch_id"]
+    await db.flush()  # one executemany UPDATE for all the lines
+    return _receipt(purchase, details, costs)
@@ -0,0 +1,225 @@
+import asyncio
+import time as timer
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import Date, Integer, Select, cast, delete, extract, func, insert, select, union, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.sales.orm import Sale
+from ..models.sale_details.orm import SaleDetail
+from ..models.sale_payments.orm import SalePayment
+from ..models.sales_rollups.orm import (
+    SalesDailyByBranch, SalesHourlyByBranch, SalesDailyByProduct, PaymentsDailyByMethod, RollupWatermark, RollupStaleDay,
+)
+
+
+ROLLUP_NAME = "sales"
+# Re-read rows stamped slightly before the watermark: now() is the transaction
+# start time on PostgreSQL, so a long transaction can commit "in the past".
+WATERMARK_LOOKBACK = timedelta(seconds=5)
+
+_state = RollupWatermark.__table__
+_day = func.date(Sale.date_sale, type_=Date)
+_hour = cast(extract("hour", Sale.date_sale), Integer)
+
+
+def _total(column):
+    return func.coalesce(func.sum(column), 0)
+
+
+def _by_branch() -> Select:
+    return select(
+        _day.label("day"), Sale.branch_id, Sale.user_id,
+        func.count(Sale.id).label("sales"),
+        _total(Sale.subtotal).label("subtotal"),
+        _total(Sale.discount).label("discount"),
+        _total(Sale.tax).label("tax"),
+        _total(Sale.total).label("total"),
+    ).where(Sale.deleted_at.is_(None)).group_by(_day, Sale.branch_id, Sale.user_id)
+
+
+def _by_hour() -> Select:
+    return select(
+        _day.label("day"), _hour.label("hour"), Sale.branch_id,
+        func.count(Sale.id).label("sales"),
+        _total(Sale.total).label("total"),
+    ).where(Sale.deleted_at.is_(None)).group_by(_day, _hour, Sale.branch_id)
+
+
+def _by_product() -> Select:
+    return select(
+        _day.label("day"), Sale.branch_id, SaleDetail.product_id,
+        func.count(func.distinct(SaleDetail.sale_id)).label("sales"),
+        _total(SaleDetail.quantity).label("quantity"),
+        _total(func.coalesce(SaleDetail.discount, 0) * SaleDetail.quantity).label("discount"),
+        _total(SaleDetail.tax).label("tax"),
+        _total(SaleDetail.total).label("total"),
+    ).join(Sale, Sale.id == SaleDetail.sale_id).where(Sale.deleted_at.is_(None), SaleDetail.deleted_at.is_(None)).group_by(_day, Sale.branch_id, SaleDetail.product_id)
+
+
+def _by_method() -> Select:
+    return select(
+        _day.label("day"), Sale.branch_id, SalePayment.method_payment,
+        func.count(SalePayment.id).label("payments"),
+        _total(SalePayment.amount).label("amount"),
+    ).join(Sale, Sale.id == SalePayment.sale_id).where(Sale.deleted_at.is_(None), SalePayment.deleted_at.is_(None)).group_by(_day, Sale.branch_id, SalePayment.method_payment)
+
+
+ROLLUPS = (
+    (SalesDailyByBranch.__table__, _by_branch),
+    (SalesHourlyByBranch.__table__, _by_hour),
+    (SalesDailyByProduct.__table__, _by_product),
+    (PaymentsDailyByMethod.__table__, _by_method),
+)
+
+
+def _day_ranges(days: Iterable[date]) -> list[tuple[date, date]]:
+    """Consecutive days merged into ``[start, end)`` ranges."""
+    ranges: list[list[date]] = []
+    for day in sorted(set(days)):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+    return [(start, end) for start, end in ranges]
+
+
+async def _recompute(db: AsyncSession, start: Optional[date] = None, end: Optional[date] = None):
+    """Replaces the rollup rows of days ``[start, end)`` (every day when not given) with fresh aggregates."""
+    for table, build in ROLLUPS:
+        stale = delete(table)
+        query = build()
+        if start is not None:
+            stale = stale.where(table.c.day >= start, table.c.day < end)
+            query = query.where(Sale.date_sale >= datetime.combine(start, time.min), Sale.date_sale < datetime.combine(end, time.min))
+        await db.execute(stale)
+        await db.execute(insert(table).from_select([column.name for column in query.selected_columns], query))
+
+
+async def _high_water(db: AsyncSession) -> Optional[datetime]:
+    stamps = [await db.scalar(select(func.max(column))) for column in (Sale.updated_at, SaleDetail.updated_at, SalePayment.updated_at)]
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+async def _changed_days(db: AsyncSession, since: datetime) -> list[date]:
+    """Sale days with a sale, line or payment written since ``since``."""
+    query = union(
+        select(_day).where(Sale.updated_at >= since),
+        select(_day).join(SaleDetail, SaleDetail.sale_id == Sale.id).where(SaleDetail.updated_at >= since),
+        select(_day).join(SalePayment, SalePayment.sale_id == Sale.id).where(SalePayment.updated_at >= since),
+    )
+    days = (await db.scalars(query)).all()
+    return [date.fromisoformat(day) if isinstance(day, str) else day for day in days if day is not None]
+
+
+async def _take_stale_days(db: AsyncSession) -> list[date]:
+    """Days sales moved away from or were deleted from (see ``RollupStaleDay``), removed as they are read."""
+    rows = (await db.execute(select(RollupStaleDay.id, RollupStaleDay.day))).all()
+    if rows:
+        await db.execute(delete(RollupStaleDay).where(RollupStaleDay.id <= max(row.id for row in rows)))
+    return [row.day for row in rows]
+
+
+async def _lock_watermark(db: AsyncSession):
+    """Current watermark and last refresh, holding the row until commit so refreshes from several workers take turns."""
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    await db.execute(dialect.insert(_state).on_conflict_do_nothing(index_elements=[_state.c.name]), [{"name": ROLLUP_NAME}])
+    query = select(_state.c.watermark, _state.c.refreshed_at).where(_state.c.name == ROLLUP_NAME)
+    if db.bind.dialect.name == "postgresql":
+        query = query.with_for_update()
+    return (await db.execute(query)).one()
+
+
+async def refresh_rollups(db: AsyncSession, rebuild: bool = False) -> dict:
+    """
+    Brings the sales rollups up to date.
+
+    Finds the days with sales, lines or payments written since the
+    watermark (the newest ``updated_at`` seen last time), plus the days
+    sales were moved or deleted from, and recomputes just those days with
+    one ``INSERT ... SELECT`` per rollup and run of consecutive days, so
+    edits and late uploads are folded in as well as new tickets. The first refresh, or ``rebuild``, recomputes every day.
+    """
+    started = timer.perf_counter()
+    watermark, refreshed_at = await _lock_watermark(db)
+    high = await _high_water(db)
+
+    rebuilt = rebuild or refreshed_at is None
+    stale_days = await _take_stale_days(db)
+    if rebuilt:
+        await _recompute(db)
+        days = await db.scalar(select(func.count(func.distinct(SalesDailyByBranch.day))))
+    elif watermark is not None or high is not None or stale_days:
+        since = watermark - WATERMARK_LOOKBACK if watermark is not None else datetime.min
+        ranges = _day_ranges(await _changed_days(db, since) + stale_days)
+        for start, end in ranges:
+            await _recompute(db, start, end)
+        days = sum((end - start).days for start, end in ranges)
+    else:
+        days = 0  # no sales yet
+
+    await db.execute(
+        update(_state).where(_state.c.name == ROLLUP_NAME).values(watermark=high or watermark, refreshed_at=func.now())
+    )
+    await db.commit()
+    status = await rollup_status(db)
+    return {**status, "rebuilt": rebuilt, "days_refreshed": days, "seconds": round(timer.perf_counter() - started, 3)}
+
+
+async def rollup_status(db: AsyncSession) -> dict:
+    row = (await db.execute(
+        select(_state.c.watermark, _state.c.refreshed_at).where(_state.c.name == ROLLUP_NAME)
+    )).first()
+    return {"watermark": row.watermark, "refreshed_at": row.refreshed_at} if row else {"watermark": None, "refreshed_at": None}
+
+
+async def run_rollup_refresher(session_factory, interval: float):
+    """Background refresh; start it from the app lifespan and cancel it on shutdown."""
+    while True:
+        try:
+            async with session_factory() as db:
+                await refresh_rollups(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            print(f"⚠️ Sales rollup refresh failed: {error!r}")
+        await asyncio.sleep(interval)
+
+
+# =========================================================
+# 📊 Reports (read the rollups only)
+# =========================================================
+async def rollup_report(
+    db: AsyncSession,
+    table,
+    keys: list[str],
+    measures: list[str],
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    filters: Optional[dict] = None,
+    order_by_measure: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> list[dict]:
+    """
+    Sums ``measures`` of a rollup table grouped by the ``keys`` columns, for
+    days ``date_from`` to ``date_to`` (both included) and rows equal to
+    ``filters``. Rows come ordered by the keys, or by ``order_by_measure``
+    (largest first).
+    """
+    columns = [table.c[key] for key in keys]
+    query = select(*columns, *[func.sum(table.c[measure]).label(measure) for measure in measures]).group_by(*columns)
+    if date_from is not None:
+        query = query.where(table.c.day >= date_from)
+    if date_to is not None:
+        query = query.where(table.c.day <= date_to)
+    for key, value in (filters or {}).items():
+        if value is not None:
+            query = query.where(table.c[key] == value)
+    if order_by_measure:
+        query = query.order_by(func.sum(table.c[order_by_measure]).desc(), *columns)
+    else:
+        query = query.order_by(*columns)
+    if limit is not None:
+        query = query.limit(limit)
+    return [dict(row._mapping) for row in (await db.execute(query)).all()]
@@ -0,0 +1,109 @@
+import asyncio
+from typing import Iterable
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.products.orm import Product
+from ..models.product_batch.orm import ProductBatch
+from ..models.stock_on_hand.orm import StockOnHand
+
+
+_stock = StockOnHand.__table__
+
+
+def _upsert(db: AsyncSession, increment: bool):
+    """``INSERT ... ON CONFLICT (product_id) DO UPDATE`` adding to or replacing the quantity."""
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(_stock)
+    quantity = _stock.c.quantity + stmt.excluded.quantity if increment else stmt.excluded.quantity
+    return stmt.on_conflict_do_update(
+        index_elements=[_stock.c.product_id],
+        set_={"quantity": quantity, "updated_at": func.now()},
+    )
+
+
+async def adjust_stock(db: AsyncSession, deltas: dict[int, int]):
+    """
+    Adds ``product_id -> delta`` to the stock on hand in one statement.
+
+    Call it in the same transaction as the batch change it mirrors. Rows
+    go in product order, the same order batches are locked in, so
+    concurrent tickets can't deadlock on them.
+    """
+    rows = [
+        {"product_id": product_id, "quantity": delta}
+        for product_id, delta in sorted(deltas.items())
+        if delta
+    ]
+    if rows:
+        await db.execute(_upsert(db, increment=True), rows)
+
+
+async def get_stock(db: AsyncSession, product_ids: Iterable[int]) -> dict[int, int]:
+    """Units on hand for ``product_ids``; products that never had stock come back as 0."""
+    product_ids = set(product_ids)
+    rows = (await db.execute(
+        select(StockOnHand.product_id, StockOnHand.quantity).where(StockOnHand.product_id.in_(product_ids))
+    )).all()
+    return {product_id: 0 for product_id in product_ids} | dict(rows)
+
+
+async def _batch_totals(db: AsyncSession) -> dict[int, int]:
+    query = select(ProductBatch.product_id, func.sum(ProductBatch.quantity)).group_by(ProductBatch.product_id)
+    return {product_id: int(total) for product_id, total in (await db.execute(query)).all()}
+
+
+async def _recount(db: AsyncSession, product_id: int) -> int:
+    """
+    Sum of the product's batches, read while holding its batch rows and then
+    its stock row (the order sales take them in). Movements committed before
+    are counted; movements still in flight apply their delta after us.
+    """
+    batches = select(ProductBatch.quantity).where(ProductBatch.product_id == product_id)
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(batches.with_for_update())
+        await db.execute(select(StockOnHand.product_id).where(StockOnHand.product_id == product_id).with_for_update())
+    return sum((await db.scalars(batches)).all())
+
+
+async def reconcile_stock(db: AsyncSession) -> dict:
+    """
+    Rebuilds ``stock_on_hand`` from ``product_batches``.
+
+    One aggregate finds the products whose stock drifted; each of those is
+    then recounted with its batches locked and committed on its own, so
+    sales of other products are never blocked. Rows of deleted products are dropped.
+    """
+    totals = await _batch_totals(db)
+    current = dict((await db.execute(select(StockOnHand.product_id, StockOnHand.quantity))).all())
+    await db.rollback()
+
+    fixed = 0
+    for product_id in sorted(totals.keys() | current.keys()):
+        if totals.get(product_id, 0) == current.get(product_id, 0):
+            continue
+        total = await _recount(db, product_id)
+        await db.execute(_upsert(db, increment=False), [{"product_id": product_id, "quantity": total}])
+        await db.commit()
+        fixed += 1
+
+    removed = (await db.execute(
+        delete(StockOnHand).where(StockOnHand.product_id.not_in(select(Product.id)))
+    )).rowcount
+    await db.commit()
+    return {"products_checked": len(totals.keys() | current.keys()), "products_fixed": fixed, "rows_removed": removed}
+
+
+async def run_reconciler(session_factory, interval: float):
+    """Background reconciliation; start it from the app lifespan and cancel it on shutdown."""
+    while True:
+        try:
+            async with session_factory() as db:
+                result = await reconcile_stock(db)
+            if result["products_fixed"] or result["rows_removed"]:
+                print(f"⚠️ Stock on hand reconciled: {result}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            print(f"⚠️ Stock reconciliation failed: {error!r}")
+        await asyncio.sleep(interval)
\ No newline at end of file
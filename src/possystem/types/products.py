@@ -44,6 +44,17 @@ ProductSKUStr = Annotated[
     Field(description="Código SKU del producto")
 ]
 
+ProductBarcodeStr = Annotated[
+    str,
+    StringConstraints(
+        strip_whitespace=True,
+        min_length=1,
+        max_length=100,
+        pattern=r"^[A-Za-z0-9\-_.]+$"
+    ),
+    Field(description="Código de barras (EAN/UPC/interno)")
+]
+
 
 # -------------------------------
 # ⚖️ Unidades y fraccionamiento
@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Optional
+
+
+def to_server_time(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    ``value`` as the naive server-local time the ``TIMESTAMP(timezone=False)``
+    columns hold (what ``func.now()`` writes). asyncpg refuses time-zone
+    aware values for those columns, so convert client times before they
+    reach a query or a row; naive values are taken as server time already.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
@@ -0,0 +1,71 @@
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from .pagination import Page, PageParams, paginate, paginate_rows
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp) -> TypeAdapter:
+    """One ``TypeAdapter`` per response type; building one compiles a validator and a serializer."""
+    return TypeAdapter(tp)
+
+
+@lru_cache(maxsize=None)
+def schema_columns(model, schema: type[BaseModel]) -> tuple:
+    """
+    The ``model`` columns behind every field of ``schema``, for
+    ``select(*schema_columns(...))``: rows come back already shaped like
+    the response, with no ORM objects built.
+    """
+    table_columns = model.__table__.columns
+    missing = [name for name in schema.model_fields if name not in table_columns]
+    if missing:
+        raise TypeError(f"{schema.__name__} fields without a {model.__tablename__} column: {missing}")
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def _default(value):
+    # Numeric columns come back as Decimal on PostgreSQL; the schemas declare them as float.
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson response for plain rows; unlike ``ORJSONResponse`` it also encodes Decimal."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def rows_response(response_type, content: Any) -> FastJSONResponse:
+    """
+    Sends plain rows (dicts built from ``schema_columns``) as JSON without
+    running them through ``response_type``: the route keeps it as its
+    ``response_model`` for the docs, but FastAPI skips validation when a
+    Response is returned. With ``fast_json_validate`` the rows are still
+    checked against it, which catches a schema drifting from its columns.
+    """
+    if settings.fast_json_validate:
+        type_adapter(response_type).validate_python(content)
+    return FastJSONResponse(content)
+
+
+async def list_page(db: AsyncSession, model, schema: type[BaseModel], params: PageParams):
+    """
+    One page of ``model`` for a ``Page[schema]`` list endpoint (declare
+    ``response_class=FastJSONResponse`` on the route). By default the ORM
+    objects go through the route's ``response_model`` as usual; with
+    ``fast_json_lists`` the page is built from ``schema_columns`` rows and
+    sent by ``rows_response``, skipping hydration and validation.
+    """
+    if settings.fast_json_lists:
+        page = await paginate_rows(db, select(*schema_columns(model, schema)), model.id, params)
+        return rows_response(Page[schema], page)
+    return await paginate(db, select(model), model.id, params)
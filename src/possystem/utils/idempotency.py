@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from jose import JWTError, jwt
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from ..models.idempotency_keys.orm import IdempotencyKey
+from .security import ALGORITHM, SECRET_KEY
+
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+# Larger responses are not kept (nor buffered past this); a retry of such a request runs again.
+MAX_STORED_BODY = 1024 * 1024
+# Uploads and streamed downloads pass straight through, without buffering either body.
+UNBUFFERED_PATHS = ("/products/import", "/exports")
+CLEANUP_SECONDS = 3600.0
+# Tries at claiming a key whose holder released it between our claim and our read.
+CLAIM_ATTEMPTS = 3
+
+_keys = IdempotencyKey.__table__
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class IdempotencyStore:
+    """Claims, completes and replays ``idempotency_keys`` rows; each call is one short transaction."""
+
+    def __init__(self, engine, ttl: float, lock_seconds: float):
+        self.engine = engine
+        self.ttl = timedelta(seconds=ttl)
+        self.lock = timedelta(seconds=lock_seconds)
+
+    async def claim(self, key_hash: str, request_hash: str) -> bool:
+        """
+        Marks the key as in flight, in one ``INSERT ... ON CONFLICT`` that
+        also takes over expired rows. False if the key is already taken.
+        """
+        now = _utcnow()
+        dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(_keys).values(
+            key_hash=key_hash, request_hash=request_hash, expires_at=now + self.lock
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_keys.c.key_hash],
+            set_={
+                "request_hash": stmt.excluded.request_hash,
+                "expires_at": stmt.excluded.expires_at,
+                "status_code": None,
+                "content_type": None,
+                "body": None,
+            },
+            where=_keys.c.expires_at < now,
+        ).returning(_keys.c.key_hash)
+        async with self.engine.begin() as conn:
+            return (await conn.execute(stmt)).first() is not None
+
+    async def get(self, key_hash: str):
+        async with self.engine.connect() as conn:
+            return (await conn.execute(select(_keys).where(_keys.c.key_hash == key_hash))).first()
+
+    async def extend(self, key_hash: str):
+        """Pushes an in-flight claim's expiry back by another ``lock_seconds``."""
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                update(_keys).where(_keys.c.key_hash == key_hash, _keys.c.status_code.is_(None))
+                .values(expires_at=_utcnow() + self.lock)
+            )
+
+    async def complete(self, key_hash: str, status_code: int, content_type: Optional[str], body: bytes):
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                update(_keys).where(_keys.c.key_hash == key_hash).values(
+                    status_code=status_code, content_type=content_type, body=body, expires_at=_utcnow() + self.ttl
+                )
+            )
+
+    async def release(self, key_hash: str):
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(_keys).where(_keys.c.key_hash == key_hash))
+
+    async def purge_expired(self) -> int:
+        async with self.engine.begin() as conn:
+            return (await conn.execute(delete(_keys).where(_keys.c.expires_at < _utcnow()))).rowcount
+
+
+def _caller(headers: Headers) -> Optional[str]:
+    """User id from a valid bearer token; keys are scoped per user so nobody can replay another's response."""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        user_id = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("id")
+    except JWTError:
+        return None
+    return str(user_id) if user_id is not None else None
+
+
+def _digest(*parts: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """
+    Pure ASGI middleware making writes sent with an ``Idempotency-Key``
+    header safe to retry.
+
+    The first request claims the key and runs; a 2xx response is stored
+    for ``ttl`` seconds and sent back as-is (with ``Idempotent-Replayed:
+    true``) to any retry with the same key, caller and request. Other
+    outcomes release the key so the retry runs again. A retry that arrives
+    while the first is still running gets 409; the same key with a
+    different request gets 422. Requests without the header, or without a
+    valid bearer token, pass straight through, as do ``UNBUFFERED_PATHS``.
+    The request body is held in memory to fingerprint it; one larger than
+    ``max_body`` bytes gets 413.
+
+    The claim lasts ``lock_seconds`` and is renewed every third of that
+    while the request runs, so a slow request keeps its key however long it
+    takes and one from a killed worker frees up soon after.
+    """
+
+    def __init__(self, app, store: IdempotencyStore, max_body: int):
+        self.app = app
+        self.store = store
+        self.max_body = max_body
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in MUTATING_METHODS
+            or scope["path"].startswith(UNBUFFERED_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(HEADER)
+        caller = _caller(headers) if key else None
+        if caller is None:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await JSONResponse({"detail": f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters"}, status_code=400)(scope, receive, send)
+            return
+
+        # The fingerprint needs the whole body; the endpoint then reads it from memory.
+        too_large = JSONResponse({"detail": f"Request body larger than {self.max_body} bytes"}, status_code=413)
+        declared = headers.get("content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_body:
+            await too_large(scope, receive, send)
+            return
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body:
+                await too_large(scope, receive, send)
+                return
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+
+        key_hash = _digest(caller.encode(), key.encode())
+        request_hash = _digest(scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body)
+
+        for _ in range(CLAIM_ATTEMPTS):
+            if await self.store.claim(key_hash, request_hash):
+                break
+            row = await self.store.get(key_hash)
+            if row is not None:
+                await self._answer_repeat(scope, receive, send, row, request_hash)
+                return
+            # Released between the claim and the read (the first attempt failed): try again
+        else:
+            await self._still_running()(scope, receive, send)
+            return
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 500, "content_type": None, "body": [], "size": 0}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body" and response["body"] is not None:
+                chunk = message.get("body", b"")
+                response["size"] += len(chunk)
+                if response["size"] <= MAX_STORED_BODY:
+                    response["body"].append(chunk)
+                else:
+                    response["body"] = None  # too large to keep: stop holding on to it
+            await send(message)
+
+        heartbeat = asyncio.create_task(self._heartbeat(key_hash))
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if 200 <= response["status"] < 300 and response["body"] is not None:
+                await self.store.complete(key_hash, response["status"], response["content_type"], b"".join(response["body"]))
+            else:
+                await self.store.release(key_hash)
+        except BaseException:
+            # Whatever failed (the endpoint or storing its response), a retry must be able to run.
+            await asyncio.shield(self.store.release(key_hash))
+            raise
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, key_hash: str):
+        interval = self.store.lock.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.store.extend(key_hash)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                print(f"⚠️ Idempotency key renewal failed: {error!r}")
+
+    @staticmethod
+    def _still_running() -> JSONResponse:
+        return JSONResponse(
+            {"detail": "A request with this Idempotency-Key is still being processed"},
+            status_code=409, headers={"Retry-After": "1"},
+        )
+
+    async def _answer_repeat(self, scope, receive, send, row, request_hash: str):
+        if row.request_hash != request_hash:
+            answer = JSONResponse({"detail": "Idempotency-Key already used for a different request"}, status_code=422)
+        elif row.status_code is None:
+            answer = self._still_running()
+        else:
+            answer = Response(
+                content=row.body, status_code=row.status_code,
+                headers={"Idempotent-Replayed": "true", **({"content-type": row.content_type} if row.content_type else {})},
+            )
+        await answer(scope, receive, send)
+
+
+async def run_idempotency_cleanup(store: IdempotencyStore, interval: float = CLEANUP_SECONDS):
+    """Background removal of expired keys; start it from the app lifespan and cancel it on shutdown."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await store.purge_expired()
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            print(f"⚠️ Idempotency key cleanup failed: {error!r}")
@@ -0,0 +1,82 @@
+import base64
+import json
+from typing import Annotated, Generic, Optional, TypeVar
+from fastapi import Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from ..config import settings
+
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = Field(None, description="Pass as ?cursor= to get the next page; null on the last page")
+    limit: int
+
+
+class PageParams(BaseModel):
+    cursor: Optional[str] = None
+    limit: int
+
+
+def page_params(
+    cursor: Annotated[Optional[str], Query(description="Opaque cursor from the previous page's next_cursor")] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.page_size_max, description="Page size")] = settings.page_size_default,
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit)
+
+
+page_dependency = Annotated[PageParams, Depends(page_params)]
+
+
+def encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"k": key}).encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["k"]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _keyset_query(query: Select, key_column, params: PageParams) -> Select:
+    if params.cursor is not None:
+        last_key = decode_cursor(params.cursor)
+        if not isinstance(last_key, key_column.type.python_type) or isinstance(last_key, bool):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        query = query.where(key_column > last_key)
+    # One extra row tells us whether there is a next page without a COUNT(*).
+    return query.order_by(key_column).limit(params.limit + 1)
+
+
+def _page(rows: list, last_key, params: PageParams) -> dict:
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        next_cursor = encode_cursor(last_key(rows[-1]))
+    return {"items": rows, "next_cursor": next_cursor, "limit": params.limit}
+
+
+async def paginate(db: AsyncSession, query: Select, key_column, params: PageParams) -> dict:
+    """
+    Keyset pagination over ``key_column`` (a unique, ordered column, normally the
+    primary key). Each page is ``WHERE key > :last ORDER BY key LIMIT n``, so cost
+    stays the same on page 1 and page 10,000, unlike OFFSET.
+    """
+    rows = (await db.scalars(_keyset_query(query, key_column, params))).all()
+    return _page(rows, lambda row: getattr(row, key_column.key), params)
+
+
+async def paginate_rows(db: AsyncSession, query: Select, key_column, params: PageParams) -> dict:
+    """
+    ``paginate`` for a column select (see ``utils.fast_json.schema_columns``):
+    items are plain dicts, ready for ``rows_response``. ``key_column`` must be
+    one of the selected columns.
+    """
+    rows = [dict(row) for row in (await db.execute(_keyset_query(query, key_column, params))).mappings()]
+    return _page(rows, lambda row: row[key_column.key], params)
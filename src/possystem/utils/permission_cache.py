@@ -0,0 +1,144 @@
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..models.users.orm import User
+from ..models.permissions.orm import Permission
+from ..models.role_has_permissions.orm import role_has_permissions
+from ..models.permission_versions.orm import PermissionVersion
+
+
+_MISSING = object()
+# Returned by get_user_role_id() when the user row does not exist.
+UNKNOWN_USER = object()
+
+
+class PermissionCache:
+    """
+    In-process cache of role permissions used by ``require_permission``.
+
+    Holds two maps: ``user_id -> role_id`` and ``role_id -> frozenset`` of
+    permission names. ``invalidate`` drops them right away in the current
+    process; other workers notice the change through the shared
+    ``permission_versions`` row, which ``require_permission`` reads through
+    ``shared_version`` before every check, and drop everything. So a change
+    reaches every worker within ``version_check_seconds``; ``ttl`` is only
+    a backstop for writes that skip the ORM hooks.
+
+    ``version`` is bumped on every invalidation. A loader that started before
+    an invalidation does not store its (possibly stale) result.
+    """
+
+    def __init__(self, ttl: float, version_check_seconds: float):
+        self.ttl = ttl
+        self.version_check_seconds = version_check_seconds
+        self.version = 0
+        # Last value read from permission_versions and when (monotonic)
+        self._shared: tuple[int, float] | None = None
+        self._users: dict[int, tuple[int | None, float]] = {}
+        self._roles: dict[int, tuple[frozenset[str], float]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Checks answered from the token's permission bitmap (see utils.token_permissions)
+        self.token_hits = 0
+
+    def _get(self, store: dict, key: int):
+        entry = store.get(key)
+        if entry is None:
+            return _MISSING
+        value, loaded_at = entry
+        if time.monotonic() - loaded_at > self.ttl:
+            store.pop(key, None)
+            return _MISSING
+        return value
+
+    def _put(self, store: dict, key: int, value, version: int):
+        if self.ttl > 0 and version == self.version:
+            store[key] = (value, time.monotonic())
+
+    async def shared_version(self, db: AsyncSession, fresh: bool = False) -> int:
+        """
+        Version of the permission data in the database, what token ``pv``
+        claims are issued at and compared with. Reused for
+        ``version_check_seconds`` unless ``fresh``; a new value means another
+        worker changed something, so the local maps are dropped.
+        """
+        if not fresh and self._shared is not None and time.monotonic() - self._shared[1] <= self.version_check_seconds:
+            return self._shared[0]
+        shared = await db.scalar(select(PermissionVersion.version).where(PermissionVersion.id == 1)) or 0
+        if self._shared is not None and self._shared[0] != shared:
+            self.invalidate()
+        self._shared = (shared, time.monotonic())
+        return shared
+
+    async def get_user_role_id(self, db: AsyncSession, user_id: int):
+        """Role id of the user (``None`` if unassigned), or ``UNKNOWN_USER`` if the user doesn't exist."""
+        role_id = self._get(self._users, user_id)
+        if role_id is not _MISSING:
+            self.hits += 1
+            return role_id
+
+        self.misses += 1
+        version = self.version
+        row = (await db.execute(select(User.role_id).where(User.id == user_id))).first()
+        if row is None:
+            return UNKNOWN_USER
+        self._put(self._users, user_id, row.role_id, version)
+        return row.role_id
+
+    async def get_role_permissions(self, db: AsyncSession, role_id: int) -> frozenset[str]:
+        permissions = self._get(self._roles, role_id)
+        if permissions is not _MISSING:
+            self.hits += 1
+            return permissions
+
+        self.misses += 1
+        version = self.version
+        names = await db.scalars(
+            select(Permission.name)
+            .join(role_has_permissions, role_has_permissions.c.permission_id == Permission.id)
+            .where(role_has_permissions.c.role_id == role_id)
+        )
+        permissions = frozenset(names.all())
+        self._put(self._roles, role_id, permissions, version)
+        return permissions
+
+    def invalidate(self, *, role_id: int | None = None, user_id: int | None = None):
+        """
+        Drop cached entries. With no arguments everything is dropped; use that
+        when a change can affect several roles (permission rename/delete, role delete).
+        """
+        self.version += 1
+        self.invalidations += 1
+        # This worker's own change: read the new shared version on the next check.
+        self._shared = None
+        if role_id is None and user_id is None:
+            self._users.clear()
+            self._roles.clear()
+            return
+        if role_id is not None:
+            self._roles.pop(role_id, None)
+        if user_id is not None:
+            self._users.pop(user_id, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl,
+            "version": self.version,
+            "shared_version": self._shared[0] if self._shared is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "token_hits": self.token_hits,
+            "cached_users": len(self._users),
+            "cached_roles": len(self._roles),
+        }
+
+
+permission_cache = PermissionCache(
+    ttl=settings.permission_cache_ttl,
+    version_check_seconds=settings.permission_version_check_seconds,
+)
@@ -1,16 +1,20 @@
 from fastapi import Depends, HTTPException
 from starlette import status
 from ..models.users.orm import User
+from ..models.roles.orm import Role
 from typing import Annotated
-from sqlalchemy.orm import Session
-from ..db.session import get_db
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db.session import get_async_db
+from .permission_cache import permission_cache, UNKNOWN_USER
+from .token_permissions import authorize_from_token
+from .password_hashing import bcrypt_context, password_hasher
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from datetime import timedelta, datetime, timezone
 from jose import jwt, JWTError
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 oauth2_dependency = Annotated[str, Depends(oauth2_scheme)]
 auth_dependency = Annotated[OAuth2PasswordRequestForm, Depends()]
@@ -20,21 +24,31 @@ SECRET_KEY = "20e0033a91e824639af6207425e11b647c68c2c613abf94f115014e4495a43f6"
 ALGORITHM = "HS256"
 
 
-def authenticate_user(db, email: str, password: str):
-    user_model = db.query(User).filter(User.email == email).first()
-    if not user_model or not bcrypt_context.verify(password, user_model.password):
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    # Login needs the hash, the ids and the role name for the token; nothing else.
+    user_model = await db.scalar(
+        select(User)
+        .options(
+            load_only(User.id, User.email, User.password, User.role_id),
+            joinedload(User.role).load_only(Role.name),
+        )
+        .where(User.email == email)
+    )
+    if not user_model or not await password_hasher.verify(password, user_model.password):
         return False
     return user_model
 
 
-def create_jwt_token(username:str, user_id:int, role:str, expires_delta: timedelta): #Get current user data
+def create_jwt_token(username:str, user_id:int, role:str, expires_delta: timedelta, permission_claims: dict | None = None): #Get current user data
     encode = {
         "sub": username,
         "id": user_id,
         "role": role
     }
-    expires = datetime.now(timezone.utc) + expires_delta
-    encode.update({"exp": expires})
+    if permission_claims:
+        encode.update(permission_claims)
+    now = datetime.now(timezone.utc)
+    encode.update({"iat": now, "exp": now + expires_delta})
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -47,7 +61,13 @@ async def decode_jwt_token(token: oauth2_dependency):
         user_role: str = payload.get("role")
         if username is None or user_id is None:
             raise credentials_exception
-        return {"username": username, "id": user_id, "user_role": user_role}
+        return {
+            "username": username,
+            "id": user_id,
+            "user_role": user_role,
+            # Optional permission bitmap claims (see utils.token_permissions)
+            "permission_claims": {key: payload[key] for key in ("perms", "pv", "pix", "iat") if key in payload},
+        }
     except JWTError:
         raise credentials_exception
 
@@ -60,17 +80,29 @@ def require_permission(permission: str):
         token_data: user_dependency,
         db: db_dependency
     ):
-        # Fetch the user from DB
-        user = db.query(User).filter(User.id == token_data["id"]).first()
-        if not user:
+        # A change made on any worker moves the shared version, which drops this
+        # worker's cached roles and makes older token bitmaps stale.
+        version = await permission_cache.shared_version(db)
+
+        # Authorize from the token's permission bitmap when it is fresh
+        allowed = authorize_from_token(token_data["permission_claims"], permission, version)
+        if allowed is not None:
+            permission_cache.token_hits += 1
+            if not allowed:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+            return token_data
+
+        # Resolve the user's role (cached, no SQL on a hit)
+        role_id = await permission_cache.get_user_role_id(db, token_data["id"])
+        if role_id is UNKNOWN_USER:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
 
             # Ensure user has a role
-        if not user.role:
+        if role_id is None:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Role not assigned")
 
-        # Collect permissions from user's role
-        user_permissions = {perm.name for perm in user.role.permissions}  # assuming role.permissions relationship
+        # Collect permissions from user's role (cached per role)
+        user_permissions = await permission_cache.get_role_permissions(db, role_id)
 
         # Check required permission
         if permission not in user_permissions:
@@ -0,0 +1,74 @@
+import base64
+import time
+import zlib
+from typing import Iterable
+from ..config import settings
+from ..seeds.seed_permissions import PERMISSIONS
+
+
+# Bit i of the token bitmap stands for PERMISSIONS[i].
+PERMISSION_INDEX = {name: i for i, name in enumerate(PERMISSIONS)}
+
+# Fingerprint of the index layout. A token minted against a different
+# PERMISSIONS list (older or newer deploy) is never read from.
+PERMISSION_INDEX_FINGERPRINT = format(zlib.crc32("\n".join(PERMISSIONS).encode()), "08x")
+
+
+def encode_permissions(names: Iterable[str]) -> str:
+    """Pack permission names into a base64url bitmap. Names outside the index are left out."""
+    bits = 0
+    for name in names:
+        index = PERMISSION_INDEX.get(name)
+        if index is not None:
+            bits |= 1 << index
+    raw = bits.to_bytes((len(PERMISSIONS) + 7) // 8, "little")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def bitmap_has(bitmap: str, name: str) -> bool | None:
+    """Whether ``name`` is set in ``bitmap``; ``None`` if it can't be answered from the bitmap."""
+    index = PERMISSION_INDEX.get(name)
+    if index is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(bitmap + "=" * (-len(bitmap) % 4))
+    except (ValueError, TypeError):
+        return None
+    if index // 8 >= len(raw):
+        return None
+    return bool(raw[index // 8] >> (index % 8) & 1)
+
+
+def build_permission_claims(permissions: Iterable[str], version: int) -> dict:
+    """
+    Claims added to the access token: the bitmap (``perms``), the shared
+    permission version it was read at (``pv``, from ``permission_versions``)
+    and the index fingerprint (``pix``).
+    Read ``version`` *before* loading ``permissions`` so a concurrent change makes
+    the token stale instead of silently carrying the old set.
+    """
+    return {
+        "perms": encode_permissions(permissions),
+        "pv": version,
+        "pix": PERMISSION_INDEX_FINGERPRINT,
+    }
+
+
+def authorize_from_token(payload: dict, permission: str, current_version: int) -> bool | None:
+    """
+    Decide ``permission`` from the token alone.
+
+    Returns ``True``/``False`` when the token's permission claims are usable,
+    ``None`` when the caller has to fall back to the permission cache/database:
+    no claims, a different index layout, a stale ``pv``, a token older than
+    ``jwt_permissions_max_age`` or a permission that isn't in the index.
+    """
+    bitmap = payload.get("perms")
+    if bitmap is None or payload.get("pix") != PERMISSION_INDEX_FINGERPRINT:
+        return None
+    if payload.get("pv") != current_version:
+        return None
+    issued_at = payload.get("iat")
+    if issued_at is None or time.time() - issued_at > settings.jwt_permissions_max_age:
+        return None
+    return bitmap_has(bitmap, permission)
@@ -0,0 +1,125 @@
+"""
+Statements and rows ``require_permission`` loads, cold and warm.
+
+The check must read the shared permission version, the caller's role id
+and that role's permission names, nothing from other users, branches or
+roles, and nothing at all once the permission cache holds them (until the
+version is due for another read). ``benchmarks/auth_load_profile.py``
+reports the same numbers at scale.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from possystem.db.session import Base
+from possystem import models  # noqa: F401  (registers every table on Base.metadata)
+from possystem.models.branches.orm import Branch
+from possystem.models.permissions.orm import Permission
+from possystem.models.roles.orm import Role
+from possystem.models.role_has_permissions.orm import role_has_permissions
+from possystem.models.permission_versions.orm import bump_permission_version
+from possystem.models.users.orm import User
+from possystem.seeds.seed_permissions import PERMISSIONS
+from possystem.utils.permission_cache import permission_cache
+from possystem.utils.security import require_permission
+
+
+USERS = 50
+BRANCHES = 5
+CASHIER_PERMISSIONS = [name for name in PERMISSIONS if name.startswith("sales.")]
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A staff of ``USERS`` sharing two roles across ``BRANCHES``; yields (async URL, a cashier's id)."""
+    path = tmp_path / "auth.sqlite"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Permission), [{"name": name} for name in PERMISSIONS])
+        permission_ids = dict(conn.execute(select(Permission.name, Permission.id)).all())
+        cashier_id, admin_id = conn.scalars(
+            insert(Role).returning(Role.id, sort_by_parameter_order=True), [{"name": "cajero"}, {"name": "admin"}]
+        ).all()
+        conn.execute(insert(role_has_permissions), [
+            *({"role_id": cashier_id, "permission_id": permission_ids[name]} for name in CASHIER_PERMISSIONS),
+            *({"role_id": admin_id, "permission_id": permission_id} for permission_id in permission_ids.values()),
+        ])
+        conn.execute(insert(Branch), [{"name": f"Sucursal {i}", "address": f"Calle {i}"} for i in range(BRANCHES)])
+        branch_ids = conn.scalars(select(Branch.id)).all()
+        conn.execute(insert(User), [
+            {
+                "name": f"Empleado {i}",
+                "email": f"empleado{i}@test.local",
+                "password": "not-a-hash",
+                "role_id": cashier_id if i % 2 else admin_id,
+                "branch_id": branch_ids[i % BRANCHES],
+            }
+            for i in range(USERS)
+        ])
+        user_id = conn.scalar(select(User.id).where(User.role_id == cashier_id).limit(1))
+        bump_permission_version(conn)
+    sync_engine.dispose()
+    yield f"sqlite+aiosqlite:///{path}", user_id
+
+
+async def _measure(session_factory, action) -> dict:
+    """Statements and rows fetched through the session while ``action(db)`` runs."""
+    counts = {"statements": 0, "rows": 0}
+    async with session_factory() as db:
+        @event.listens_for(db.sync_session, "do_orm_execute")
+        def count_rows(state):
+            frozen = state.invoke_statement().freeze()
+            counts["statements"] += 1
+            counts["rows"] += len(frozen.data)
+            return frozen()
+
+        await action(db)
+    return counts
+
+
+def _checks(url, user_id, *steps):
+    """Runs ``require_permission("sales.create")`` for ``user_id`` once per step; ``step(engine)`` runs first if given."""
+    check = require_permission("sales.create")
+    token = {"id": user_id, "permission_claims": {}}
+
+    async def run():
+        engine = create_async_engine(url)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        results = []
+        try:
+            permission_cache.invalidate()
+            for step in steps:
+                if step is not None:
+                    await step(engine)
+                results.append(await _measure(session_factory, lambda db: check(token, db)))
+        finally:
+            await engine.dispose()
+        return results
+
+    return asyncio.run(run())
+
+
+def test_permission_check_loads_only_the_callers_role(database, monkeypatch):
+    monkeypatch.setattr(permission_cache, "version_check_seconds", 60.0)
+    cold, warm = _checks(*database, None, None)
+
+    # The shared version, the user's role id, then that role's permission names
+    assert cold == {"statements": 3, "rows": 2 + len(CASHIER_PERMISSIONS)}
+    assert warm == {"statements": 0, "rows": 0}
+
+
+def test_change_on_another_worker_drops_the_cache(database, monkeypatch):
+    monkeypatch.setattr(permission_cache, "version_check_seconds", 0.0)
+
+    async def change_elsewhere(engine):
+        async with engine.begin() as conn:
+            await conn.run_sync(bump_permission_version)
+
+    cold, unchanged, changed = _checks(*database, None, None, change_elsewhere)
+
+    # Only the version is read while it stays put; a new one reloads the role
+    assert unchanged == {"statements": 1, "rows": 1}
+    assert changed == cold